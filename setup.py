@@ -54,8 +54,9 @@ dev_requirements = [
 optional_requirements = {
     'monitoring': ['psutil>=5.8.0'],
     'encryption': ['cryptography>=3.4.0'],
+    'async': ['aiohttp>=3.8.0'],
     'dev': dev_requirements,
-    'all': ['psutil>=5.8.0', 'cryptography>=3.4.0'] + dev_requirements
+    'all': ['psutil>=5.8.0', 'cryptography>=3.4.0', 'aiohttp>=3.8.0'] + dev_requirements
 }
 
 setup(
@@ -22,47 +22,81 @@ Claude Notifier - Claude Code智能通知系统
 """
 
 import os
+import importlib
 from .__version__ import __version__, __version_info__
 
-# 核心模块 - 始终可用
-from .core.notifier import Notifier
-from .core.config import ConfigManager
-from .core.channels import get_available_channels
+# 核心模块 - 始终可用，首次访问时才导入
+# 钩子进程只导入 claude_notifier.hooks.claude_hook，不应为此加载 Notifier、
+# 渠道、配置解析 (yaml) 和 requests 等重型依赖
+_CORE_ATTRS = {
+    'Notifier': ('.core.notifier', 'Notifier'),
+    'ConfigManager': ('.core.config', 'ConfigManager'),
+    'get_available_channels': ('.core.channels', 'get_available_channels'),
+}
 
 # 可选模块 - 按需导入
+_OPTIONAL_ATTRS = {
+    # 智能功能模块
+    'IntelligentNotifier': ('.intelligence.coordinator', 'IntelligentNotifier'),
+    # 监控功能模块
+    'StatsManager': ('.monitoring.stats', 'StatsManager'),
+    # 集成功能模块
+    'HookManager': ('.integration.claude_hooks', 'HookManager'),
+}
+
+_optional = None
+
+
 def _import_optional_modules():
     """动态导入可选功能模块"""
     optional_modules = {}
     
-    # 智能功能模块
-    try:
-        from .intelligence.coordinator import IntelligentNotifier
-        optional_modules['IntelligentNotifier'] = IntelligentNotifier
-    except ImportError:
-        pass
-        
-    # 监控功能模块
-    try:
-        from .monitoring.stats import StatsManager
-        optional_modules['StatsManager'] = StatsManager
-    except ImportError:
-        pass
-        
-    # 集成功能模块  
-    try:
-        from .integration.claude_hooks import HookManager
-        optional_modules['HookManager'] = HookManager
-    except ImportError:
-        pass
-        
+    for name, (module_name, attr) in _OPTIONAL_ATTRS.items():
+        try:
+            module = importlib.import_module(module_name, __name__)
+            optional_modules[name] = getattr(module, attr)
+        except ImportError:
+            pass
+            
     return optional_modules
 
-# 动态添加可选模块到命名空间（可通过环境变量跳过以加速导入/避免CI阻塞）
-if os.getenv('CLAUDE_NOTIFIER_SKIP_OPTIONAL_IMPORTS') == '1':
-    _optional = {}
-else:
-    _optional = _import_optional_modules()
-locals().update(_optional)
+
+def _get_optional():
+    """首次使用时导入可选模块（可通过环境变量跳过以加速导入/避免CI阻塞）"""
+    global _optional
+    if _optional is None:
+        if os.getenv('CLAUDE_NOTIFIER_SKIP_OPTIONAL_IMPORTS') == '1':
+            _optional = {}
+        else:
+            _optional = _import_optional_modules()
+    return _optional
+
+
+def __getattr__(name):
+    """惰性解析核心类、可选模块和兼容性别名"""
+    if name in _CORE_ATTRS:
+        module_name, attr = _CORE_ATTRS[name]
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+    elif name in _OPTIONAL_ATTRS:
+        optional = _get_optional()
+        if name not in optional:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        value = optional[name]
+    # 兼容性别名 (保持向后兼容)
+    elif name == 'ClaudeCodeNotifier':
+        value = __getattr__('Notifier')  # 兼容旧版本
+    elif name == 'EnhancedNotifier':
+        value = _get_optional().get('IntelligentNotifier') or __getattr__('Notifier')  # 智能版本别名
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_CORE_ATTRS) | set(_get_optional()))
+
 
 # 公开API
 __all__ = [
@@ -74,23 +108,20 @@ __all__ = [
     'Notifier',
     'ConfigManager', 
     'get_available_channels',
-    
-    # 可选功能 (如果可用)
-    *_optional.keys()
 ]
 
 # 功能检查函数
 def has_intelligence() -> bool:
     """检查是否安装了智能功能模块"""
-    return 'IntelligentNotifier' in _optional
+    return 'IntelligentNotifier' in _get_optional()
 
 def has_monitoring() -> bool:
     """检查是否安装了监控功能模块"""
-    return 'StatsManager' in _optional
+    return 'StatsManager' in _get_optional()
 
 def has_integration() -> bool:
     """检查是否安装了集成功能模块"""
-    return 'HookManager' in _optional
+    return 'HookManager' in _get_optional()
 
 def get_feature_status():
     """获取功能模块安装状态"""
@@ -111,7 +142,3 @@ def print_feature_status():
     print(f"  {'✅' if status['intelligence'] else '❌'} 智能功能: {'已安装' if status['intelligence'] else '未安装 (pip install claude-code-notifier[intelligence])'}")
     print(f"  {'✅' if status['monitoring'] else '❌'} 监控功能: {'已安装' if status['monitoring'] else '未安装 (pip install claude-code-notifier[monitoring])'}")
     print(f"  {'✅' if status['integration'] else '❌'} 集成功能: {'已安装' if status['integration'] else '未安装 (pip install claude-code-notifier[integration])'}")
-
-# 兼容性别名 (保持向后兼容)
-ClaudeCodeNotifier = Notifier  # 兼容旧版本
-EnhancedNotifier = _optional.get('IntelligentNotifier', Notifier)  # 智能版本别名
\ No newline at end of file
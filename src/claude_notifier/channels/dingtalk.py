@@ -6,7 +6,7 @@ import hmac
 import hashlib
 import base64
 import urllib.parse
-import requests
+from ..core.channels.http_client import http_post
 import json
 from typing import Dict, Any
 from .base import BaseChannel
@@ -34,7 +34,7 @@ class DingtalkChannel(BaseChannel):
         try:
             url = self._sign_webhook() if self.secret else self.webhook
             
-            response = requests.post(
+            response = http_post(
                 url,
                 headers={'Content-Type': 'application/json'},
                 data=json.dumps(message),
@@ -5,7 +5,7 @@ import time
 import hmac
 import hashlib
 import base64
-import requests
+from ..core.channels.http_client import http_post
 import json
 from typing import Dict, Any
 from .base import BaseChannel
@@ -42,7 +42,7 @@ class FeishuChannel(BaseChannel):
                 message['timestamp'] = timestamp
                 message['sign'] = sign
                 
-            response = requests.post(
+            response = http_post(
                 self.webhook,
                 headers={'Content-Type': 'application/json'},
                 data=json.dumps(message),
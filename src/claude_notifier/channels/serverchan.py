@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+from ..core.channels.http_client import http_post
 import logging
 from typing import Dict, Any
 from .base import BaseChannel
@@ -39,7 +39,7 @@ class ServerChanChannel(BaseChannel):
                 'channel': 9  # 使用企业微信应用通道，支持markdown
             }
             
-            response = requests.post(url, data=payload, timeout=10)
+            response = http_post(url, data=payload, timeout=10)
             result = response.json()
             
             if result.get('code') == 0:
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import time
-import requests
+from ..core.channels.http_client import http_post, http_get
 import json
 from typing import Dict, Any
 from .base import BaseChannel
@@ -27,7 +27,7 @@ class TelegramChannel(BaseChannel):
                 'disable_web_page_preview': True
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = http_post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -144,7 +144,7 @@ Claude Code 已自动暂停执行，等待您在终端确认
         # 测试 Bot 连接
         try:
             url = f'{self.api_url}/getMe'
-            response = requests.get(url, timeout=5)
+            response = http_get(url, timeout=5)
             if response.status_code == 200:
                 result = response.json()
                 if result.get('ok'):
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import time
-import requests
+from ..core.channels.http_client import http_post
 import json
 from typing import Dict, Any
 from .base import BaseChannel
@@ -17,7 +17,7 @@ class WechatWorkChannel(BaseChannel):
     def _send_message(self, message: Dict[str, Any]) -> bool:
         """发送消息到企业微信"""
         try:
-            response = requests.post(
+            response = http_post(
                 self.webhook,
                 headers={'Content-Type': 'application/json'},
                 data=json.dumps(message),
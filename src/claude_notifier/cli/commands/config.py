@@ -534,15 +534,30 @@ def _generate_config_template(template_type):
             'enabled': True,
             'operation_gate': {
                 'enabled': True,
-                'sensitivity': 'medium'
+                'sensitivity': 'medium',
+                # 钩子进程之间共享使用量，重启后仍计入分钟/小时/天限流
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/usage.db'
+                }
             },
             'notification_throttle': {
                 'enabled': True,
-                'duplicate_window': 300
+                'duplicate_window': 300,
+                # 钩子进程之间共享频率计数和重复检测
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/throttle.db'
+                }
             },
             'message_grouper': {
                 'enabled': True,
-                'group_window': 120
+                'group_window': 120,
+                # 未发送的分组由后续钩子进程继续累积
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/groups.db'
+                }
             },
             'cooldown_manager': {
                 'enabled': True,
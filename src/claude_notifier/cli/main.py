@@ -1257,15 +1257,30 @@ def _generate_config_template(template_type):
             'enabled': True,
             'operation_gate': {
                 'enabled': True,
-                'sensitivity': 'medium'
+                'sensitivity': 'medium',
+                # 钩子进程之间共享使用量，重启后仍计入分钟/小时/天限流
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/usage.db'
+                }
             },
             'notification_throttle': {
                 'enabled': True,
-                'duplicate_window': 300
+                'duplicate_window': 300,
+                # 钩子进程之间共享频率计数和重复检测
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/throttle.db'
+                }
             },
             'message_grouper': {
                 'enabled': True,
-                'group_window': 120
+                'group_window': 120,
+                # 未发送的分组由后续钩子进程继续累积
+                'persistence': {
+                    'enabled': True,
+                    'path': '~/.claude-notifier/groups.db'
+                }
             },
             'cooldown_manager': {
                 'enabled': True,
@@ -1545,6 +1560,155 @@ def verify(fix):
         sys.exit(1)
 
 
+@cli.group(invoke_without_command=True)
+@click.pass_context
+def daemon(ctx):
+    """常驻守护进程管理
+    
+    守护进程保持通知器、渠道和智能组件常驻内存，钩子脚本检测到
+    守护进程后只需通过 Unix 套接字转发事件，显著降低每次钩子调用的启动开销。
+    守护进程未运行时钩子自动回退到进程内处理。
+    
+    Commands:
+        start  - 启动守护进程
+        stop   - 停止守护进程
+        status - 查看守护进程状态
+        reload - 重新加载配置
+        
+    Examples:
+        claude-notifier daemon start              # 后台启动
+        claude-notifier daemon start --foreground # 前台运行
+        claude-notifier daemon status             # 查看状态
+    """
+    if ctx.invoked_subcommand is None:
+        _show_daemon_status()
+
+
+def _show_daemon_status():
+    """显示守护进程状态"""
+    from claude_notifier.hooks.client import ping_daemon, get_socket_path, is_supported
+    
+    if not is_supported():
+        click.echo("❌ 当前平台不支持 Unix 域套接字，钩子将使用进程内模式")
+        return
+        
+    info = ping_daemon()
+    if info:
+        click.echo("✅ 守护进程运行中")
+        click.echo(f"  PID: {info.get('pid')}")
+        click.echo(f"  套接字: {info.get('socket')}")
+        click.echo(f"  运行时间: {int(info.get('uptime', 0))}秒")
+        click.echo(f"  模式: {info.get('mode')}")
+        click.echo(f"  分离投递: {'启用' if info.get('detached') else '禁用'} (待发送 {info.get('pending_deliveries', 0)})")
+        stats = info.get('stats', {})
+        click.echo(f"  已处理钩子事件: {stats.get('hook_events', 0)} (错误 {stats.get('errors', 0)})")
+    else:
+        click.echo("⚪ 守护进程未运行 (钩子使用进程内模式)")
+        click.echo(f"  套接字: {get_socket_path()}")
+        click.echo("💡 运行 'claude-notifier daemon start' 启动守护进程")
+
+
+@daemon.command(name='start')
+@click.option('--foreground', is_flag=True, help='前台运行（不脱离终端）')
+@click.option('--config', 'config_path', help='配置文件路径')
+def daemon_start(foreground, config_path):
+    """启动守护进程"""
+    from claude_notifier.hooks.client import ping_daemon, get_socket_path, is_supported
+    
+    if not is_supported():
+        click.echo("❌ 当前平台不支持 Unix 域套接字")
+        sys.exit(1)
+        
+    if ping_daemon():
+        click.echo("✅ 守护进程已在运行")
+        return
+        
+    if foreground:
+        from claude_notifier.hooks.daemon import run_daemon
+        click.echo(f"🚀 守护进程前台运行: {get_socket_path()} (Ctrl+C 退出)")
+        try:
+            run_daemon(config_path=config_path)
+        except RuntimeError as e:
+            click.echo(f"❌ {e}")
+            sys.exit(1)
+        return
+        
+    import os
+    import time
+    import subprocess
+    
+    log_dir = os.path.expanduser('~/.claude-notifier/logs')
+    os.makedirs(log_dir, exist_ok=True)
+    
+    command = [sys.executable, '-c', 'from claude_notifier.hooks.daemon import main; main()']
+    if config_path:
+        command += ['--config', config_path]
+        
+    with open(os.path.join(log_dir, 'daemon.log'), 'a') as log_file:
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        
+    # 等待守护进程就绪
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        info = ping_daemon()
+        if info:
+            click.echo(f"✅ 守护进程已启动 (PID {info.get('pid')})")
+            return
+        time.sleep(0.1)
+        
+    click.echo("❌ 守护进程启动超时，请查看 ~/.claude-notifier/logs/daemon.log")
+    sys.exit(1)
+
+
+@daemon.command(name='stop')
+def daemon_stop():
+    """停止守护进程"""
+    import socket
+    from claude_notifier.hooks.client import request_daemon, ping_daemon, DaemonResponseError
+    
+    if not ping_daemon():
+        click.echo("⚪ 守护进程未运行")
+        return
+        
+    try:
+        request_daemon({'action': 'shutdown'}, timeout=5.0)
+    except (socket.timeout, DaemonResponseError) as e:
+        click.echo(f"❌ 停止守护进程失败: {e}")
+        sys.exit(1)
+    click.echo("✅ 守护进程已停止")
+
+
+@daemon.command(name='status')
+def daemon_status():
+    """查看守护进程状态"""
+    _show_daemon_status()
+
+
+@daemon.command(name='reload')
+def daemon_reload():
+    """重新加载守护进程配置"""
+    import socket
+    from claude_notifier.hooks.client import request_daemon, DaemonResponseError
+    
+    try:
+        response = request_daemon({'action': 'reload'}, timeout=30.0)
+    except (socket.timeout, DaemonResponseError) as e:
+        response = {'ok': False, 'error': str(e) or '响应超时'}
+    if response and response.get('ok'):
+        click.echo("✅ 守护进程配置已重新加载")
+    elif response is None:
+        click.echo("⚪ 守护进程未运行")
+    else:
+        click.echo(f"❌ 重新加载失败: {response.get('error')}")
+        sys.exit(1)
+
+
 @cli.group(invoke_without_command=True)
 @click.pass_context  
 def debug(ctx):
@@ -7,6 +7,7 @@
 """
 
 import abc
+import asyncio
 from typing import Dict, Any, Optional, List
 import logging
 
@@ -23,6 +24,9 @@ class BaseChannel(abc.ABC):
         self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
         
+        # 熔断器，由 Notifier 在初始化渠道时注入
+        self.circuit_breaker = None
+        
     @abc.abstractmethod
     def send_notification(self, template_data: Dict[str, Any], event_type: str = 'generic') -> bool:
         """发送通用通知
@@ -36,6 +40,47 @@ class BaseChannel(abc.ABC):
         """
         pass
         
+    async def asend_notification(self, template_data: Dict[str, Any], event_type: str = 'generic') -> bool:
+        """异步发送通用通知
+        
+        支持原生异步 I/O 的渠道应重写此方法；默认实现在事件循环的
+        默认执行器中调用同步的 send_notification，避免阻塞事件循环。
+        
+        Args:
+            template_data: 模板数据
+            event_type: 事件类型
+            
+        Returns:
+            发送是否成功
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.send_notification, template_data, event_type)
+        
+    def supports_native_async(self) -> bool:
+        """检查渠道是否支持原生异步发送
+        
+        Returns:
+            是否重写了 asend_notification
+        """
+        return type(self).asend_notification is not BaseChannel.asend_notification
+        
+    def reports_circuit_outcomes(self) -> bool:
+        """渠道是否自行向熔断器上报每次请求的结果
+        
+        返回 False 时由 Notifier 按整体发送结果上报；内部带重试的渠道
+        应逐次上报，并在熔断后停止后续重试。
+        """
+        return False
+        
+    def _record_circuit_outcome(self, success: bool):
+        """向熔断器上报一次请求结果"""
+        if self.circuit_breaker is None:
+            return
+        if success:
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_failure()
+            
     def send_permission_notification(self, data: Dict[str, Any]) -> bool:
         """发送权限确认通知"""
         return self.send_notification(data, 'permission')
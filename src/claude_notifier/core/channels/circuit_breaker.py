@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+渠道熔断器
+连续失败达到阈值后熔断渠道，冷却期内直接跳过发送；冷却结束后进入半开状态，
+仅放行一个探测请求，成功则恢复，失败则重新熔断。
+
+开启 persistence 后熔断状态保存在 SQLite 中，短生命周期的钩子进程共同累积失败次数，
+监控仪表板也能看到其他进程中的熔断状态。
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+
+class CircuitState:
+    """熔断器状态"""
+    CLOSED = 'closed'          # 正常发送
+    OPEN = 'open'              # 熔断中，跳过发送
+    HALF_OPEN = 'half_open'    # 冷却结束，等待探测结果
+
+
+# 熔断配置 (notifications.circuit_breaker)
+DEFAULT_BREAKER_CONFIG = {
+    'enabled': True,
+    'failure_threshold': 5,    # 连续失败（含超时）次数
+    'recovery_timeout': 60.0,  # 熔断冷却时间（秒）
+    'persistence': {           # 跨进程共享熔断状态
+        'enabled': False,
+        'path': '~/.claude-notifier/circuit.db'
+    }
+}
+
+
+class CircuitBreaker:
+    """单个渠道的熔断器（线程安全）"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0,
+                 store: Optional[Any] = None):
+        """初始化熔断器
+
+        Args:
+            name: 渠道名称
+            failure_threshold: 触发熔断的连续失败次数
+            recovery_timeout: 熔断后到半开探测的冷却时间（秒）
+            store: 共享熔断状态存储 (SQLiteBreakerStore)，None 则只保存在进程内
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.store = store
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+
+        self.stats = {
+            'opened': 0,
+            'rejected': 0,
+            'probes': 0
+        }
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        return self._state
+
+    def configure(self, failure_threshold: int, recovery_timeout: float, store: Optional[Any] = None):
+        """更新熔断参数（配置重载时调用，保留当前状态）"""
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.recovery_timeout = recovery_timeout
+            self.store = store
+
+    def _snapshot(self) -> tuple:
+        """当前状态 (状态, 连续失败次数, 熔断时间, 探测开始时间)"""
+        return (self._state, self._failures, self._opened_at, self._probe_started_at)
+
+    def _load(self):
+        """从共享存储加载状态（需持有锁）"""
+        row = self.store.load(self.name)
+        if row is None:
+            row = (CircuitState.CLOSED, 0, 0.0, 0.0)
+        self._state, self._failures, self._opened_at, self._probe_started_at = row
+
+    def _refresh(self):
+        """读取其他进程写入的最新状态（需持有锁）"""
+        if self.store is None:
+            return
+        try:
+            self._load()
+        except sqlite3.Error as e:
+            self.logger.error(f"读取熔断状态失败，使用进程内状态: {e}")
+
+    def _run(self, operation: Callable[[], Any]) -> Any:
+        """执行状态转换（需持有锁）
+
+        使用共享存储时在写事务中加载最新状态、执行转换并保存变化，
+        并发的钩子进程不会丢失彼此记录的失败。
+        """
+        if self.store is None:
+            return operation()
+
+        done, result = False, None
+        try:
+            with self.store.transaction():
+                self._load()
+                before, opened = self._snapshot(), self.stats['opened']
+                result, done = operation(), True
+                if self._snapshot() != before:
+                    self.store.save(self.name, self._snapshot(), self.failure_threshold,
+                                    self.recovery_timeout, self.stats['opened'] - opened)
+            return result
+        except sqlite3.Error as e:
+            self.logger.error(f"保存熔断状态失败，使用进程内状态: {e}")
+            return result if done else operation()
+
+    def allow_request(self) -> bool:
+        """是否允许发送
+
+        熔断冷却结束后转为半开并放行一个探测请求；探测结果返回前其他请求被拒绝
+        （探测超过冷却时间仍无结果时允许重新探测）。
+        """
+        with self._lock:
+            # 关闭状态（最常见）只需读取，不占用写事务
+            self._refresh()
+            if self._state == CircuitState.CLOSED:
+                return True
+            return self._run(self._allow_request)
+
+    def _allow_request(self) -> bool:
+        """熔断或半开状态下判断是否放行（需持有锁）"""
+        now = time.time()
+        if self._state == CircuitState.CLOSED:
+            return True
+
+        if self._state == CircuitState.OPEN and now - self._opened_at < self.recovery_timeout:
+            self.stats['rejected'] += 1
+            return False
+
+        if self._state == CircuitState.HALF_OPEN and now - self._probe_started_at < self.recovery_timeout:
+            self.stats['rejected'] += 1
+            return False
+
+        self._state = CircuitState.HALF_OPEN
+        self._probe_started_at = now
+        self.stats['probes'] += 1
+        self.logger.info(f"渠道 {self.name} 熔断冷却结束，发送探测请求")
+        return True
+
+    def record_success(self):
+        """记录一次成功，关闭熔断器"""
+        with self._lock:
+            self._run(self._record_success)
+
+    def _record_success(self):
+        """成功后关闭熔断器（需持有锁）"""
+        if self._state != CircuitState.CLOSED:
+            self.logger.info(f"渠道 {self.name} 已恢复")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self):
+        """记录一次失败，达到阈值或探测失败时熔断"""
+        with self._lock:
+            self._run(self._record_failure)
+
+    def _record_failure(self):
+        """累积失败，达到阈值或探测失败时熔断（需持有锁）"""
+        self._failures += 1
+        if self._state == CircuitState.HALF_OPEN or (
+                self._state == CircuitState.CLOSED and self._failures >= self.failure_threshold):
+            if self._state == CircuitState.CLOSED:
+                self.stats['opened'] += 1
+                self.logger.warning(
+                    f"渠道 {self.name} 连续失败 {self._failures} 次，熔断 {self.recovery_timeout} 秒"
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = time.time()
+
+    def reset(self):
+        """重置为关闭状态"""
+        with self._lock:
+            self._run(self._reset)
+
+    def _reset(self):
+        """重置为关闭状态（需持有锁）"""
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            self._refresh()
+            retry_in = None
+            if self._state == CircuitState.OPEN:
+                retry_in = max(0.0, self._opened_at + self.recovery_timeout - time.time())
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_in': retry_in,
+                **self.stats
+            }
+
+
+# 进程内共享：配置重载和多个 Notifier 实例沿用同一渠道的熔断状态
+_breakers: Dict[str, CircuitBreaker] = {}
+# 按路径共享的熔断状态存储
+_stores: Dict[str, Any] = {}
+_breakers_lock = threading.Lock()
+
+
+def _get_store(config: Optional[Dict[str, Any]], create: bool = True) -> Optional[Any]:
+    """获取熔断状态存储（需持有锁），未启用或初始化失败时返回 None
+
+    Args:
+        config: 持久化配置 (notifications.circuit_breaker.persistence)
+        create: 数据库文件不存在时是否创建
+    """
+    if not config or not config.get('enabled', False):
+        return None
+
+    path = os.path.expanduser(config.get('path', DEFAULT_BREAKER_CONFIG['persistence']['path']))
+    if path not in _stores:
+        if not create and not os.path.exists(path):
+            return None
+        # 延迟导入：未启用持久化时不加载 SQLite 存储模块
+        from ...utils.breaker_store import create_breaker_store
+        _stores[path] = create_breaker_store({**config, 'path': path})
+    return _stores[path]
+
+
+def get_circuit_breaker(name: str, config: Optional[Dict[str, Any]] = None) -> CircuitBreaker:
+    """获取渠道的熔断器（不存在时创建）
+
+    Args:
+        name: 渠道名称
+        config: 熔断配置，键同 DEFAULT_BREAKER_CONFIG
+
+    Returns:
+        该渠道的熔断器
+    """
+    settings = DEFAULT_BREAKER_CONFIG.copy()
+    settings.update(config or {})
+
+    with _breakers_lock:
+        store = _get_store(settings['persistence'])
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, settings['failure_threshold'], settings['recovery_timeout'], store)
+            _breakers[name] = breaker
+        else:
+            breaker.configure(settings['failure_threshold'], settings['recovery_timeout'], store)
+        return breaker
+
+
+def get_circuit_breaker_states(store_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """获取所有渠道熔断器的状态
+
+    Args:
+        store_path: 共享熔断状态数据库路径，提供时同时包含其他进程记录的渠道
+            （如在独立 CLI 进程中运行的监控仪表板）；文件不存在时忽略
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+        store = _get_store({'enabled': True, 'path': store_path}, create=False) if store_path else None
+
+    states = {name: breaker.get_status() for name, breaker in breakers.items()}
+    if store is not None:
+        try:
+            rows = store.load_all()
+        except sqlite3.Error as e:
+            logging.getLogger('CircuitBreaker').error(f"读取熔断状态失败: {e}")
+            rows = []
+
+        now = time.time()
+        for row in rows:
+            if row['name'] in states:
+                continue
+            retry_in = None
+            if row['state'] == CircuitState.OPEN:
+                retry_in = max(0.0, row['opened_at'] + row['recovery_timeout'] - now)
+            states[row['name']] = {
+                'state': row['state'],
+                'consecutive_failures': row['failures'],
+                'failure_threshold': row['failure_threshold'],
+                'retry_in': retry_in,
+                'opened': row['opened'],
+                'rejected': 0,
+                'probes': 0
+            }
+    return dict(sorted(states.items()))
+
+
+def reset_circuit_breakers():
+    """移除所有熔断器（共享存储中的状态保留）"""
+    with _breakers_lock:
+        _breakers.clear()
+        _stores.clear()
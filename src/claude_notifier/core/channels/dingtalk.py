@@ -23,6 +23,7 @@ except ImportError:
     requests = None
 
 from .base import BaseChannel
+from .http_client import AIOHTTP_AVAILABLE, async_request, http_post
 
 
 class DingtalkChannel(BaseChannel):
@@ -91,29 +92,63 @@ class DingtalkChannel(BaseChannel):
         try:
             url = self._sign_webhook()
             
-            response = requests.post(
+            response = http_post(
                 url,
                 headers={'Content-Type': 'application/json'},
                 data=json.dumps(message),
                 timeout=10
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('errcode') == 0:
-                    self.logger.debug("钉钉通知发送成功")
-                    return True
-                else:
-                    self.logger.error(f"钉钉通知发送失败: {result}")
-                    return False
-            else:
-                self.logger.error(f"钉钉API请求失败: {response.status_code}")
-                return False
+            return self._check_response(response)
                 
         except Exception as e:
             self.logger.error(f"钉钉通知发送异常: {e}")
             return False
             
+    async def _asend_message(self, message: Dict[str, Any]) -> bool:
+        """异步发送消息到钉钉
+        
+        Args:
+            message: 钉钉消息格式
+            
+        Returns:
+            发送是否成功
+        """
+        try:
+            response = await async_request(
+                'POST',
+                self._sign_webhook(),
+                headers={'Content-Type': 'application/json'},
+                data=json.dumps(message),
+                timeout=10
+            )
+            return self._check_response(response)
+            
+        except Exception as e:
+            self.logger.error(f"钉钉通知发送异常: {e}")
+            return False
+            
+    def _check_response(self, response) -> bool:
+        """检查钉钉 API 响应
+        
+        Args:
+            response: HTTP 响应对象 (requests.Response 或 AsyncResponse)
+            
+        Returns:
+            发送是否成功
+        """
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('errcode') == 0:
+                self.logger.debug("钉钉通知发送成功")
+                return True
+            else:
+                self.logger.error(f"钉钉通知发送失败: {result}")
+                return False
+        else:
+            self.logger.error(f"钉钉API请求失败: {response.status_code}")
+            return False
+            
     def send_notification(self, template_data: Dict[str, Any], event_type: str = 'generic') -> bool:
         """发送钉钉通知
         
@@ -144,6 +179,34 @@ class DingtalkChannel(BaseChannel):
             self.logger.error(f"钉钉通知处理异常: {e}")
             return False
             
+    async def asend_notification(self, template_data: Dict[str, Any], event_type: str = 'generic') -> bool:
+        """异步发送钉钉通知 (需要 aiohttp，否则回退到执行器)
+        
+        Args:
+            template_data: 模板数据
+            event_type: 事件类型
+            
+        Returns:
+            发送是否成功
+        """
+        if not AIOHTTP_AVAILABLE:
+            return await super().asend_notification(template_data, event_type)
+            
+        if not self.is_enabled():
+            return False
+            
+        if not self.validate_config():
+            return False
+            
+        try:
+            formatted_data = self.format_message_for_channel(template_data)
+            message = self._build_dingtalk_message(formatted_data, event_type)
+            return await self._asend_message(message)
+            
+        except Exception as e:
+            self.logger.error(f"钉钉通知处理异常: {e}")
+            return False
+            
     def _build_dingtalk_message(self, data: Dict[str, Any], event_type: str) -> Dict[str, Any]:
         """构建钉钉消息格式
         
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+渠道 HTTP 客户端
+所有 HTTP 类渠道共享的连接池层：
+- 同步请求按主机复用 requests.Session (keep-alive)，避免每次通知重新进行 DNS/TCP/TLS 握手
+- 异步请求基于 aiohttp (可选依赖)，每个事件循环共享一个 ClientSession
+"""
+
+import json
+import asyncio
+import weakref
+import threading
+import importlib.util
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+# 可选依赖处理
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    requests = None
+
+# aiohttp 导入开销较大，只检测是否安装，首次异步请求时再导入
+AIOHTTP_AVAILABLE = importlib.util.find_spec('aiohttp') is not None
+aiohttp = None
+
+
+def _import_aiohttp():
+    """首次使用时导入 aiohttp"""
+    global aiohttp
+    if aiohttp is None:
+        import aiohttp as _aiohttp
+        aiohttp = _aiohttp
+    return aiohttp
+
+
+# 连接池配置 (notifications.http)
+DEFAULT_POOL_CONFIG = {
+    'pool_maxsize': 10,      # 每个主机保持的最大连接数
+    'pool_block': False,     # 连接数达到上限时是否阻塞等待
+    'async_limit': 100       # 异步会话的总连接数上限
+}
+
+_pool_config: Dict[str, Any] = DEFAULT_POOL_CONFIG.copy()
+_http_sessions: Dict[str, 'requests.Session'] = {}
+_sessions_lock = threading.Lock()
+
+
+def configure_http_pool(config: Optional[Dict[str, Any]] = None):
+    """更新连接池配置
+
+    配置变化时关闭现有会话，后续请求按新配置重建。
+
+    Args:
+        config: 连接池配置，键同 DEFAULT_POOL_CONFIG
+    """
+    new_config = DEFAULT_POOL_CONFIG.copy()
+    new_config.update({k: v for k, v in (config or {}).items() if k in DEFAULT_POOL_CONFIG})
+
+    with _sessions_lock:
+        if new_config == _pool_config:
+            return
+        _pool_config.clear()
+        _pool_config.update(new_config)
+
+    close_http_sessions()
+
+
+def _session_key(url: str) -> str:
+    """会话键: scheme://host[:port]"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def get_http_session(url: str) -> 'requests.Session':
+    """获取目标主机的共享会话
+
+    Args:
+        url: 请求 URL
+
+    Returns:
+        该主机专用的 requests.Session
+    """
+    key = _session_key(url)
+    session = _http_sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=_pool_config['pool_maxsize'],
+                pool_block=_pool_config['pool_block']
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_sessions[key] = session
+        return session
+
+
+def http_request(method: str, url: str, **kwargs) -> 'requests.Response':
+    """通过共享连接池发送 HTTP 请求，参数同 requests.request
+
+    Raises:
+        RuntimeError: requests 未安装
+    """
+    if not REQUESTS_AVAILABLE:
+        raise RuntimeError("HTTP 渠道需要 requests 库: pip install requests")
+    return get_http_session(url).request(method, url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> 'requests.Response':
+    """通过共享连接池发送 POST 请求，参数同 requests.post"""
+    return http_request('POST', url, **kwargs)
+
+
+def http_get(url: str, **kwargs) -> 'requests.Response':
+    """通过共享连接池发送 GET 请求，参数同 requests.get"""
+    return http_request('GET', url, **kwargs)
+
+
+def close_http_sessions():
+    """关闭所有同步共享会话"""
+    with _sessions_lock:
+        sessions = list(_http_sessions.values())
+        _http_sessions.clear()
+
+    for session in sessions:
+        try:
+            session.close()
+        except Exception:
+            pass
+
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """获取连接池状态"""
+    with _sessions_lock:
+        hosts = sorted(_http_sessions.keys())
+    return {
+        'hosts': hosts,
+        'sessions': len(hosts),
+        **_pool_config
+    }
+
+
+class AsyncResponse:
+    """异步请求响应 (与 requests.Response 常用属性保持一致)"""
+
+    def __init__(self, status_code: int, text: str, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+# 每个事件循环共享一个 ClientSession，复用连接
+_sessions: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def _get_session() -> 'aiohttp.ClientSession':
+    """获取当前事件循环的共享会话"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        _import_aiohttp()
+        connector = aiohttp.TCPConnector(
+            limit=_pool_config['async_limit'],
+            limit_per_host=_pool_config['pool_maxsize']
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def async_request(method: str,
+                        url: str,
+                        headers: Optional[Dict[str, str]] = None,
+                        data: Optional[str] = None,
+                        timeout: float = 30,
+                        verify_ssl: bool = True,
+                        allow_redirects: bool = False) -> AsyncResponse:
+    """发送异步 HTTP 请求
+
+    Raises:
+        RuntimeError: aiohttp 未安装
+        aiohttp.ClientError / asyncio.TimeoutError: 网络异常
+    """
+    if not AIOHTTP_AVAILABLE:
+        raise RuntimeError("异步发送需要 aiohttp 库: pip install claude-code-notifier[async]")
+
+    session = _get_session()
+    async with session.request(
+        method,
+        url,
+        headers=headers,
+        data=data.encode('utf-8') if isinstance(data, str) else data,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        ssl=None if verify_ssl else False,
+        allow_redirects=allow_redirects
+    ) as response:
+        text = await response.text()
+        return AsyncResponse(response.status, text, dict(response.headers))
+
+
+async def close_async_sessions():
+    """关闭当前事件循环的共享会话"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+渠道重试调度器
+基于最小堆的定时调度：失败的发送按到期时间排队，由调度线程在到期时
+交给工作线程执行，发送方线程无需 sleep 等待重试。
+"""
+
+import os
+import time
+import heapq
+import atexit
+import logging
+import itertools
+import threading
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+from ..executor import DaemonThreadPool
+
+
+class RetryScheduler:
+    """定时重试调度器"""
+
+    def __init__(self, max_workers: int = 4, exit_timeout: float = 30.0):
+        """初始化调度器
+
+        Args:
+            max_workers: 执行重试的工作线程数
+            exit_timeout: 解释器正常退出时等待未完成重试的最长时间（秒）；
+                以 os._exit 结束的进程（如分离的钩子子进程）需显式调用 drain()
+        """
+        self.max_workers = max_workers
+        self.exit_timeout = exit_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._heap: List[Tuple[float, int, Callable, tuple]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._active = 0
+        self._running = False
+        self._draining = False
+        self._exiting = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[DaemonThreadPool] = None
+
+        self.stats = {
+            'scheduled': 0,
+            'executed': 0,
+            'errors': 0
+        }
+
+        atexit.register(self._drain_at_exit)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """fork 后的子进程不继承父进程的调度线程和待执行重试"""
+        self._heap = []
+        self._condition = threading.Condition()
+        self._active = 0
+        self._running = False
+        self._draining = False
+        self._exiting = False
+        self._thread = None
+        self._executor = None
+
+    def schedule(self, delay: float, func: Callable, *args):
+        """在 delay 秒后执行 func(*args)
+
+        Args:
+            delay: 延迟时间（秒）
+            func: 重试函数
+            *args: 函数参数
+        """
+        with self._condition:
+            heapq.heappush(self._heap, (time.time() + max(0.0, delay), next(self._counter), func, args))
+            self.stats['scheduled'] += 1
+            if not self._draining and not self._exiting:
+                self._ensure_started()
+                self._condition.notify()
+
+    def _ensure_started(self):
+        """惰性启动调度线程（需持有锁）"""
+        if self._running:
+            return
+
+        self._running = True
+        # 守护线程：卡住的重试不会阻止进程退出（退出时最多等待 drain() 的超时时间）
+        self._executor = DaemonThreadPool(
+            max_workers=self.max_workers,
+            thread_name_prefix='retry-worker'
+        )
+        self._thread = threading.Thread(target=self._run, name='RetryScheduler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """调度线程主循环：等待堆顶到期后提交执行"""
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                # drain() 后重新启动时旧线程退出
+                if not self._running or self._thread is not threading.current_thread():
+                    return
+
+                due_at = self._heap[0][0]
+                now = time.time()
+                if due_at > now:
+                    self._condition.wait(due_at - now)
+                    continue
+
+                item = heapq.heappop(self._heap)
+                self._active += 1
+                executor = self._executor
+
+            try:
+                executor.submit(self._execute, item[2], item[3])
+            except RuntimeError:
+                # 线程池已关闭（解释器退出或 drain() 中），放回堆中由 drain() 执行
+                with self._condition:
+                    heapq.heappush(self._heap, item)
+                    self._active -= 1
+                    self._condition.notify_all()
+                return
+
+    def _execute(self, func: Callable, args: tuple):
+        """执行一次重试"""
+        try:
+            func(*args)
+            self.stats['executed'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.logger.error(f"重试执行异常: {e}")
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def pending_count(self) -> int:
+        """等待中和执行中的重试数量"""
+        with self._condition:
+            return len(self._heap) + self._active
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待所有重试完成（包括执行中再次排期的重试）
+
+        Returns:
+            在超时前全部完成返回 True
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            while self._heap or self._active:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def shutdown(self):
+        """停止调度，丢弃未到期的重试"""
+        with self._condition:
+            self._running = False
+            self._heap.clear()
+            self._condition.notify_all()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """在当前线程中执行未完成的重试，最多等待 timeout 秒
+
+        调度线程先停止，到期的重试（包括执行中再次排期的重试）按到期时间在当前线程中
+        逐个执行。超时后剩余的重试交还调度线程；解释器退出时则直接放弃。
+
+        Args:
+            timeout: 最长等待时间（秒），None 使用 exit_timeout
+
+        Returns:
+            所有重试在超时前完成返回 True
+        """
+        with self._condition:
+            if not self._heap and not self._active:
+                return True
+            self._draining = True
+            self._running = False
+            self._condition.notify_all()
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            # 已提交的重试继续执行完毕
+            executor.shutdown(wait=False)
+
+        self.logger.info(f"等待 {self.pending_count()} 个未完成的重试...")
+        deadline = time.time() + (self.exit_timeout if timeout is None else timeout)
+
+        try:
+            while True:
+                with self._condition:
+                    # 等待仍在执行中的重试（可能会再次排期）
+                    while self._active and time.time() < deadline:
+                        self._condition.wait(deadline - time.time())
+                    if not self._heap and not self._active:
+                        return True
+                    if not self._heap or self._heap[0][0] > deadline:
+                        break
+                    due_at = self._heap[0][0]
+
+                time.sleep(max(0.0, due_at - time.time()))
+
+                with self._condition:
+                    _, _, func, args = heapq.heappop(self._heap)
+                    self._active += 1
+                self._execute(func, args)
+        finally:
+            with self._condition:
+                self._draining = False
+                if self._heap and not self._exiting:
+                    self._ensure_started()
+
+        self.logger.warning(f"等待超时，{self.pending_count()} 个重试未完成")
+        return False
+
+    def _drain_at_exit(self):
+        """解释器退出前执行未完成的重试（线程池已停止接受任务），最多等待 exit_timeout 秒"""
+        with self._condition:
+            self._exiting = True
+        self.drain(self.exit_timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取调度器状态"""
+        with self._condition:
+            next_due = self._heap[0][0] - time.time() if self._heap else None
+            return {
+                'pending': len(self._heap),
+                'active': self._active,
+                'next_due_in': next_due,
+                **self.stats
+            }
+
+
+_scheduler: Optional[RetryScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_retry_scheduler() -> RetryScheduler:
+    """获取进程内共享的重试调度器"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RetryScheduler()
+    return _scheduler
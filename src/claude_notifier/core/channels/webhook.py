@@ -8,11 +8,14 @@ Webhook 通知渠道
 
 import json
 import time
+import random
+import asyncio
 import base64
 import hashlib
 from typing import Dict, Any, Optional, Union, Tuple
 from urllib.parse import urlparse
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 # 可选依赖处理
 try:
@@ -23,6 +26,9 @@ except ImportError:
     requests = None
 
 from .base import BaseChannel
+from .http_client import AIOHTTP_AVAILABLE, async_request, http_request
+from .retry_scheduler import get_retry_scheduler
+from .circuit_breaker import CircuitState
 
 
 class WebhookAuthManager:
@@ -217,15 +223,20 @@ class WebhookMessageFormatter:
 class WebhookRetryHandler:
     """Webhook 重试处理器"""
     
-    def __init__(self, retry_count: int = 3, retry_delay: float = 2.0):
+    def __init__(self, retry_count: int = 3, retry_delay: float = 2.0,
+                 retry_jitter: float = 0.1, max_retry_delay: float = 300.0):
         """初始化重试处理器
         
         Args:
             retry_count: 重试次数
             retry_delay: 基础重试延迟（秒）
+            retry_jitter: 延迟随机抖动比例，避免多个失败请求同时重试
+            max_retry_delay: 最大重试延迟（秒），同时限制 Retry-After
         """
         self.retry_count = retry_count
         self.retry_delay = retry_delay
+        self.retry_jitter = retry_jitter
+        self.max_retry_delay = max_retry_delay
         
     def should_retry(self, response: Optional[requests.Response], exception: Optional[Exception]) -> bool:
         """判断是否应该重试
@@ -265,6 +276,55 @@ class WebhookRetryHandler:
             延迟时间（秒）
         """
         return self.retry_delay * (2 ** (attempt - 1))
+        
+    def get_next_delay(self, attempt: int, response: Optional[Any] = None) -> float:
+        """计算下一次重试的实际延迟
+        
+        429 响应优先使用服务端给出的 Retry-After，否则使用带抖动的指数退避。
+        
+        Args:
+            attempt: 当前重试次数（从1开始）
+            response: HTTP 响应对象
+            
+        Returns:
+            延迟时间（秒）
+        """
+        if response is not None and response.status_code == 429:
+            retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_delay)
+                
+        delay = self.get_retry_delay(attempt)
+        if self.retry_jitter:
+            delay *= 1 + random.uniform(-self.retry_jitter, self.retry_jitter)
+        return min(delay, self.max_retry_delay)
+        
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After 头（秒数或 HTTP 日期）
+        
+        Args:
+            value: 头部值
+            
+        Returns:
+            等待秒数，无法解析时返回 None
+        """
+        if not value:
+            return None
+            
+        value = value.strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+            
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
 
 
 class WebhookChannel(BaseChannel):
@@ -298,7 +358,15 @@ class WebhookChannel(BaseChannel):
         # 重试配置
         retry_count = config.get('retry_count', 3)
         retry_delay = config.get('retry_delay', 2.0)
-        self.retry_handler = WebhookRetryHandler(retry_count, retry_delay)
+        self.retry_handler = WebhookRetryHandler(
+            retry_count,
+            retry_delay,
+            retry_jitter=config.get('retry_jitter', 0.1),
+            max_retry_delay=config.get('max_retry_delay', 300.0)
+        )
+        # scheduled: 重试交给后台调度器，发送方立即返回；blocking: 在当前线程等待重试；
+        # none: 只尝试一次，由调用方（如发件箱）负责重试
+        self.retry_mode = config.get('retry_mode', 'scheduled')
         
         # 安全配置
         self.security_config = config.get('security', {})
@@ -380,8 +448,36 @@ class WebhookChannel(BaseChannel):
             self.logger.error(f"Webhook 通知处理异常: {e}")
             return False
             
-    def _send_with_retry(self, message: Dict[str, Any]) -> bool:
-        """带重试机制的发送
+    async def asend_notification(self, template_data: Dict[str, Any], event_type: str = 'generic') -> bool:
+        """异步发送 Webhook 通知 (需要 aiohttp，否则回退到执行器)
+        
+        Args:
+            template_data: 模板数据
+            event_type: 事件类型
+            
+        Returns:
+            发送是否成功
+        """
+        if not AIOHTTP_AVAILABLE:
+            return await super().asend_notification(template_data, event_type)
+            
+        if not self.is_enabled():
+            return False
+            
+        if not self.validate_config():
+            return False
+            
+        try:
+            formatted_data = self.format_message_for_channel(template_data)
+            message = self.message_formatter.format_message(formatted_data, event_type)
+            return await self._asend_with_retry(message)
+            
+        except Exception as e:
+            self.logger.error(f"Webhook 通知处理异常: {e}")
+            return False
+            
+    async def _asend_with_retry(self, message: Dict[str, Any]) -> bool:
+        """带重试机制的异步发送，重试等待不阻塞事件循环
         
         Args:
             message: 消息内容
@@ -389,61 +485,178 @@ class WebhookChannel(BaseChannel):
         Returns:
             发送是否成功
         """
-        last_exception = None
-        last_response = None
+        headers, data = self._build_request(message)
+        can_retry = self.retry_mode != 'none'
         
         for attempt in range(self.retry_handler.retry_count + 1):
             try:
-                response = self._send_request(message)
+                response = await async_request(
+                    self.method,
+                    self.url,
+                    headers=headers,
+                    data=data,
+                    timeout=self.timeout,
+                    verify_ssl=self.verify_ssl,
+                    allow_redirects=self.allow_redirects
+                )
                 
-                # 检查响应
-                if self._is_success_response(response):
+                success = self._is_success_response(response)
+                self._record_circuit_outcome(success)
+                if success:
                     if attempt > 0:
                         self.logger.info(f"Webhook 重试成功，尝试次数: {attempt + 1}")
                     return True
                     
-                last_response = response
-                
-                # 判断是否需要重试
-                if attempt < self.retry_handler.retry_count:
-                    if self.retry_handler.should_retry(response, None):
-                        delay = self.retry_handler.get_retry_delay(attempt + 1)
-                        self.logger.warning(
-                            f"Webhook 请求失败 (状态码: {response.status_code}), "
-                            f"{delay}秒后重试..."
-                        )
-                        time.sleep(delay)
-                        continue
-                        
-                # 不需要重试或已达到最大重试次数
+                if can_retry and attempt < self.retry_handler.retry_count \
+                        and self.retry_handler.should_retry(response, None):
+                    delay = self.retry_handler.get_next_delay(attempt + 1, response)
+                    self.logger.warning(
+                        f"Webhook 请求失败 (状态码: {response.status_code}), "
+                        f"{delay:.1f}秒后重试..."
+                    )
+                    await asyncio.sleep(delay)
+                    if self._circuit_open():
+                        self.logger.warning("Webhook 渠道已熔断，放弃重试")
+                        return False
+                    continue
+                    
                 self.logger.error(f"Webhook 发送失败: HTTP {response.status_code}")
                 return False
                 
             except Exception as e:
-                last_exception = e
-                
-                # 判断是否需要重试
-                if attempt < self.retry_handler.retry_count:
-                    if self.retry_handler.should_retry(None, e):
-                        delay = self.retry_handler.get_retry_delay(attempt + 1)
-                        self.logger.warning(f"Webhook 请求异常: {e}, {delay}秒后重试...")
-                        time.sleep(delay)
-                        continue
-                        
-                # 不需要重试或已达到最大重试次数
+                self._record_circuit_outcome(False)
+                if can_retry and attempt < self.retry_handler.retry_count \
+                        and self.retry_handler.should_retry(None, e):
+                    delay = self.retry_handler.get_next_delay(attempt + 1)
+                    self.logger.warning(f"Webhook 请求异常: {e}, {delay:.1f}秒后重试...")
+                    await asyncio.sleep(delay)
+                    if self._circuit_open():
+                        self.logger.warning("Webhook 渠道已熔断，放弃重试")
+                        return False
+                    continue
+                    
                 self.logger.error(f"Webhook 发送异常: {e}")
                 return False
                 
         return False
         
-    def _send_request(self, message: Dict[str, Any]) -> requests.Response:
-        """发送 HTTP 请求
+    def _send_with_retry(self, message: Dict[str, Any]) -> bool:
+        """带重试机制的发送
+        
+        首次请求在当前线程发送；需要重试时，scheduled 模式把后续尝试交给
+        重试调度器并立即返回，blocking 模式在当前线程等待后重试，none 模式
+        不重试。
         
         Args:
             message: 消息内容
             
         Returns:
-            HTTP 响应对象
+            本次调用内送达返回 True；失败或已排期重试（尚未送达）返回 False
+        """
+        if self.retry_mode == 'none':
+            success, _ = self._attempt(message, 0, can_retry=False)
+            return success
+            
+        if self.retry_mode == 'blocking':
+            attempt = 0
+            while True:
+                success, delay = self._attempt(message, attempt)
+                if delay is None:
+                    return success
+                time.sleep(delay)
+                if self._circuit_open():
+                    self.logger.warning("Webhook 渠道已熔断，放弃重试")
+                    return False
+                attempt += 1
+                
+        success, delay = self._attempt(message, 0)
+        if delay is None:
+            return success
+            
+        get_retry_scheduler().schedule(delay, self._retry_attempt, message, 1)
+        self.logger.info(f"Webhook 首次发送失败，已排期 {delay:.1f} 秒后重试")
+        return False
+        
+    def _retry_attempt(self, message: Dict[str, Any], attempt: int):
+        """由重试调度器执行的一次重试，失败时继续排期，整条重试链失败时记录错误"""
+        if self._circuit_open():
+            self.logger.error(f"Webhook 渠道已熔断，放弃重试，通知未送达 (已尝试 {attempt} 次)")
+            return
+            
+        success, delay = self._attempt(message, attempt)
+        if delay is not None:
+            get_retry_scheduler().schedule(delay, self._retry_attempt, message, attempt + 1)
+        elif not success:
+            # 最后一次尝试的失败已由 _attempt 计入熔断器
+            self.logger.error(f"Webhook 重试全部失败，通知未送达 (共尝试 {attempt + 1} 次)")
+        
+    def _attempt(self, message: Dict[str, Any], attempt: int,
+                 can_retry: bool = True) -> Tuple[bool, Optional[float]]:
+        """执行一次发送尝试
+        
+        Args:
+            message: 消息内容
+            attempt: 已重试次数（首次发送为0）
+            can_retry: 失败后是否允许重试
+            
+        Returns:
+            (是否成功, 下次重试延迟)，不再重试时延迟为 None
+        """
+        try:
+            response = self._send_request(message)
+            
+            # 检查响应
+            success = self._is_success_response(response)
+            self._record_circuit_outcome(success)
+            if success:
+                if attempt > 0:
+                    self.logger.info(f"Webhook 重试成功，尝试次数: {attempt + 1}")
+                return True, None
+                
+            # 判断是否需要重试
+            if can_retry and attempt < self.retry_handler.retry_count \
+                    and self.retry_handler.should_retry(response, None):
+                delay = self.retry_handler.get_next_delay(attempt + 1, response)
+                self.logger.warning(
+                    f"Webhook 请求失败 (状态码: {response.status_code}), "
+                    f"{delay:.1f}秒后重试..."
+                )
+                return False, delay
+                
+            # 不需要重试或已达到最大重试次数
+            self.logger.error(f"Webhook 发送失败: HTTP {response.status_code}")
+            return False, None
+            
+        except Exception as e:
+            self._record_circuit_outcome(False)
+            
+            # 判断是否需要重试
+            if can_retry and attempt < self.retry_handler.retry_count \
+                    and self.retry_handler.should_retry(None, e):
+                delay = self.retry_handler.get_next_delay(attempt + 1)
+                self.logger.warning(f"Webhook 请求异常: {e}, {delay:.1f}秒后重试...")
+                return False, delay
+                
+            # 不需要重试或已达到最大重试次数
+            self.logger.error(f"Webhook 发送异常: {e}")
+            return False, None
+            
+    def _circuit_open(self) -> bool:
+        """渠道是否已熔断（熔断后不再继续重试）"""
+        return self.circuit_breaker is not None and self.circuit_breaker.state == CircuitState.OPEN
+        
+    def reports_circuit_outcomes(self) -> bool:
+        """每次请求（含重试）的结果由渠道自行上报"""
+        return True
+        
+    def _build_request(self, message: Dict[str, Any]) -> Tuple[Dict[str, str], str]:
+        """构建请求头和请求体
+        
+        Args:
+            message: 消息内容
+            
+        Returns:
+            (请求头, 请求体)
         """
         # 构建请求头
         headers = {
@@ -470,10 +683,23 @@ class WebhookChannel(BaseChannel):
         if len(data.encode('utf-8')) > self.max_content_length:
             raise ValueError(f"消息内容过长: {len(data)} 字节，最大允许: {self.max_content_length} 字节")
             
+        return headers, data
+        
+    def _send_request(self, message: Dict[str, Any]) -> requests.Response:
+        """发送 HTTP 请求
+        
+        Args:
+            message: 消息内容
+            
+        Returns:
+            HTTP 响应对象
+        """
+        headers, data = self._build_request(message)
+        
         # 发送请求
-        response = requests.request(
-            method=self.method,
-            url=self.url,
+        response = http_request(
+            self.method,
+            self.url,
             headers=headers,
             data=data,
             timeout=self.timeout,
@@ -563,6 +789,7 @@ class WebhookChannel(BaseChannel):
             'content_type': self.content_type,
             'template': self.message_formatter.template,
             'retry_count': self.retry_handler.retry_count,
+            'retry_mode': self.retry_mode,
             'auth_type': self.auth_config.get('type', 'none')
         })
         return info
\ No newline at end of file
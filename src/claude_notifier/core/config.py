@@ -4,49 +4,145 @@
 """
 配置管理 - 从 config_manager.py 迁移而来
 轻量化实现，保持核心功能
+
+合并后的配置和路由表会编译缓存到配置文件旁的 .<文件名>.cache (marshal 格式)，
+配置文件的修改时间、大小和内容校验和均未变化时直接读取缓存，跳过 YAML 解析。
 """
 
 import os
-import yaml
+import zlib
+import marshal
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from ..__version__ import __version__
+
+# 缓存格式版本，缓存结构或默认配置变化时递增
+CONFIG_CACHE_FORMAT = 1
 
 
 class ConfigManager:
     """轻量化配置管理器"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, use_cache: Optional[bool] = None):
         """初始化配置管理器
         
         Args:
             config_path: 配置文件路径，默认 ~/.claude-notifier/config.yaml
+            use_cache: 是否使用编译缓存，默认启用（环境变量
+                CLAUDE_NOTIFIER_NO_CONFIG_CACHE=1 可关闭）
         """
         if config_path is None:
             config_path = os.path.expanduser('~/.claude-notifier/config.yaml')
+        if use_cache is None:
+            use_cache = os.environ.get('CLAUDE_NOTIFIER_NO_CONFIG_CACHE') != '1'
             
         self.config_path = config_path
+        self.use_cache = use_cache
+        self.cache_path = os.path.join(
+            os.path.dirname(os.path.abspath(config_path)),
+            f'.{os.path.basename(config_path)}.cache'
+        )
+        self.cache_hit = False
+        self.routing: Dict[str, Any] = {}
         # 先初始化 logger，避免 _load_config 调用时访问未定义的 self.logger
         self.logger = logging.getLogger(__name__)
         self.config = self._load_config()
         
     def _load_config(self) -> Dict[str, Any]:
-        """加载配置文件"""
+        """加载配置文件（优先读取编译缓存）"""
+        self.cache_hit = False
+        
         if not os.path.exists(self.config_path):
             self.logger.warning(f"配置文件不存在: {self.config_path}")
-            return self._get_default_config()
+            return self._use_config(self._get_default_config())
             
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f) or {}
+            with open(self.config_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+                
+            key = self._cache_key(stat, raw)
+            if self.use_cache:
+                cached = self._read_cache(key)
+                if cached is not None:
+                    self.cache_hit = True
+                    self.routing = cached['routing']
+                    return cached['config']
+                    
+            # YAML 解析只在缓存失效时需要，推迟导入
+            import yaml
+            config = yaml.safe_load(raw.decode('utf-8')) or {}
                 
             # 合并默认配置
             default_config = self._get_default_config()
-            return self._merge_configs(default_config, config)
+            config = self._use_config(self._merge_configs(default_config, config))
+            
+            if self.use_cache:
+                self._write_cache(key, config)
+            return config
             
         except Exception as e:
             self.logger.error(f"配置文件加载失败: {e}")
-            return self._get_default_config()
+            return self._use_config(self._get_default_config())
+            
+    def _use_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """设置当前配置对应的路由表"""
+        self.routing = self._build_routing(config)
+        return config
+        
+    def _cache_key(self, stat: os.stat_result, raw: bytes) -> Tuple:
+        """缓存键：格式版本、包版本、文件修改时间、大小和内容校验和"""
+        return (CONFIG_CACHE_FORMAT, __version__, stat.st_mtime_ns, stat.st_size, zlib.crc32(raw))
+        
+    def _read_cache(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """读取编译缓存，缓存不存在、损坏或已失效时返回 None"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+            
+        if not isinstance(cached, dict) or cached.get('key') != key:
+            return None
+        return cached
+        
+    def _write_cache(self, key: Tuple, config: Dict[str, Any]):
+        """原子写入编译缓存（配置含 marshal 不支持的类型或目录不可写时跳过）"""
+        tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        try:
+            data = marshal.dumps({'key': key, 'config': config, 'routing': self.routing})
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"配置缓存写入失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+                
+    def _build_routing(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """预计算事件路由表
+        
+        Returns:
+            {'default_channels': 全局默认渠道, 'events': 事件类型 -> 事件特定渠道}
+        """
+        events = {}
+        events_config = config.get('events', {})
+        if isinstance(events_config, dict):
+            for event_type, event_config in events_config.items():
+                if isinstance(event_config, dict) and event_config.get('channels'):
+                    events[event_type] = list(event_config['channels'])
+                    
+        notifications = config.get('notifications', {})
+        default_channels = notifications.get('default_channels', []) if isinstance(notifications, dict) else []
+        
+        return {
+            'default_channels': list(default_channels or []),
+            'events': events
+        }
             
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+守护线程池
+与 ThreadPoolExecutor 接口一致的有界线程池，但工作线程为守护线程：解释器退出时
+不会等待仍在执行的任务，超时后被放弃的渠道发送不会延长进程的生命周期。
+"""
+
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+
+class DaemonThreadPool:
+    """工作线程为守护线程的有界线程池"""
+
+    def __init__(self, max_workers: int = 8, thread_name_prefix: str = 'daemon-pool'):
+        """初始化线程池
+
+        Args:
+            max_workers: 最大工作线程数（按需创建）
+            thread_name_prefix: 工作线程名称前缀
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers 必须大于 0")
+
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._queue: 'queue.SimpleQueue[Optional[tuple]]' = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交任务，返回 concurrent.futures.Future
+
+        Raises:
+            RuntimeError: 线程池已关闭
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("线程池已关闭，不再接受任务")
+            self._queue.put((future, fn, args, kwargs))
+            if self._idle:
+                self._idle -= 1
+            elif len(self._threads) < self.max_workers:
+                self._start_worker()
+        return future
+
+    def _start_worker(self):
+        """启动一个工作线程（需持有锁）"""
+        thread = threading.Thread(
+            target=self._worker,
+            name=f"{self.thread_name_prefix}_{len(self._threads)}",
+            daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def _worker(self):
+        """工作线程主循环"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            del item, future
+
+            with self._lock:
+                if self._shutdown:
+                    continue
+                self._idle += 1
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """关闭线程池
+
+        Args:
+            wait: 是否等待执行中的任务完成
+            cancel_futures: 是否取消尚未开始的任务
+        """
+        with self._lock:
+            if self._shutdown:
+                threads = []
+            else:
+                self._shutdown = True
+                threads = list(self._threads)
+
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+
+            for _ in threads:
+                self._queue.put(None)
+
+        if wait:
+            for thread in threads:
+                thread.join()
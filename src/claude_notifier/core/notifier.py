@@ -8,28 +8,58 @@
 
 import os
 import time
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Union
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 
 from .config import ConfigManager
+from .executor import DaemonThreadPool
 from .channels import get_channel_class, get_available_channels
+from .channels.http_client import close_async_sessions, configure_http_pool, get_http_pool_stats
+from .channels.retry_scheduler import get_retry_scheduler
+from .channels.circuit_breaker import DEFAULT_BREAKER_CONFIG, get_circuit_breaker
+from .outbox import NotificationOutbox, OutboxWorker
 
 
 class Notifier:
     """轻量级通知器 - 核心功能实现"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, start_worker: bool = False):
         """初始化通知器
         
         Args:
             config_path: 配置文件路径，默认使用 ~/.claude-notifier/config.yaml
+            start_worker: 启用发件箱时是否启动后台投递线程，仅用于常驻进程（如守护进程）；
+                短生命周期进程中途退出会让已领取的记录等待租约过期
         """
         self.config_manager = ConfigManager(config_path)
         self.config = self.config_manager.get_config()
         self.logger = self._setup_logging()
+        
+        # HTTP 渠道共享连接池 (按主机复用 keep-alive 连接)
+        configure_http_pool(self.config.get('notifications', {}).get('http', {}))
         self.channels = self._init_channels()
         
+        # 渠道并发发送：有界线程池 + 单渠道超时 + 整体截止时间
+        delivery_config = self.config.get('notifications', {}).get('delivery', {})
+        self.max_workers = delivery_config.get('max_workers', 8)
+        self.channel_timeout = delivery_config.get('channel_timeout', 15.0)
+        self.delivery_deadline = delivery_config.get('deadline', 30.0)
+        self._executor: Optional[DaemonThreadPool] = None
+        self._executor_pid: Optional[int] = None
+        self._executor_lock = threading.Lock()
+        self.last_delivery_results: Dict[str, Dict[str, Any]] = {}
+        
+        # 持久化发件箱 (可选)：send() 先写入本地队列，由工作线程或当前线程投递
+        self.outbox: Optional[NotificationOutbox] = None
+        self.outbox_worker: Optional[OutboxWorker] = None
+        # 未启动投递线程时 send() 是否在当前线程投递；为 False 时只写入，由 flush_outbox() 投递
+        self.outbox_inline_delivery = True
+        self._init_outbox(start_worker)
+        
     def _setup_logging(self) -> logging.Logger:
         """设置日志系统"""
         logger = logging.getLogger('claude_notifier')
@@ -79,7 +109,9 @@ class Notifier:
                 try:
                     channel_class = get_channel_class(channel_name)
                     if channel_class:
-                        channels[channel_name] = channel_class(channel_config)
+                        channel = channel_class(channel_config)
+                        channel.circuit_breaker = self._get_circuit_breaker(channel_name)
+                        channels[channel_name] = channel
                         self.logger.debug(f"初始化渠道: {channel_name}")
                 except Exception as e:
                     self.logger.error(f"初始化渠道失败 {channel_name}: {e}")
@@ -87,6 +119,45 @@ class Notifier:
         self.logger.info(f"已启用 {len(channels)} 个通知渠道")
         return channels
         
+    def _get_circuit_breaker(self, channel_name: str):
+        """获取渠道熔断器 (notifications.circuit_breaker)，未启用时返回 None"""
+        breaker_config = DEFAULT_BREAKER_CONFIG.copy()
+        breaker_config.update(self.config.get('notifications', {}).get('circuit_breaker', {}))
+        if not breaker_config['enabled']:
+            return None
+        return get_circuit_breaker(channel_name, breaker_config)
+        
+    def _init_outbox(self, start_worker: bool):
+        """初始化发件箱，常驻进程中启动投递线程（恢复上次未完成的通知）"""
+        outbox_config = self.config.get('notifications', {}).get('outbox', {})
+        if not outbox_config.get('enabled', False):
+            return
+            
+        try:
+            self.outbox = NotificationOutbox(outbox_config)
+            self.outbox_worker = OutboxWorker(
+                self.outbox,
+                self._deliver_outbox_entry,
+                poll_interval=outbox_config.get('poll_interval', 1.0)
+            )
+            if start_worker:
+                self.outbox_worker.start()
+            self.logger.debug(f"发件箱已启用: {self.outbox.db_path}")
+            self._apply_outbox_retry_mode()
+        except Exception as e:
+            self.logger.error(f"发件箱初始化失败，使用直接发送: {e}")
+            self.outbox = None
+            self.outbox_worker = None
+            
+    def _apply_outbox_retry_mode(self):
+        """失败的渠道由发件箱重试，渠道内部不再另行排期重试（渠道重建后需重新调用）"""
+        if self.outbox is None:
+            return
+            
+        for channel in self.channels.values():
+            if getattr(channel, 'retry_mode', None) == 'scheduled':
+                channel.retry_mode = 'none'
+        
     def send(self, 
              message: Union[str, Dict[str, Any]], 
              channels: Optional[List[str]] = None,
@@ -117,6 +188,56 @@ class Notifier:
                 'project': 'my-project'
             })
         """
+        template_data, channels = self._prepare_send(message, channels, event_type, **kwargs)
+        if not channels:
+            self.logger.warning("没有可用的通知渠道")
+            return True  # 不算失败
+            
+        # 写入发件箱，由工作线程投递（未启动时在当前线程投递）
+        if self._enqueue_outbox(template_data, channels, event_type):
+            if self._should_flush_inline():
+                self.flush_outbox(timeout=self.delivery_deadline)
+            return True
+            
+        # 发送通知
+        return self._send_to_channels(template_data, channels, event_type)
+        
+    async def asend(self,
+                    message: Union[str, Dict[str, Any]],
+                    channels: Optional[List[str]] = None,
+                    event_type: str = 'custom',
+                    **kwargs) -> bool:
+        """异步发送通知 - send() 的原生 asyncio 版本
+        
+        各渠道在同一事件循环中并发发送，重试等待使用 asyncio.sleep，
+        不会阻塞事件循环。参数与返回值同 send()。
+        
+        Examples:
+            await notifier.asend("Hello World!")
+            
+            # 大量并发通知
+            await asyncio.gather(*(notifier.asend(msg) for msg in messages))
+        """
+        template_data, channels = self._prepare_send(message, channels, event_type, **kwargs)
+        if not channels:
+            self.logger.warning("没有可用的通知渠道")
+            return True  # 不算失败
+            
+        if self._enqueue_outbox(template_data, channels, event_type):
+            if self._should_flush_inline():
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.flush_outbox, self.delivery_deadline
+                )
+            return True
+            
+        return await self._asend_to_channels(template_data, channels, event_type)
+        
+    def _prepare_send(self,
+                      message: Union[str, Dict[str, Any]],
+                      channels: Optional[List[str]],
+                      event_type: str,
+                      **kwargs) -> Tuple[Dict[str, Any], List[str]]:
+        """标准化消息格式并确定发送渠道"""
         # 标准化消息格式
         if isinstance(message, str):
             template_data = {
@@ -136,24 +257,32 @@ class Notifier:
         if channels is None:
             channels = self._get_default_channels(event_type)
             
-        if not channels:
-            self.logger.warning("没有可用的通知渠道")
-            return True  # 不算失败
+        return template_data, channels
+        
+    def _enqueue_outbox(self, template_data: Dict[str, Any], channels: List[str], event_type: str) -> bool:
+        """写入发件箱，成功返回 True (未启用或写入失败返回 False，由调用方直接发送)"""
+        if self.outbox is None:
+            return False
             
-        # 发送通知
-        return self._send_to_channels(template_data, channels, event_type)
+        try:
+            self.outbox.enqueue(template_data, channels, event_type)
+            self.outbox_worker.wake()
+            return True
+        except Exception as e:
+            self.logger.error(f"写入发件箱失败，直接发送: {e}")
+            return False
+            
+    def _should_flush_inline(self) -> bool:
+        """发件箱没有投递线程时，是否由 send() 在当前线程投递"""
+        return self.outbox_inline_delivery and not self.outbox_worker.is_running()
         
     def _get_default_channels(self, event_type: str) -> List[str]:
         """获取默认通知渠道"""
-        # 事件特定渠道
-        event_config = self.config.get('events', {}).get(event_type, {})
-        if event_config.get('channels'):
-            return event_config['channels']
-            
-        # 全局默认渠道
-        default_channels = self.config.get('notifications', {}).get('default_channels', [])
-        if default_channels:
-            return default_channels
+        # 事件特定渠道 > 全局默认渠道 (加载配置时预计算的路由表)
+        routing = self.config_manager.routing
+        channels = routing['events'].get(event_type) or routing['default_channels']
+        if channels:
+            return list(channels)
             
         # 返回所有启用的渠道
         return list(self.channels.keys())
@@ -166,29 +295,309 @@ class Notifier:
         if not channels:
             return True
             
-        success_count = 0
-        total_count = len(channels)
+        results = self.dispatch_to_channels(template_data, channels, event_type)
+        return self._summarize_results(results, channels)
+        
+    async def _asend_to_channels(self,
+                                 template_data: Dict[str, Any],
+                                 channels: List[str],
+                                 event_type: str) -> bool:
+        """异步发送到指定渠道"""
+        if not channels:
+            return True
+            
+        results = await self.adispatch_to_channels(template_data, channels, event_type)
+        return self._summarize_results(results, channels)
+        
+    def _summarize_results(self, results: Dict[str, Dict[str, Any]], channels: List[str]) -> bool:
+        """记录各渠道结果和耗时，返回整体结果"""
+        self.last_delivery_results = results
+        
+        # 只要有一个成功就算成功
+        success_count = sum(1 for result in results.values() if result['success'])
+        success = success_count > 0
+        timings = ', '.join(f"{name}={result['elapsed'] * 1000:.0f}ms" for name, result in results.items())
+        self.logger.info(f"通知发送结果: {success_count}/{len(channels)} 成功 ({timings})")
+        return success
         
+    def _split_channels(self, channels: List[str], results: Dict[str, Dict[str, Any]]) -> List[str]:
+        """过滤未启用和重复的渠道，未启用的渠道记为 skipped"""
+        targets = []
         for channel_name in channels:
+            if channel_name in results or channel_name in targets:
+                continue
             if channel_name not in self.channels:
                 self.logger.warning(f"渠道未配置或未启用: {channel_name}")
+                results[channel_name] = {'success': False, 'status': 'skipped', 'elapsed': 0.0}
+                continue
+            breaker = getattr(self.channels[channel_name], 'circuit_breaker', None)
+            if breaker is not None and not breaker.allow_request():
+                self.logger.warning(f"渠道已熔断，跳过发送: {channel_name}")
+                results[channel_name] = {'success': False, 'status': 'open', 'elapsed': 0.0}
+                continue
+            targets.append(channel_name)
+        return targets
+        
+    def _record_circuit_outcomes(self, results: Dict[str, Dict[str, Any]], targets: List[str]):
+        """按发送结果更新熔断器（超时总由这里上报，其余结果渠道可自行上报）"""
+        for channel_name in targets:
+            channel = self.channels.get(channel_name)
+            breaker = getattr(channel, 'circuit_breaker', None)
+            if breaker is None:
                 continue
                 
-            try:
-                result = self.channels[channel_name].send_notification(template_data, event_type)
-                if result:
-                    success_count += 1
-                    self.logger.debug(f"发送成功: {channel_name}")
+            status = results[channel_name]['status']
+            if status == 'timeout':
+                breaker.record_failure()
+            elif not channel.reports_circuit_outcomes():
+                if status == 'sent':
+                    breaker.record_success()
                 else:
-                    self.logger.error(f"发送失败: {channel_name}")
+                    breaker.record_failure()
+        
+    def _get_executor(self) -> DaemonThreadPool:
+        """获取渠道发送线程池（惰性创建）
+        
+        工作线程为守护线程：超时后被放弃的渠道发送不会在解释器退出时被等待。
+        """
+        with self._executor_lock:
+            # fork 出的子进程（分离投递）不能复用父进程的线程池
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = DaemonThreadPool(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='notifier-channel'
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+            
+    def dispatch_to_channels(self,
+                             template_data: Dict[str, Any],
+                             channels: List[str],
+                             event_type: str) -> Dict[str, Dict[str, Any]]:
+        """并发发送到多个渠道
+        
+        每个渠道在线程池中独立发送，超过 channel_timeout（自开始发送计时）
+        或整体 deadline 仍未返回的渠道记为超时，不再等待其结果。
+        
+        Args:
+            template_data: 模板数据
+            channels: 渠道列表
+            event_type: 事件类型
+            
+        Returns:
+            Dict[str, Dict]: 渠道名称 -> {'success', 'status', 'elapsed'}，
+            status 为 sent/failed/timeout/skipped/open（已熔断）
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        targets = self._split_channels(channels, results)
+        if not targets:
+            return results
+            
+        dispatched_at = time.time()
+        deadline_at = dispatched_at + self.delivery_deadline
+        started_at: Dict[str, float] = {}
+        
+        def timed_send(channel_name: str) -> bool:
+            started_at[channel_name] = time.time()
+            return self._send_to_channel(channel_name, template_data, event_type)
+            
+        executor = self._get_executor()
+        try:
+            pending = {executor.submit(timed_send, name): name for name in targets}
+        except RuntimeError:
+            # 线程池已关闭（如 close() 之后发送延迟通知），在当前线程中依次发送
+            for channel_name in targets:
+                success = timed_send(channel_name)
+                results[channel_name] = {
+                    'success': success,
+                    'status': 'sent' if success else 'failed',
+                    'elapsed': time.time() - started_at[channel_name]
+                }
+            pending = {}
+        
+        while pending:
+            now = time.time()
+            
+            # 下一个超时时刻：整体截止时间或最早开始的渠道超时
+            # (尚未开始的渠道最早在 now + channel_timeout 超时)
+            next_timeout = deadline_at
+            for channel_name in pending.values():
+                started = started_at.get(channel_name, now)
+                next_timeout = min(next_timeout, started + self.channel_timeout)
                     
-            except Exception as e:
-                self.logger.error(f"发送异常 {channel_name}: {e}")
+            done, _ = wait(pending, timeout=max(0.0, next_timeout - now), return_when=FIRST_COMPLETED)
+            now = time.time()
+            
+            for future in done:
+                channel_name = pending.pop(future)
+                success = future.result()
+                results[channel_name] = {
+                    'success': success,
+                    'status': 'sent' if success else 'failed',
+                    'elapsed': now - started_at.get(channel_name, dispatched_at)
+                }
                 
-        # 只要有一个成功就算成功
-        success = success_count > 0
-        self.logger.info(f"通知发送结果: {success_count}/{total_count} 成功")
-        return success
+            for future, channel_name in list(pending.items()):
+                started = started_at.get(channel_name)
+                if now >= deadline_at or (started is not None and now - started >= self.channel_timeout):
+                    # 线程无法强制中断，放弃等待（守护线程不会阻止进程退出）；尚未开始的任务直接取消
+                    future.cancel()
+                    del pending[future]
+                    self.logger.error(f"发送超时: {channel_name}")
+                    results[channel_name] = {
+                        'success': False,
+                        'status': 'timeout',
+                        'elapsed': now - (started if started is not None else dispatched_at)
+                    }
+                    
+        self._record_circuit_outcomes(results, targets)
+        
+        # 保持调用方传入的渠道顺序
+        return {name: results[name] for name in channels if name in results}
+        
+    async def adispatch_to_channels(self,
+                                    template_data: Dict[str, Any],
+                                    channels: List[str],
+                                    event_type: str) -> Dict[str, Dict[str, Any]]:
+        """在当前事件循环中并发发送到多个渠道
+        
+        超时语义与返回值同 dispatch_to_channels()，超时的渠道任务会被取消。
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        targets = self._split_channels(channels, results)
+        if not targets:
+            return results
+            
+        async def timed_send(channel_name: str) -> Dict[str, Any]:
+            started = time.time()
+            try:
+                success = await asyncio.wait_for(
+                    self._asend_to_channel(channel_name, template_data, event_type),
+                    timeout=self.channel_timeout
+                )
+                status = 'sent' if success else 'failed'
+            except asyncio.TimeoutError:
+                self.logger.error(f"发送超时: {channel_name}")
+                success, status = False, 'timeout'
+            return {'success': success, 'status': status, 'elapsed': time.time() - started}
+            
+        dispatched_at = time.time()
+        tasks = {asyncio.ensure_future(timed_send(name)): name for name in targets}
+        done, pending = await asyncio.wait(tasks, timeout=self.delivery_deadline)
+        
+        for task in done:
+            results[tasks[task]] = task.result()
+            
+        for task in pending:
+            task.cancel()
+            self.logger.error(f"发送超时: {tasks[task]}")
+            results[tasks[task]] = {
+                'success': False,
+                'status': 'timeout',
+                'elapsed': time.time() - dispatched_at
+            }
+            
+        self._record_circuit_outcomes(results, targets)
+        return {name: results[name] for name in channels if name in results}
+        
+    async def _asend_to_channel(self,
+                                channel_name: str,
+                                template_data: Dict[str, Any],
+                                event_type: str) -> bool:
+        """异步发送到单个渠道"""
+        channel = self.channels[channel_name]
+        try:
+            asend_notification = getattr(channel, 'asend_notification', None)
+            if asend_notification is not None:
+                result = await asend_notification(template_data, event_type)
+            else:
+                # 旧式渠道只提供同步接口
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, channel.send_notification, template_data, event_type)
+                
+            if result:
+                self.logger.debug(f"发送成功: {channel_name}")
+                return True
+            self.logger.error(f"发送失败: {channel_name}")
+        except Exception as e:
+            self.logger.error(f"发送异常 {channel_name}: {e}")
+        return False
+        
+    def _send_to_channel(self,
+                         channel_name: str,
+                         template_data: Dict[str, Any],
+                         event_type: str) -> bool:
+        """发送到单个渠道"""
+        try:
+            result = self.channels[channel_name].send_notification(template_data, event_type)
+            if result:
+                self.logger.debug(f"发送成功: {channel_name}")
+                return True
+            self.logger.error(f"发送失败: {channel_name}")
+        except Exception as e:
+            self.logger.error(f"发送异常 {channel_name}: {e}")
+        return False
+        
+    def _deliver_outbox_entry(self, entry: Dict[str, Any]):
+        """投递一条发件箱记录，失败的渠道按退避策略重试"""
+        results = self.dispatch_to_channels(entry['template_data'], entry['channels'], entry['event_type'])
+        
+        # 已被禁用的渠道 (skipped) 重试没有意义；熔断中的渠道 (open) 留在发件箱等待恢复
+        failed_channels = [
+            name for name, result in results.items()
+            if result['status'] in ('failed', 'timeout', 'open')
+        ]
+        
+        if not failed_channels:
+            self.outbox.complete(entry['id'])
+        elif self.outbox.retry(entry['id'], failed_channels, f"发送失败: {', '.join(failed_channels)}"):
+            self.logger.info(f"发件箱通知 #{entry['id']} 将重试: {failed_channels}")
+        else:
+            self.logger.error(f"发件箱通知 #{entry['id']} 超过最大重试次数: {failed_channels}")
+            
+    def flush_outbox(self, timeout: Optional[float] = None) -> int:
+        """在当前线程中投递发件箱内所有到期通知
+        
+        用于即将退出的短生命周期进程（如钩子进程），确保通知不依赖后台线程。
+        
+        Args:
+            timeout: 最长等待时间（秒），None 表示直到没有到期记录
+            
+        Returns:
+            处理的记录数
+        """
+        if self.outbox_worker is None:
+            return 0
+        deadline = time.time() + timeout if timeout is not None else None
+        return self.outbox_worker.drain(deadline)
+        
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """在当前线程中完成渠道的后台重试
+        
+        用于以 os._exit 结束、不会执行 atexit 回调的进程（如分离的钩子子进程）。
+        
+        Args:
+            timeout: 最长等待时间（秒），None 使用调度器的 exit_timeout
+            
+        Returns:
+            在超时前全部完成返回 True
+        """
+        return get_retry_scheduler().drain(timeout)
+        
+    def close(self):
+        """停止后台投递线程和渠道发送线程池"""
+        if self.outbox_worker is not None:
+            self.outbox_worker.stop()
+            
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                
+    async def aclose(self):
+        """关闭异步 HTTP 会话并停止后台线程"""
+        await close_async_sessions()
+        self.close()
         
     def test_channels(self, channels: Optional[List[str]] = None) -> Dict[str, bool]:
         """测试通知渠道
@@ -237,9 +646,31 @@ class Notifier:
                 'file': self.config_manager.config_path,
                 'valid': self.config_manager.is_valid(),
                 'last_modified': self._get_config_mtime()
-            }
+            },
+            'outbox': self._get_outbox_status(),
+            'http_pool': get_http_pool_stats(),
+            'retry_scheduler': get_retry_scheduler().get_status(),
+            'circuit_breakers': self._get_circuit_breaker_status()
         }
         
+    def _get_circuit_breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取已启用渠道的熔断器状态"""
+        status = {}
+        for channel_name, channel in self.channels.items():
+            breaker = getattr(channel, 'circuit_breaker', None)
+            if breaker is not None:
+                status[channel_name] = breaker.get_status()
+        return status
+        
+    def _get_outbox_status(self) -> Dict[str, Any]:
+        """获取发件箱状态"""
+        if self.outbox is None:
+            return {'enabled': False}
+        try:
+            return {'enabled': True, **self.outbox.get_stats()}
+        except Exception as e:
+            return {'enabled': True, 'error': str(e)}
+        
     def _get_version(self) -> str:
         """获取版本信息"""
         try:
@@ -263,7 +694,9 @@ class Notifier:
         try:
             old_channels = set(self.channels.keys())
             self.config = self.config_manager.reload()
+            configure_http_pool(self.config.get('notifications', {}).get('http', {}))
             self.channels = self._init_channels()
+            self._apply_outbox_retry_mode()
             new_channels = set(self.channels.keys())
             
             if old_channels != new_channels:
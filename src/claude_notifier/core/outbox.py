@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+通知发件箱 - 持久化的预写队列
+基于 SQLite (WAL 模式)，send() 只需一次本地插入，由后台工作线程负责投递和重试。
+进程崩溃或重启后，未完成的通知会在下次启动时自动恢复投递。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+
+class OutboxStatus:
+    """发件箱记录状态"""
+    PENDING = 'pending'          # 等待投递
+    DELIVERING = 'delivering'    # 已被某个进程领取（租约有效期内）
+    FAILED = 'failed'            # 超过最大重试次数，保留以便排查
+
+
+class NotificationOutbox:
+    """SQLite 通知发件箱
+
+    多个进程（钩子进程、守护进程）可共享同一个发件箱文件：
+    领取记录时写入租约，持有者崩溃后租约过期，记录会被其他进程重新领取。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at REAL NOT NULL,
+            event_type TEXT NOT NULL,
+            channels TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            lease_until REAL NOT NULL DEFAULT 0,
+            last_error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """初始化发件箱
+
+        Args:
+            config: 发件箱配置 (notifications.outbox)
+        """
+        config = config or {}
+        self.config = config
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.db_path = os.path.expanduser(config.get('path', '~/.claude-notifier/outbox.db'))
+        self.max_attempts = config.get('max_attempts', 5)
+        self.retry_delay = config.get('retry_delay', 5.0)
+        self.max_retry_delay = config.get('max_retry_delay', 300.0)
+        self.lease_seconds = config.get('lease_seconds', 60.0)
+
+        # 每个线程 (及 fork 出的子进程) 使用独立连接
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL 模式下 NORMAL 可保证进程崩溃不丢数据，同时避免每次提交 fsync
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, template_data: Dict[str, Any], channels: List[str], event_type: str) -> int:
+        """写入一条待投递通知
+
+        Returns:
+            记录 ID
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO outbox (created_at, event_type, channels, payload, status, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (now, event_type, json.dumps(channels),
+             json.dumps(template_data, ensure_ascii=False, default=str),
+             OutboxStatus.PENDING, now)
+        )
+        return cursor.lastrowid
+
+    def claim_due(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """领取到期的待投递通知（包括租约已过期的记录）"""
+        now = time.time()
+        conn = self._connect()
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE "
+                "(status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until <= ?) "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (OutboxStatus.PENDING, now, OutboxStatus.DELIVERING, now, limit)
+            ).fetchall()
+
+            if rows:
+                conn.executemany(
+                    "UPDATE outbox SET status = ?, lease_until = ? WHERE id = ?",
+                    [(OutboxStatus.DELIVERING, now + self.lease_seconds, row['id']) for row in rows]
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        return [
+            {
+                'id': row['id'],
+                'created_at': row['created_at'],
+                'event_type': row['event_type'],
+                'channels': json.loads(row['channels']),
+                'template_data': json.loads(row['payload']),
+                'attempts': row['attempts']
+            }
+            for row in rows
+        ]
+
+    def complete(self, entry_id: int):
+        """投递成功，删除记录"""
+        self._connect().execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def retry(self, entry_id: int, channels: List[str], error: str) -> bool:
+        """投递失败，按指数退避重新排期（仅重试失败的渠道）
+
+        Returns:
+            仍会重试返回 True；超过最大重试次数返回 False
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return False
+
+        attempts = row['attempts'] + 1
+        if attempts >= self.max_attempts:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, channels = ?, last_error = ? WHERE id = ?",
+                (OutboxStatus.FAILED, attempts, json.dumps(channels), error, entry_id)
+            )
+            return False
+
+        delay = min(self.retry_delay * (2 ** (attempts - 1)), self.max_retry_delay)
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, channels = ?, last_error = ?, "
+            "next_attempt_at = ?, lease_until = 0 WHERE id = ?",
+            (OutboxStatus.PENDING, attempts, json.dumps(channels), error, time.time() + delay, entry_id)
+        )
+        return True
+
+    def has_due(self) -> bool:
+        """是否有可立即投递的通知"""
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT 1 FROM outbox WHERE "
+            "(status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until <= ?) LIMIT 1",
+            (OutboxStatus.PENDING, now, OutboxStatus.DELIVERING, now)
+        ).fetchone()
+        return row is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取发件箱统计"""
+        counts = {OutboxStatus.PENDING: 0, OutboxStatus.DELIVERING: 0, OutboxStatus.FAILED: 0}
+        for row in self._connect().execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status"):
+            counts[row['status']] = row['n']
+
+        return {
+            'path': self.db_path,
+            'pending': counts[OutboxStatus.PENDING],
+            'delivering': counts[OutboxStatus.DELIVERING],
+            'failed': counts[OutboxStatus.FAILED]
+        }
+
+    def purge_failed(self) -> int:
+        """清除投递失败的记录"""
+        cursor = self._connect().execute("DELETE FROM outbox WHERE status = ?", (OutboxStatus.FAILED,))
+        return cursor.rowcount
+
+
+class OutboxWorker:
+    """发件箱投递工作线程"""
+
+    def __init__(self, outbox: NotificationOutbox,
+                 deliver: Callable[[Dict[str, Any]], None],
+                 poll_interval: float = 1.0):
+        """初始化工作线程
+
+        Args:
+            outbox: 发件箱
+            deliver: 投递函数，接收 claim_due() 返回的单条记录
+            poll_interval: 空闲轮询间隔（秒），用于拾取其他进程写入或到期重试的记录
+        """
+        self.outbox = outbox
+        self.deliver = deliver
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动工作线程（启动时会恢复上次遗留的待投递通知）"""
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='OutboxWorker', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """唤醒工作线程立即投递"""
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 5.0):
+        """停止工作线程"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """工作线程是否运行中"""
+        return self._running
+
+    def drain(self, deadline: Optional[float] = None) -> int:
+        """投递所有到期通知，直到没有到期记录或超过截止时间
+
+        每次只领取一条记录：成批领取时，排在后面的记录可能在投递前租约就已过期，
+        被其他进程重新领取而重复投递；截止时间也在每条记录投递前检查。
+
+        Returns:
+            处理的记录数
+        """
+        processed = 0
+        while deadline is None or time.time() < deadline:
+            entries = self.outbox.claim_due(limit=1)
+            if not entries:
+                break
+
+            entry = entries[0]
+            try:
+                self.deliver(entry)
+            except Exception as e:
+                self.logger.error(f"发件箱投递异常 #{entry['id']}: {e}")
+                self.outbox.retry(entry['id'], entry['channels'], str(e))
+            processed += 1
+
+        return processed
+
+    def _run(self):
+        """工作线程主循环"""
+        while self._running:
+            try:
+                self.drain()
+            except Exception as e:
+                self.logger.error(f"发件箱处理异常: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
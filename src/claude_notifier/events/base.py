@@ -4,8 +4,9 @@
 import abc
 import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, List, Optional
 from enum import Enum
+from .context import HookContext
 
 class EventType(Enum):
     """事件类型枚举"""
@@ -29,6 +30,11 @@ class EventPriority(Enum):
 class BaseEvent(abc.ABC):
     """事件基础类"""
     
+    # 事件关心的钩子事件和工具名，None 表示不限；EventManager 据此建立分发索引，
+    # 上下文不在范围内时不会调用 should_trigger
+    hook_events: Optional[FrozenSet[str]] = None
+    tool_names: Optional[FrozenSet[str]] = None
+    
     def __init__(self, event_id: str, event_type: EventType, priority: EventPriority = EventPriority.NORMAL):
         self.event_id = event_id
         self.event_type = event_type
@@ -52,8 +58,18 @@ class BaseEvent(abc.ABC):
         """获取默认消息模板"""
         pass
         
+    def applies_to(self, hook_event: Any, tool_name: Any) -> bool:
+        """上下文的钩子事件和工具名是否在事件的适用范围内"""
+        if self.hook_events is not None and hook_event not in self.hook_events:
+            return False
+        if self.tool_names is not None and tool_name not in self.tool_names:
+            return False
+        return True
+        
     def trigger(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """触发事件"""
+        # 判定与数据提取共享同一个上下文视图
+        context = HookContext.wrap(context)
         if not self.should_trigger(context):
             return None
             
@@ -1,66 +1,55 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import re
-import os
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import BaseEvent, EventType, EventPriority
+from .context import HookContext
+from ..utils.pattern_matcher import PatternMatcher
 
 class SensitiveOperationEvent(BaseEvent):
-    def __init__(self):
+    tool_names = frozenset({'Bash', 'CreateFile', 'Write', 'DeleteFile'})
+    
+    def __init__(self, extra_patterns: Optional[List[str]] = None):
         super().__init__('sensitive_operation', EventType.SENSITIVE_OPERATION, EventPriority.HIGH)
         self.patterns = [
             r'sudo\s+', r'rm\s+-[rf]*', r'chmod\s+', r'chown\s+',
             r'git\s+push', r'npm\s+publish', r'docker\s+', r'kubectl\s+'
-        ]
+        ] + list(extra_patterns or [])
+        self._matcher: Optional[PatternMatcher] = None
+        self._matcher_patterns: tuple = ()
+        
+    @property
+    def matcher(self) -> PatternMatcher:
+        """所有模式编译成的匹配器，patterns 被修改后重新编译"""
+        patterns = tuple(self.patterns)
+        if self._matcher is None or patterns != self._matcher_patterns:
+            self._matcher = PatternMatcher(patterns)
+            self._matcher_patterns = patterns
+        return self._matcher
         
     def should_trigger(self, context: Dict[str, Any]) -> bool:
-        tool_input = context.get('tool_input', '')
-        tool_name = context.get('tool_name', '')
-        
-        if tool_name not in ['Bash', 'CreateFile', 'Write', 'DeleteFile']:
+        if context.get('tool_name', '') not in self.tool_names:
             return False
             
-        command = self._extract_command(tool_input)
+        command = HookContext.wrap(context).command
         if not command:
             return False
             
-        for pattern in self.patterns:
-            if re.search(pattern, command, re.IGNORECASE):
-                return True
-        return False
-        
-    def _extract_command(self, tool_input: str) -> str:
-        try:
-            import json
-            if tool_input.startswith('{'):
-                data = json.loads(tool_input)
-                return data.get('command', '') or data.get('content', '')
-            return tool_input
-        except (json.JSONDecodeError, ValueError, KeyError):
-            return tool_input
-            
+        return self.matcher.search(command) is not None
+        
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        tool_input = context.get('tool_input', '')
-        command = self._extract_command(tool_input)
+        context = HookContext.wrap(context)
+        command = context.command
         
         return {
-            'project': self._get_project_name(),
+            'project': context.project,
             'operation': command[:200],
             'tool_name': context.get('tool_name', ''),
+            'matched_patterns': sorted(self.matcher.matches(command)),
             'risk_level': 'medium'
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        current_dir = os.getcwd()
-        if current_dir not in ['/', os.path.expanduser('~')]:
-            return os.path.basename(current_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '🔐 敏感操作检测',
@@ -69,6 +58,8 @@ class SensitiveOperationEvent(BaseEvent):
         }
 
 class TaskCompletionEvent(BaseEvent):
+    hook_events = frozenset({'Stop'})
+    
     def __init__(self):
         super().__init__('task_completion', EventType.TASK_COMPLETION, EventPriority.NORMAL)
         
@@ -76,17 +67,12 @@ class TaskCompletionEvent(BaseEvent):
         return context.get('hook_event') == 'Stop'
         
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        project = HookContext.wrap(context).project
         return {
-            'project': self._get_project_name(),
-            'status': f'{self._get_project_name()} 项目任务完成'
+            'project': project,
+            'status': f'{project} 项目任务完成'
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '✅ 任务完成',
@@ -100,7 +86,7 @@ class RateLimitEvent(BaseEvent):
         super().__init__('rate_limit', EventType.RATE_LIMIT, EventPriority.HIGH)
         
     def should_trigger(self, context: Dict[str, Any]) -> bool:
-        error_msg = context.get('error_message', '').lower()
+        error_msg = HookContext.wrap(context).lower('error_message')
         return any(keyword in error_msg for keyword in [
             'rate limit', 'quota exceeded', 'too many requests', 
             '限流', '额度', '请求过多'
@@ -108,18 +94,12 @@ class RateLimitEvent(BaseEvent):
         
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            'project': self._get_project_name(),
+            'project': HookContext.wrap(context).project,
             'error_type': 'rate_limit',
             'message': context.get('error_message', ''),
             'cooldown_time': context.get('cooldown_time', '未知')
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '⏰ Claude 额度限流',
@@ -138,18 +118,12 @@ class ConfirmationRequiredEvent(BaseEvent):
         
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            'project': self._get_project_name(),
+            'project': HookContext.wrap(context).project,
             'operation': context.get('operation', '未知操作'),
             'reason': context.get('confirmation_reason', '需要用户确认'),
             'risk_level': context.get('risk_level', 'medium')
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '⚠️ 需要确认',
@@ -159,6 +133,8 @@ class ConfirmationRequiredEvent(BaseEvent):
 
 class SessionStartEvent(BaseEvent):
     """会话开始事件"""
+    hook_events = frozenset({'Start'})
+    
     def __init__(self):
         super().__init__('session_start', EventType.SESSION_START, EventPriority.LOW)
         
@@ -167,17 +143,11 @@ class SessionStartEvent(BaseEvent):
         
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            'project': self._get_project_name(),
+            'project': HookContext.wrap(context).project,
             'session_id': context.get('session_id', 'unknown'),
             'start_time': time.strftime('%Y-%m-%d %H:%M:%S')
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '🚀 会话开始',
@@ -196,18 +166,12 @@ class ErrorOccurredEvent(BaseEvent):
         
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
-            'project': self._get_project_name(),
+            'project': HookContext.wrap(context).project,
             'error_type': context.get('error_type', 'unknown'),
             'error_message': context.get('error_message', ''),
             'stack_trace': context.get('stack_trace', '')[:500]  # 限制长度
         }
         
-    def _get_project_name(self) -> str:
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         return {
             'title': '❌ 错误发生',
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+钩子上下文
+一次钩子调用的上下文只包装一次，所有事件、触发器和数据提取器共享：工具输入的 JSON 解析、
+命令和文件路径提取、项目名称解析以及字段的字符串/小写视图都在首次访问时计算并缓存。
+"""
+
+import os
+import json
+from functools import cached_property
+from typing import Dict, Any, Optional
+
+
+class HookContext(dict):
+    """共享的钩子上下文
+
+    本身就是上下文字典，原有的 context.get(...) 读取方式不变。派生视图在首次访问时
+    计算，之后修改字典不会刷新已缓存的视图。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 字段 -> 字符串视图 / 小写视图
+        self._texts: Dict[str, str] = {}
+        self._lowered: Dict[str, str] = {}
+
+    @classmethod
+    def wrap(cls, context: Dict[str, Any]) -> 'HookContext':
+        """包装上下文字典，已包装时原样返回"""
+        return context if isinstance(context, cls) else cls(context)
+
+    @cached_property
+    def tool_input_data(self) -> Optional[Dict[str, Any]]:
+        """解析后的工具输入，tool_input 不是 JSON 对象时为 None"""
+        tool_input = self.get('tool_input', '')
+        if isinstance(tool_input, dict):
+            return tool_input
+        if isinstance(tool_input, str) and tool_input.startswith('{'):
+            try:
+                data = json.loads(tool_input)
+            except ValueError:
+                return None
+            return data if isinstance(data, dict) else None
+        return None
+
+    @cached_property
+    def command(self) -> str:
+        """工具输入中的命令（或写入内容），无法解析时为原始输入"""
+        data = self.tool_input_data
+        if data is None:
+            return self.text('tool_input')
+        command = data.get('command', '') or data.get('content', '')
+        return command if isinstance(command, str) else str(command)
+
+    @cached_property
+    def file_path(self) -> str:
+        """工具输入中的文件路径"""
+        data = self.tool_input_data or {}
+        return str(data.get('file_path', data.get('path', '')) or '')
+
+    @cached_property
+    def project(self) -> str:
+        """项目名称：上下文中的 project、CLAUDE_PROJECT_DIR 或当前目录名"""
+        project = self.get('project')
+        if project and isinstance(project, str):
+            return project
+        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
+        if project_dir:
+            return os.path.basename(project_dir)
+        try:
+            current_dir = os.getcwd()
+        except OSError:
+            return 'claude-code'
+        if current_dir not in ['/', os.path.expanduser('~')]:
+            return os.path.basename(current_dir)
+        return 'claude-code'
+
+    def text(self, field: str) -> str:
+        """字段的字符串形式（缺失时为空字符串）"""
+        text = self._texts.get(field)
+        if text is None:
+            value = self.get(field, '')
+            text = self._texts[field] = value if isinstance(value, str) else str(value)
+        return text
+
+    def lower(self, field: str) -> str:
+        """字段的小写字符串形式"""
+        lowered = self._lowered.get(field)
+        if lowered is None:
+            lowered = self._lowered[field] = self.text(field).lower()
+        return lowered
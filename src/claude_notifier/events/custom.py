@@ -5,8 +5,72 @@ import re
 import json
 import time
 import logging
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, FrozenSet, List, Optional, Callable, Tuple, Union
 from .base import BaseEvent, EventType, EventPriority
+from .context import HookContext
+
+# 编译后的触发条件和数据提取器，参数为 HookContext
+Predicate = Callable[[Dict[str, Any]], bool]
+Extractor = Callable[[Dict[str, Any]], Any]
+
+_REGEX_FLAGS = {
+    'IGNORECASE': re.IGNORECASE,
+    'MULTILINE': re.MULTILINE,
+    'DOTALL': re.DOTALL
+}
+
+# 条件操作符: (上下文值, 配置值) -> 是否满足；exists/not_exists 只检查字段是否存在，
+# contains/not_contains 使用上下文的字符串视图
+_CONDITION_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'equals': lambda actual, expected: actual == expected,
+    'not_equals': lambda actual, expected: actual != expected,
+    'greater_than': lambda actual, expected: _to_float(actual) > expected,
+    'less_than': lambda actual, expected: _to_float(actual) < expected
+}
+
+_ERROR_KEYWORDS = ('error', 'exception', 'failed', 'timeout', '错误', '异常', '失败')
+
+# 内置触发函数
+_TRIGGER_FUNCTIONS: Dict[str, Predicate] = {
+    'is_weekend': lambda context: time.localtime().tm_wday >= 5,
+    'is_work_hours': lambda context: 9 <= time.localtime().tm_hour <= 18,
+    'has_error_keywords': lambda context: any(
+        keyword in context.lower('tool_input') + context.lower('error_message')
+        for keyword in _ERROR_KEYWORDS
+    )
+}
+
+# 内置数据提取函数（实现见 CustomEvent._execute_extractor_function）
+_EXTRACTOR_FUNCTIONS = ('get_project_name', 'get_current_time', 'get_file_count')
+
+
+def _to_float(value: Any) -> float:
+    """转换为数值，无法转换时返回 NaN（任何比较均不成立）"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float('nan')
+
+
+def _regex_flags(flags: Union[int, List[str]], location: str) -> int:
+    """解析正则标志（整数或标志名列表）"""
+    if not isinstance(flags, list):
+        return flags
+    value = 0
+    for flag in flags:
+        if flag not in _REGEX_FLAGS:
+            raise ValueError(f"{location}: 未知的正则标志 {flag!r}")
+        value |= _REGEX_FLAGS[flag]
+    return value
+
+
+def _compile_regex(pattern: str, flags: int, location: str) -> re.Pattern:
+    """编译正则表达式，无效时抛出 ValueError"""
+    try:
+        return re.compile(pattern, flags)
+    except (re.error, TypeError) as e:
+        raise ValueError(f"{location}: 正则表达式错误 {pattern!r}: {e}")
+
 
 class CustomEvent(BaseEvent):
     """自定义事件类"""
@@ -22,6 +86,8 @@ class CustomEvent(BaseEvent):
                 - description: 事件描述
                 - priority: 优先级 (low/normal/high/critical)
                 - triggers: 触发条件列表
+                - hook_events: 适用的钩子事件列表（可选）
+                - tool_names: 适用的工具名列表（可选）
                 - data_extractors: 数据提取器配置
                 - message_template: 消息模板
         """
@@ -42,148 +108,161 @@ class CustomEvent(BaseEvent):
         self.data_extractors = config.get('data_extractors', {})
         self.message_template = config.get('message_template', {})
         
+        # 适用范围：显式配置与触发条件推导的范围取交集
+        self.hook_events = self._scope(config.get('hook_events'), 'hook_event')
+        self.tool_names = self._scope(config.get('tool_names'), 'tool_name')
+        
+        # 注册时编译触发条件和数据提取器，配置无效时抛出 ValueError
+        self._predicates = [self._compile_trigger(trigger, i) for i, trigger in enumerate(self.triggers)]
+        self._extractors = self._compile_extractors()
+        
+    def _scope(self, declared: Optional[List[str]], field: str) -> Optional[FrozenSet[str]]:
+        """计算事件在某个上下文字段上的适用范围，None 表示不限"""
+        inferred = self._infer_scope(field)
+        if declared is None:
+            return inferred
+        declared = frozenset(declared)
+        return declared if inferred is None else declared & inferred
+        
+    def _infer_scope(self, field: str) -> Optional[FrozenSet[str]]:
+        """由触发条件推导范围：仅当每个触发器都要求 field 等于某个值时才受限"""
+        if not self.triggers:
+            return None
+        values = set()
+        for trigger in self.triggers:
+            if (trigger.get('type', 'pattern') != 'condition' or trigger.get('field') != field
+                    or trigger.get('operator', 'equals') != 'equals' or not isinstance(trigger.get('value'), str)):
+                return None
+            values.add(trigger['value'])
+        return frozenset(values)
+        
     def should_trigger(self, context: Dict[str, Any]) -> bool:
         """检查是否应该触发事件"""
-        if not self.triggers:
+        if not self._predicates:
             return False
             
-        for trigger in self.triggers:
-            if self._evaluate_trigger(trigger, context):
+        if not self.applies_to(context.get('hook_event'), context.get('tool_name')):
+            return False
+            
+        context = HookContext.wrap(context)
+        for predicate in self._predicates:
+            if predicate(context):
                 return True
         return False
         
-    def _evaluate_trigger(self, trigger: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """评估单个触发条件"""
+    def _compile_trigger(self, trigger: Dict[str, Any], index: int) -> Predicate:
+        """将触发条件编译为判定函数"""
         trigger_type = trigger.get('type', 'pattern')
         
         if trigger_type == 'pattern':
-            return self._evaluate_pattern_trigger(trigger, context)
+            return self._compile_pattern_trigger(trigger, index)
         elif trigger_type == 'condition':
-            return self._evaluate_condition_trigger(trigger, context)
+            return self._compile_condition_trigger(trigger, index)
         elif trigger_type == 'function':
-            return self._evaluate_function_trigger(trigger, context)
+            function = _TRIGGER_FUNCTIONS.get(trigger.get('function', ''))
+            if function is None:
+                raise ValueError(f"触发器 {index}: 未知的函数 {trigger.get('function', '')!r}")
+            return function
         else:
-            self.logger.warning(f"未知的触发器类型: {trigger_type}")
-            return False
+            raise ValueError(f"触发器 {index}: 未知的触发器类型 {trigger_type!r}")
             
-    def _evaluate_pattern_trigger(self, trigger: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """评估模式匹配触发器"""
-        pattern = trigger.get('pattern', '')
+    def _compile_pattern_trigger(self, trigger: Dict[str, Any], index: int) -> Predicate:
+        """编译模式匹配触发器"""
         field = trigger.get('field', 'tool_input')
-        flags = trigger.get('flags', 0)
+        location = f'触发器 {index}'
+        regex = _compile_regex(trigger.get('pattern', ''), _regex_flags(trigger.get('flags', 0), location), location)
+        search = regex.search
+        return lambda context: search(context.text(field)) is not None
         
-        if isinstance(flags, list):
-            flag_value = 0
-            for flag in flags:
-                if flag == 'IGNORECASE':
-                    flag_value |= re.IGNORECASE
-                elif flag == 'MULTILINE':
-                    flag_value |= re.MULTILINE
-                elif flag == 'DOTALL':
-                    flag_value |= re.DOTALL
-            flags = flag_value
-            
-        value = context.get(field, '')
-        if not isinstance(value, str):
-            value = str(value)
-            
-        try:
-            return bool(re.search(pattern, value, flags))
-        except re.error as e:
-            self.logger.error(f"正则表达式错误: {e}")
-            return False
-            
-    def _evaluate_condition_trigger(self, trigger: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """评估条件触发器"""
+    def _compile_condition_trigger(self, trigger: Dict[str, Any], index: int) -> Predicate:
+        """编译条件触发器：操作符和比较值在编译时绑定"""
         field = trigger.get('field', '')
-        operator = trigger.get('operator', 'equals')
+        operator_name = trigger.get('operator', 'equals')
         value = trigger.get('value')
         
-        context_value = context.get(field)
-        
-        if operator == 'equals':
-            return context_value == value
-        elif operator == 'not_equals':
-            return context_value != value
-        elif operator == 'contains':
-            return value in str(context_value) if context_value else False
-        elif operator == 'not_contains':
-            return value not in str(context_value) if context_value else True
-        elif operator == 'exists':
-            return field in context
-        elif operator == 'not_exists':
-            return field not in context
-        elif operator == 'greater_than':
-            try:
-                return float(context_value) > float(value)
-            except (ValueError, TypeError):
-                return False
-        elif operator == 'less_than':
+        if operator_name == 'exists':
+            return lambda context: field in context
+        if operator_name == 'not_exists':
+            return lambda context: field not in context
+        if operator_name in ('contains', 'not_contains'):
+            # 字段为空时 contains 不成立、not_contains 成立
+            expected = str(value)
+            negate = operator_name == 'not_contains'
+            return lambda context: negate if not context.get(field) else (expected in context.text(field)) != negate
+            
+        compare = _CONDITION_OPERATORS.get(operator_name)
+        if compare is None:
+            raise ValueError(f"触发器 {index}: 未知的操作符 {operator_name!r}")
+            
+        if operator_name in ('greater_than', 'less_than'):
             try:
-                return float(context_value) < float(value)
+                value = float(value)
             except (ValueError, TypeError):
-                return False
-        else:
-            self.logger.warning(f"未知的操作符: {operator}")
-            return False
-            
-    def _evaluate_function_trigger(self, trigger: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """评估函数触发器"""
-        function_name = trigger.get('function', '')
+                raise ValueError(f"触发器 {index}: {operator_name} 需要数值, 实际为 {value!r}")
+                
+        return lambda context: compare(context.get(field), value)
+        
+    def _compile_extractors(self) -> List[Tuple[str, Extractor]]:
+        """将数据提取器编译为 (键, 提取函数) 列表"""
+        compiled: List[Tuple[str, Extractor]] = []
+        for key, extractor in self.data_extractors.items():
+            if isinstance(extractor, str):
+                # 简单字段提取
+                compiled.append((key, lambda context, field=extractor: context.get(field, '')))
+            elif isinstance(extractor, dict):
+                compiled.append((key, self._compile_extractor(key, extractor)))
+        return compiled
+        
+    def _compile_extractor(self, key: str, extractor: Dict[str, Any]) -> Extractor:
+        """编译复杂提取器"""
+        extractor_type = extractor.get('type', 'field')
         
-        # 内置函数
-        if function_name == 'is_weekend':
-            return time.localtime().tm_wday >= 5
-        elif function_name == 'is_work_hours':
-            hour = time.localtime().tm_hour
-            return 9 <= hour <= 18
-        elif function_name == 'has_error_keywords':
-            text = str(context.get('tool_input', '')) + str(context.get('error_message', ''))
-            error_keywords = ['error', 'exception', 'failed', 'timeout', '错误', '异常', '失败']
-            return any(keyword in text.lower() for keyword in error_keywords)
+        if extractor_type == 'field':
+            field = extractor.get('field', '')
+            default = extractor.get('default', '')
+            return lambda context: context.get(field, default)
+            
+        elif extractor_type == 'regex':
+            field = extractor.get('field', 'tool_input')
+            group = extractor.get('group', 0)
+            regex = _compile_regex(extractor.get('pattern', ''), 0, f'提取器 {key}')
+            if isinstance(group, int) and not 0 <= group <= regex.groups or \
+                    isinstance(group, str) and group not in regex.groupindex:
+                raise ValueError(f"提取器 {key}: 正则表达式没有分组 {group!r}")
+                
+            def extract(context: HookContext) -> Any:
+                match = regex.search(context.text(field))
+                return match.group(group) if match else ''
+                
+            return extract
+            
+        elif extractor_type == 'function':
+            function_name = extractor.get('function', '')
+            if function_name not in _EXTRACTOR_FUNCTIONS:
+                raise ValueError(f"提取器 {key}: 未知的函数 {function_name!r}")
+            return lambda context: self._execute_extractor_function(function_name, context)
+            
         else:
-            self.logger.warning(f"未知的函数: {function_name}")
-            return False
+            raise ValueError(f"提取器 {key}: 未知的提取器类型 {extractor_type!r}")
             
     def extract_data(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """从上下文中提取事件数据"""
+        context = HookContext.wrap(context)
         data = {
             'event_name': self.name,
             'description': self.description
         }
         
-        # 使用配置的数据提取器
-        for key, extractor in self.data_extractors.items():
-            if isinstance(extractor, str):
-                # 简单字段提取
-                data[key] = context.get(extractor, '')
-            elif isinstance(extractor, dict):
-                # 复杂提取器
-                extractor_type = extractor.get('type', 'field')
-                if extractor_type == 'field':
-                    field = extractor.get('field', '')
-                    default = extractor.get('default', '')
-                    data[key] = context.get(field, default)
-                elif extractor_type == 'regex':
-                    pattern = extractor.get('pattern', '')
-                    field = extractor.get('field', 'tool_input')
-                    group = extractor.get('group', 0)
-                    text = context.get(field, '')
-                    try:
-                        match = re.search(pattern, str(text))
-                        data[key] = match.group(group) if match else ''
-                    except (re.error, IndexError):
-                        data[key] = ''
-                elif extractor_type == 'function':
-                    function_name = extractor.get('function', '')
-                    data[key] = self._execute_extractor_function(function_name, context)
-                        
+        # 使用编译好的数据提取器
+        for key, extract in self._extractors:
+            data[key] = extract(context)
+            
         return data
         
     def _execute_extractor_function(self, function_name: str, context: Dict[str, Any]) -> Any:
         """执行数据提取函数"""
         if function_name == 'get_project_name':
-            return self._get_project_name()
+            return HookContext.wrap(context).project
         elif function_name == 'get_current_time':
             return time.strftime('%Y-%m-%d %H:%M:%S')
         elif function_name == 'get_file_count':
@@ -195,17 +274,6 @@ class CustomEvent(BaseEvent):
         else:
             return ''
             
-    def _get_project_name(self) -> str:
-        """获取项目名称"""
-        import os
-        project_dir = os.environ.get('CLAUDE_PROJECT_DIR')
-        if project_dir:
-            return os.path.basename(project_dir)
-        current_dir = os.getcwd()
-        if current_dir not in ['/', os.path.expanduser('~')]:
-            return os.path.basename(current_dir)
-        return 'claude-code'
-        
     def get_default_message(self) -> Dict[str, Any]:
         """获取默认消息模板"""
         if self.message_template:
@@ -222,6 +290,8 @@ class CustomEventRegistry:
     
     def __init__(self):
         self.events: Dict[str, CustomEvent] = {}
+        # 注册或注销事件时递增，供使用方判断缓存是否失效
+        self.version = 0
         self.logger = logging.getLogger(self.__class__.__name__)
         
     def register_event(self, event_id: str, config: Dict[str, Any]) -> bool:
@@ -229,6 +299,7 @@ class CustomEventRegistry:
         try:
             event = CustomEvent(event_id, config)
             self.events[event_id] = event
+            self.version += 1
             self.logger.info(f"注册自定义事件: {event_id}")
             return True
         except Exception as e:
@@ -239,6 +310,7 @@ class CustomEventRegistry:
         """注销自定义事件"""
         if event_id in self.events:
             del self.events[event_id]
+            self.version += 1
             self.logger.info(f"注销自定义事件: {event_id}")
             return True
         return False
@@ -278,6 +350,13 @@ class CustomEventRegistry:
                 trigger_errors = self._validate_trigger(trigger, i)
                 errors.extend(trigger_errors)
                 
+        # 结构正确时再编译一次，检查正则表达式、操作符和提取器
+        if not errors:
+            try:
+                CustomEvent(config['name'], config)
+            except ValueError as e:
+                errors.append(str(e))
+                
         return errors
         
     def _validate_trigger(self, trigger: Dict[str, Any], index: int) -> List[str]:
@@ -1,9 +1,25 @@
 """
 Claude Code钩子集成模块
 为PyPI用户提供完整的Claude Code集成功能
+
+子模块在首次访问时导入：钩子进程只需要 claude_hook，不应加载安装器和守护进程。
 """
 
-from .installer import ClaudeHookInstaller
-from .claude_hook import ClaudeHook
+import importlib
+
+_LAZY_ATTRS = {
+    'ClaudeHookInstaller': '.installer',
+    'ClaudeHook': '.claude_hook',
+    'NotifierDaemon': '.daemon',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['ClaudeHookInstaller', 'ClaudeHook']
\ No newline at end of file
+__all__ = ['ClaudeHookInstaller', 'ClaudeHook', 'NotifierDaemon']
@@ -12,47 +12,252 @@ import json
 import time
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 
-# 导入 Notifier（优先绝对导入，失败则尝试相对导入；不再回退到 src.*）
-try:
-    from claude_notifier.core.notifier import Notifier
-    PYPI_MODE = True
-except Exception:
+PYPI_MODE = True
+
+
+def _load_notifier_class():
+    """惰性导入 Notifier
+
+    转发给守护进程的钩子调用无需加载 Notifier，因此推迟到真正需要时导入。
+    优先绝对导入，失败则尝试相对导入；均失败时返回 None（简化模式，不发送通知）。
+    """
+    try:
+        from claude_notifier.core.notifier import Notifier
+        return Notifier
+    except Exception:
+        try:
+            from ..core.notifier import Notifier  # 可能在直接脚本执行时失败
+            return Notifier
+        except Exception:
+            return None
+
+
+def is_detached_delivery_enabled(config: Optional[Dict[str, Any]] = None) -> bool:
+    """检查是否启用分离投递模式
+    
+    分离投递模式下钩子先向 Claude Code 返回 {"continue": true}，
+    通知在后台（守护进程工作线程或脱离的子进程）发送，慢速或失效的
+    Webhook 不会增加工具调用延迟。
+    
+    环境变量 CLAUDE_NOTIFIER_DETACHED (1/0) 优先于配置项
+    advanced.hooks.detached_delivery。
+    """
+    env_value = os.environ.get('CLAUDE_NOTIFIER_DETACHED')
+    if env_value is not None:
+        return env_value.strip().lower() in ('1', 'true', 'yes', 'on')
+        
+    if not isinstance(config, dict):
+        return False
+    hooks_config = config.get('advanced', {}).get('hooks', {})
+    return bool(isinstance(hooks_config, dict) and hooks_config.get('detached_delivery', False))
+
+
+def run_detached(func) -> bool:
+    """在脱离的孙进程中执行 func (双重 fork)
+    
+    父进程等待子进程立即退出后返回，孙进程由 init 接管，
+    不再阻塞调用钩子的 Claude Code。孙进程以 os._exit 结束，不执行 atexit
+    回调，func 需自行完成后台任务（见 ClaudeHook.deliver_notifications）。
+    
+    Returns:
+        成功分离返回 True；平台不支持 fork 或 fork 失败返回 False
+    """
+    if not hasattr(os, 'fork'):
+        return False
+        
+    # fork 前刷新缓冲区，避免子进程重复输出
+    sys.stdout.flush()
+    sys.stderr.flush()
+    
     try:
-        from ..core.notifier import Notifier  # 可能在直接脚本执行时失败
-        PYPI_MODE = True
+        pid = os.fork()
+    except OSError:
+        return False
+        
+    if pid > 0:
+        os.waitpid(pid, 0)
+        return True
+        
+    # 第一个子进程：脱离会话后再次 fork 并立即退出
+    try:
+        os.setsid()
+        if os.fork() > 0:
+            os._exit(0)
+    except OSError:
+        os._exit(1)
+        
+    # 孙进程：断开标准输入输出，Claude Code 不会等待管道关闭
+    exit_code = 0
+    try:
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        func()
     except Exception:
-        Notifier = None  # 简化模式，不发送通知
-        PYPI_MODE = True
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
 
 class ClaudeHook:
     """Claude Code钩子处理器"""
     
-    def __init__(self):
-        """初始化钩子处理器，仅支持PyPI模式（完整或简化）。"""
+    def __init__(self, notifier: Optional[Any] = None):
+        """初始化钩子处理器，仅支持PyPI模式（完整或简化）。
+        
+        通知器在首次需要发送通知时才创建：非敏感工具的 PreToolUse 等
+        不发送通知的事件无需加载 Notifier、渠道和配置。
+        
+        Args:
+            notifier: 已初始化的通知器（守护进程复用常驻实例），None 则按需创建
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
         
-        # PyPI模式：优先使用 Notifier，不可用则降级为简化模式
-        try:
-            if Notifier is not None:
-                self.notifier = Notifier()
-                self.config = getattr(self.notifier, 'config', {})
-                self.mode = 'pypi_full'
-            else:
-                self.notifier = None
-                self.config = {}
-                self.mode = 'pypi_simple'
-        except Exception as e:
-            self.logger.warning(f"PyPI完整模式初始化失败: {e}，切换到简化模式")
-            self.notifier = None
-            self.config = {}
-            self.mode = 'pypi_simple'
+        self._notifier = notifier
+        self._config: Optional[Dict[str, Any]] = None
+        self._mode: Optional[str] = None
+        self._detached: Optional[bool] = None
+        
+        # 分离投递：通知先暂存，钩子返回后由调用方在后台发送
+        self.pending_notifications: List[Tuple[str, Dict[str, Any]]] = []
         
         # 设置钩子状态文件
         self.state_file = os.path.expanduser('~/.claude-notifier/hook_state.json')
         self.load_state()
         
+    def _init_notifier(self):
+        """创建通知器：PyPI模式优先使用 Notifier，不可用则降级为简化模式"""
+        notifier = self._notifier
+        try:
+            if notifier is None:
+                notifier_class = _load_notifier_class()
+                if notifier_class is not None:
+                    notifier = notifier_class()
+        except Exception as e:
+            self.logger.warning(f"PyPI完整模式初始化失败: {e}，切换到简化模式")
+            notifier = None
+            
+        if notifier is not None:
+            created = self._notifier is None
+            self._notifier = notifier
+            self._config = getattr(notifier, 'config', {})
+            self._mode = 'pypi_full'
+            if created:
+                # 钩子进程只写入发件箱，由脱离的子进程投递（见 main）
+                if hasattr(notifier, 'outbox_inline_delivery'):
+                    notifier.outbox_inline_delivery = False
+                if not self.detached:
+                    self._use_blocking_retries(notifier)
+        else:
+            self._notifier = None
+            self._config = {}
+            self._mode = 'pypi_simple'
+            
+    def _use_blocking_retries(self, notifier: Any):
+        """钩子进程内直接发送时，渠道重试在发送线程中完成，不留给进程退出时等待
+        
+        启用发件箱时重试已由发件箱负责（渠道为 none 模式），不受影响。
+        """
+        for channel in getattr(notifier, 'channels', {}).values():
+            if getattr(channel, 'retry_mode', None) == 'scheduled':
+                channel.retry_mode = 'blocking'
+                
+    @property
+    def notifier(self) -> Optional[Any]:
+        """通知器（首次访问时创建）"""
+        if self._mode is None:
+            self._init_notifier()
+        return self._notifier
+        
+    @notifier.setter
+    def notifier(self, value: Optional[Any]):
+        self._notifier = value
+        self._mode = None
+        
+    @property
+    def config(self) -> Dict[str, Any]:
+        """通知器配置"""
+        if self._mode is None:
+            self._init_notifier()
+        return self._config
+        
+    @property
+    def mode(self) -> str:
+        """运行模式：pypi_full / pypi_simple"""
+        if self._mode is None:
+            self._init_notifier()
+        return self._mode
+        
+    @property
+    def detached(self) -> bool:
+        """是否启用分离投递"""
+        if self._detached is None:
+            self._detached = is_detached_delivery_enabled(self.config)
+        return self._detached
+        
+    @detached.setter
+    def detached(self, value: bool):
+        self._detached = value
+        
+    def _send(self, message: str, **kwargs):
+        """发送通知，分离投递模式下仅暂存"""
+        if self.detached:
+            self.pending_notifications.append((message, kwargs))
+        else:
+            self.notifier.send(message, **kwargs)
+            
+    def take_pending_notifications(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """取出并清空暂存的通知"""
+        pending = self.pending_notifications
+        self.pending_notifications = []
+        return pending
+        
+    def deliver_notifications(self, notifications: List[Tuple[str, Dict[str, Any]]]):
+        """发送暂存的通知，投递发件箱中的到期通知，并等待渠道的后台重试
+        
+        在分离的子进程中调用，总等待时间受 advanced.hooks.drain_timeout 限制。
+        """
+        if self.notifier is None:
+            return
+            
+        hooks_config = self.config.get('advanced', {}).get('hooks', {})
+        timeout = hooks_config.get('drain_timeout', 60) if isinstance(hooks_config, dict) else 60
+        deadline = time.time() + timeout
+            
+        for message, kwargs in notifications:
+            try:
+                self.notifier.send(message, **kwargs)
+            except Exception as e:
+                self.logger.warning(f"后台通知发送失败: {e}")
+                
+        flush_outbox = getattr(self.notifier, 'flush_outbox', None)
+        if callable(flush_outbox):
+            try:
+                flush_outbox(timeout=max(0.0, deadline - time.time()))
+            except Exception as e:
+                self.logger.warning(f"发件箱投递失败: {e}")
+                
+        drain = getattr(self.notifier, 'drain', None)
+        if callable(drain):
+            try:
+                drain(timeout=max(0.0, deadline - time.time()))
+            except Exception as e:
+                self.logger.warning(f"后台重试未完成: {e}")
+                
+    def has_outbox_backlog(self) -> bool:
+        """通知器发件箱中是否有待投递的通知（通知器未加载时不检查）"""
+        if self._mode is None:
+            return False
+        outbox = getattr(self.notifier, 'outbox', None)
+        if outbox is None:
+            return False
+        try:
+            return outbox.has_due()
+        except Exception:
+            return False
+                
     def load_state(self):
         """加载钩子状态"""
         try:
@@ -242,7 +447,7 @@ class ClaudeHook:
                     else:
                         message = f"⚠️ 敏感操作: {tool_name}"
                     
-                    self.notifier.send(message, event_type='sensitive_operation', priority='high')
+                    self._send(message, event_type='sensitive_operation', priority='high')
                 except Exception as e:
                     self.logger.warning(f"敏感操作通知发送失败: {e}")
         
@@ -269,7 +474,7 @@ class ClaudeHook:
             if self.mode == 'pypi_full':
                 try:
                     message = f"❌ {tool_name} 执行失败: {error_content[:100]}"
-                    self.notifier.send(message, event_type='error_occurred', priority='high')
+                    self._send(message, event_type='error_occurred', priority='high')
                 except Exception as e:
                     self.logger.warning(f"错误通知发送失败: {e}")
         
@@ -295,7 +500,7 @@ class ClaudeHook:
                 duration = int(time.time() - self.state.get('session_start', time.time()))
                 cmd_count = self.state.get('command_count', 0)
                 message = f"✅ 任务已完成 ({cmd_count} 个操作, {duration//60}分钟)"
-                self.notifier.send(message, event_type='task_completion')
+                self._send(message, event_type='task_completion')
             except Exception as e:
                 self.logger.warning(f"完成通知发送失败: {e}")
         
@@ -318,7 +523,7 @@ class ClaudeHook:
             if self.mode == 'pypi_full':
                 try:
                     notify_message = f"⚠️ 需要权限确认: {message[:100]}"
-                    self.notifier.send(notify_message, event_type='confirmation_required', priority='high')
+                    self._send(notify_message, event_type='confirmation_required', priority='high')
                 except Exception as e:
                     self.logger.warning(f"权限通知发送失败: {e}")
                     
@@ -327,23 +532,61 @@ class ClaudeHook:
             if self.mode == 'pypi_full':
                 try:
                     notify_message = f"💤 Claude 等待输入中..."
-                    self.notifier.send(notify_message, event_type='idle_prompt')
+                    self._send(notify_message, event_type='idle_prompt')
                 except Exception as e:
                     self.logger.warning(f"空闲通知发送失败: {e}")
         
         return {"continue": True}
 
 
+def dispatch_hook_event(hook: ClaudeHook, hook_event: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """将新版 API 钩子事件路由到对应的处理器
+    
+    进程内调用与守护进程共用此路由逻辑。
+    
+    Args:
+        hook: 钩子处理器
+        hook_event: 钩子事件名称
+        input_data: 钩子 stdin JSON 数据
+        
+    Returns:
+        返回给 Claude Code 的 JSON 响应
+    """
+    if not isinstance(input_data, dict):
+        input_data = {}
+        
+    if hook_event == 'PreToolUse':
+        return hook.on_pre_tool_use(input_data)
+    elif hook_event == 'PostToolUse':
+        return hook.on_post_tool_use(input_data)
+    elif hook_event == 'Stop':
+        return hook.on_stop(input_data)
+    elif hook_event == 'SubagentStop':
+        return hook.on_stop(input_data)  # 复用 Stop 处理器
+    elif hook_event == 'Notification':
+        return hook.on_notification(input_data)
+    else:
+        hook.logger.warning(f"未知的钩子事件: {hook_event}")
+        return {"continue": True}
+
+
+def deliver_in_background(hook: ClaudeHook, pending: List[Tuple[str, Dict[str, Any]]]):
+    """在脱离的子进程中发送暂存的通知并投递发件箱，无法分离时在当前进程中完成"""
+    if not pending and not hook.has_outbox_backlog():
+        return
+    if not run_detached(lambda: hook.deliver_notifications(pending)):
+        hook.deliver_notifications(pending)
+
+
 def main():
     """
     主函数 - 处理钩子调用
     
     支持两种调用方式：
     1. 新版 API：通过环境变量 CLAUDE_HOOK_EVENT 获取事件类型，stdin 读取 JSON 数据
+       若常驻守护进程 (claude-notifier daemon start) 可用，则直接转发给守护进程处理
     2. 旧版 API：通过命令行参数传递事件类型和数据（向后兼容）
     """
-    hook = ClaudeHook()
-    
     # 检查是否使用新版 API（通过环境变量）
     hook_event = os.environ.get('CLAUDE_HOOK_EVENT', '')
     
@@ -353,28 +596,35 @@ def main():
             input_data = json.load(sys.stdin)
         except (json.JSONDecodeError, ValueError):
             input_data = {}
-        
-        # 路由到对应的钩子处理器
-        result = {"continue": True}
-        
-        if hook_event == 'PreToolUse':
-            result = hook.on_pre_tool_use(input_data)
-        elif hook_event == 'PostToolUse':
-            result = hook.on_post_tool_use(input_data)
-        elif hook_event == 'Stop':
-            result = hook.on_stop(input_data)
-        elif hook_event == 'SubagentStop':
-            result = hook.on_stop(input_data)  # 复用 Stop 处理器
-        elif hook_event == 'Notification':
-            result = hook.on_notification(input_data)
-        else:
-            hook.logger.warning(f"未知的钩子事件: {hook_event}")
+            
+        # 优先转发给常驻守护进程，避免每次钩子调用重建通知器
+        result = None
+        if os.environ.get('CLAUDE_NOTIFIER_NO_DAEMON') != '1':
+            try:
+                from claude_notifier.hooks.client import forward_hook_event
+                result = forward_hook_event(hook_event, input_data)
+            except ImportError:
+                result = None
+            
+        # 守护进程不可用，回退到进程内处理
+        hook = None
+        pending = []
+        if result is None:
+            hook = ClaudeHook()
+            result = dispatch_hook_event(hook, hook_event, input_data)
+            pending = hook.take_pending_notifications()
         
         # 输出 JSON 响应到 stdout
         print(json.dumps(result))
         
+        # 分离投递 / 发件箱：响应已输出，在脱离的子进程中完成投递
+        if hook is not None:
+            deliver_in_background(hook, pending)
+        
     else:
         # 旧版 API：通过命令行参数（向后兼容）
+        hook = ClaudeHook()
+        
         if len(sys.argv) < 2:
             print("Usage: claude_hook.py <hook_type> [context_json]")
             print("Or set CLAUDE_HOOK_EVENT environment variable for new API")
@@ -405,6 +655,8 @@ def main():
         else:
             print(f"Unknown hook type: {hook_type}")
             sys.exit(1)
+            
+        deliver_in_background(hook, hook.take_pending_notifications())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+钩子守护进程客户端
+将 Claude Code 钩子数据通过 Unix 域套接字转发给常驻守护进程
+
+本模块只依赖标准库中的轻量模块，钩子进程在守护进程可用时
+无需加载 Notifier、渠道及配置解析等重型组件。
+"""
+
+import os
+import json
+import socket
+import logging
+from typing import Dict, Any, Optional
+
+# 默认套接字路径，可通过环境变量 CLAUDE_NOTIFIER_SOCKET 覆盖
+DEFAULT_SOCKET_PATH = '~/.claude-notifier/daemon.sock'
+
+# 连接超时（秒）：守护进程不可达时应尽快回退到进程内处理
+CONNECT_TIMEOUT = 0.2
+
+# 默认响应超时（秒），可通过环境变量 CLAUDE_NOTIFIER_DAEMON_TIMEOUT 覆盖
+DEFAULT_RESPONSE_TIMEOUT = 10.0
+
+
+class DaemonResponseError(Exception):
+    """请求已写入套接字，但未收到有效响应（连接被重置、空响应或无效 JSON）
+
+    守护进程可能已经处理了该请求，调用方不应重新执行。
+    """
+
+
+def get_socket_path() -> str:
+    """获取守护进程套接字路径"""
+    return os.path.expanduser(os.environ.get('CLAUDE_NOTIFIER_SOCKET', DEFAULT_SOCKET_PATH))
+
+
+def is_supported() -> bool:
+    """检查当前平台是否支持 Unix 域套接字"""
+    return hasattr(socket, 'AF_UNIX')
+
+
+def _get_response_timeout() -> float:
+    """获取响应超时时间"""
+    try:
+        return float(os.environ.get('CLAUDE_NOTIFIER_DAEMON_TIMEOUT', DEFAULT_RESPONSE_TIMEOUT))
+    except ValueError:
+        return DEFAULT_RESPONSE_TIMEOUT
+
+
+def request_daemon(message: Dict[str, Any],
+                   socket_path: Optional[str] = None,
+                   timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """向守护进程发送一条请求并等待响应
+
+    协议为单行 JSON 请求 + 单行 JSON 响应。
+
+    Args:
+        message: 请求内容
+        socket_path: 套接字路径，None 则使用默认路径
+        timeout: 响应超时（秒），None 则使用默认值
+
+    Returns:
+        响应字典；守护进程不可达（未启动、套接字失效、连接失败）时返回 None
+
+    Raises:
+        socket.timeout: 请求已送达但守护进程未在超时时间内响应
+        DaemonResponseError: 连接建立后请求或响应失败
+    """
+    if not is_supported():
+        return None
+
+    path = socket_path or get_socket_path()
+    if not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            # 套接字文件残留但守护进程已退出
+            return None
+
+        # 连接已建立：之后的失败都可能发生在守护进程收到请求之后
+        sock.settimeout(timeout if timeout is not None else _get_response_timeout())
+        payload = json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+        sock.sendall(payload)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b'\n'):
+                break
+
+        if not chunks:
+            raise DaemonResponseError("守护进程未返回响应")
+        return json.loads(b''.join(chunks).decode('utf-8'))
+    except socket.timeout:
+        raise
+    except (OSError, ValueError) as e:
+        raise DaemonResponseError(f"守护进程响应失败: {e}") from e
+    finally:
+        sock.close()
+
+
+def forward_hook_event(hook_event: str,
+                       payload: Dict[str, Any],
+                       socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """将钩子事件转发给守护进程
+
+    Args:
+        hook_event: 钩子事件名称 (PreToolUse/PostToolUse/Stop/...)
+        payload: 钩子 stdin JSON 数据
+        socket_path: 套接字路径，None 则使用默认路径
+
+    Returns:
+        钩子响应 (如 {"continue": true})；只有守护进程不可达（未启动、连接失败）时
+        返回 None，调用方应回退到进程内处理。守护进程已收到请求但处理失败时返回其
+        结果（默认放行），回退会重复处理事件
+    """
+    try:
+        response = request_daemon(
+            {'action': 'hook', 'event': hook_event, 'payload': payload},
+            socket_path=socket_path
+        )
+    except (socket.timeout, DaemonResponseError) as e:
+        # 请求已发给守护进程，回退会导致重复通知，直接放行
+        logging.getLogger('HookClient').warning(f"守护进程未返回有效响应: {e}")
+        return {"continue": True}
+
+    if response is None:
+        return None
+
+    if not isinstance(response, dict):
+        response = {'ok': False, 'error': f'无效的响应: {response!r}'}
+    if not response.get('ok'):
+        logging.getLogger('HookClient').warning(f"守护进程处理钩子事件失败: {response.get('error')}")
+
+    result = response.get('result')
+    return result if isinstance(result, dict) else {"continue": True}
+
+
+def ping_daemon(socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """检查守护进程是否存活
+
+    Returns:
+        守护进程状态信息，不可用时返回 None
+    """
+    try:
+        response = request_daemon({'action': 'ping'}, socket_path=socket_path, timeout=2.0)
+    except (socket.timeout, DaemonResponseError):
+        return None
+
+    if response and response.get('ok'):
+        return response
+    return None
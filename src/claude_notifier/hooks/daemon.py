@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+常驻通知守护进程
+保持 Notifier、渠道及智能组件常驻内存，通过 Unix 域套接字接收钩子事件
+
+钩子进程 (claude_hook.py) 检测到守护进程后只需转发 stdin JSON，
+无需在每次 PreToolUse 时重新导入包、解析配置和初始化渠道。
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import logging
+import threading
+import socketserver
+from typing import Dict, Any, Optional
+
+from .client import get_socket_path, is_supported
+from .claude_hook import ClaudeHook, dispatch_hook_event
+
+# 单次请求最大字节数
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """守护进程请求处理器 - 单行 JSON 请求/响应"""
+
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_SIZE)
+        if not line:
+            return
+
+        try:
+            request = json.loads(line.decode('utf-8'))
+            response = self.server.notifier_daemon.handle_request(request)
+        except ValueError:
+            response = {'ok': False, 'error': '无效的请求格式'}
+
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+if is_supported():
+    class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+        """Unix 域套接字服务器"""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, notifier_daemon: 'NotifierDaemon'):
+            self.notifier_daemon = notifier_daemon
+            super().__init__(socket_path, _DaemonRequestHandler)
+else:
+    _DaemonServer = None
+
+
+class NotifierDaemon:
+    """常驻通知守护进程"""
+
+    def __init__(self, socket_path: Optional[str] = None, config_path: Optional[str] = None):
+        """初始化守护进程
+
+        Args:
+            socket_path: 套接字路径，默认 ~/.claude-notifier/daemon.sock
+            config_path: 配置文件路径，默认 ~/.claude-notifier/config.yaml
+        """
+        self.socket_path = socket_path or get_socket_path()
+        self.pid_file = os.path.join(os.path.dirname(self.socket_path), 'daemon.pid')
+        self.config_path = config_path
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.hook: Optional[ClaudeHook] = None
+        self.started_at: Optional[float] = None
+        self._server = None
+        # ClaudeHook 状态非线程安全，钩子事件串行处理
+        self._hook_lock = threading.Lock()
+        # 分离投递队列：钩子响应先返回，通知由工作线程发送
+        self._delivery_queue: 'queue.Queue' = queue.Queue()
+        self._delivery_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'requests': 0,
+            'hook_events': 0,
+            'detached_deliveries': 0,
+            'errors': 0
+        }
+
+    def _create_notifier(self) -> Optional[Any]:
+        """创建常驻通知器 (优先使用智能通知器)"""
+        try:
+            from claude_notifier.intelligence.coordinator import IntelligentNotifier
+            return IntelligentNotifier(self.config_path, start_worker=True)
+        except ImportError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"智能通知器初始化失败: {e}，使用基础通知器")
+
+        try:
+            from claude_notifier.core.notifier import Notifier
+            return Notifier(self.config_path, start_worker=True)
+        except Exception as e:
+            self.logger.error(f"通知器初始化失败: {e}")
+            return None
+
+    def load(self):
+        """加载 (或重新加载) 常驻组件"""
+        notifier = self._create_notifier()
+        with self._hook_lock:
+            previous = self.hook
+            self.hook = ClaudeHook(notifier=notifier)
+        self.logger.info(f"守护进程组件已加载 - 模式: {self.hook.mode}")
+
+        if previous is not None and previous.notifier is not None:
+            if self._delivery_thread is not None:
+                # 已排队的分离投递仍使用旧通知器，投递完成后再关闭
+                self._delivery_queue.put((previous, None))
+            else:
+                self._retire_notifier(previous.notifier)
+
+    def _retire_notifier(self, notifier: Any):
+        """关闭被替换的通知器：停止其发件箱投递线程和分发线程，避免与新通知器并行运行"""
+        close = getattr(notifier, 'close', None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            self.logger.error(f"关闭旧通知器失败: {e}")
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """处理单个请求
+
+        Args:
+            request: 请求字典，action 可为 hook/ping/reload/shutdown
+
+        Returns:
+            响应字典
+        """
+        self.stats['requests'] += 1
+        action = request.get('action', '') if isinstance(request, dict) else ''
+
+        try:
+            if action == 'hook':
+                return {'ok': True, 'result': self._handle_hook(request)}
+            elif action == 'ping':
+                return {'ok': True, **self.get_status()}
+            elif action == 'reload':
+                self.load()
+                return {'ok': True}
+            elif action == 'shutdown':
+                threading.Thread(target=self.shutdown, daemon=True).start()
+                return {'ok': True}
+            else:
+                return {'ok': False, 'error': f'未知的请求类型: {action}'}
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.logger.error(f"守护进程请求处理失败: {e}")
+            return {'ok': False, 'error': str(e)}
+
+    def _handle_hook(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """处理钩子事件"""
+        if self.hook is None:
+            self.load()
+
+        hook_event = request.get('event', '')
+        payload = request.get('payload') or {}
+
+        with self._hook_lock:
+            # 与回退到进程内处理的钩子进程共享状态文件
+            self.hook.load_state()
+            result = dispatch_hook_event(self.hook, hook_event, payload)
+            pending = self.hook.take_pending_notifications()
+
+        if pending:
+            self._delivery_queue.put((self.hook, pending))
+
+        self.stats['hook_events'] += 1
+        return result
+
+    def _delivery_worker(self):
+        """分离投递工作线程"""
+        while True:
+            item = self._delivery_queue.get()
+            if item is None:
+                break
+
+            hook, notifications = item
+            if notifications is None:
+                self._retire_notifier(hook.notifier)
+                continue
+
+            hook.deliver_notifications(notifications)
+            self.stats['detached_deliveries'] += len(notifications)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取守护进程状态"""
+        return {
+            'pid': os.getpid(),
+            'socket': self.socket_path,
+            'uptime': time.time() - self.started_at if self.started_at else 0,
+            'mode': self.hook.mode if self.hook else None,
+            'detached': self.hook.detached if self.hook else False,
+            'pending_deliveries': self._delivery_queue.qsize(),
+            'stats': self.stats.copy()
+        }
+
+    def start(self):
+        """绑定套接字并写入 PID 文件"""
+        if _DaemonServer is None:
+            raise RuntimeError("当前平台不支持 Unix 域套接字，无法启动守护进程")
+
+        from .client import ping_daemon
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if ping_daemon(self.socket_path):
+                raise RuntimeError(f"守护进程已在运行: {self.socket_path}")
+            # 清理上次异常退出残留的套接字
+            os.unlink(self.socket_path)
+
+        if self.hook is None:
+            self.load()
+
+        self._server = _DaemonServer(self.socket_path, self)
+        os.chmod(self.socket_path, 0o600)
+
+        with open(self.pid_file, 'w') as f:
+            f.write(str(os.getpid()))
+
+        self._delivery_thread = threading.Thread(target=self._delivery_worker, daemon=True)
+        self._delivery_thread.start()
+
+        self.started_at = time.time()
+        self.logger.info(f"守护进程已启动: {self.socket_path} (PID {os.getpid()})")
+
+    def serve_forever(self):
+        """启动并持续处理请求，直到 shutdown() 被调用"""
+        if self._server is None:
+            self.start()
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._cleanup()
+
+    def shutdown(self):
+        """停止守护进程"""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _cleanup(self):
+        """关闭服务器并清理套接字和 PID 文件"""
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+
+        # 发送完队列中剩余的通知后退出
+        if self._delivery_thread is not None:
+            self._delivery_queue.put(None)
+            self._delivery_thread.join(timeout=30)
+            self._delivery_thread = None
+
+        for path in (self.socket_path, self.pid_file):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+        self.logger.info("守护进程已停止")
+
+
+def run_daemon(socket_path: Optional[str] = None, config_path: Optional[str] = None):
+    """在前台运行守护进程 (收到 SIGTERM/SIGINT 时退出)"""
+    daemon = NotifierDaemon(socket_path, config_path)
+    daemon.start()
+
+    def _handle_signal(signum, frame):
+        # shutdown() 会等待 serve_forever 退出，不能在主线程中直接调用
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    daemon.serve_forever()
+
+
+def main():
+    """命令行入口: python -m claude_notifier.hooks.daemon [--socket PATH] [--config PATH]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Claude Notifier 常驻守护进程')
+    parser.add_argument('--socket', help='Unix 域套接字路径')
+    parser.add_argument('--config', help='配置文件路径')
+    args = parser.parse_args()
+
+    try:
+        run_daemon(args.socket, args.config)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
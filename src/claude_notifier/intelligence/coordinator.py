@@ -7,7 +7,9 @@
 """
 
 import time
+import asyncio
 import logging
+import functools
 from typing import Dict, Any, List, Optional, Tuple, Union
 
 from claude_notifier.core.notifier import Notifier
@@ -16,9 +18,10 @@ from claude_notifier.utils.helpers import merge_dict_recursive
 # 智能模块导入 (延迟导入，避免依赖问题)
 try:
     from claude_notifier.utils.operation_gate import OperationGate, OperationRequest, OperationResult
-    from claude_notifier.utils.notification_throttle import NotificationThrottle, NotificationRequest, ThrottleAction
-    from claude_notifier.utils.message_grouper import MessageGrouper, GroupingStrategy
+    from claude_notifier.utils.notification_throttle import NotificationThrottle, NotificationRequest, NotificationPriority, ThrottleAction
+    from claude_notifier.utils.message_grouper import MessageGrouper, MessageGroup, GroupingStrategy
     from claude_notifier.utils.cooldown_manager import CooldownManager
+    from claude_notifier.utils.delayed_dispatcher import DelayedNotificationDispatcher, GroupFlushDispatcher
     INTELLIGENCE_AVAILABLE = True
 except ImportError:
     INTELLIGENCE_AVAILABLE = False
@@ -32,14 +35,14 @@ except ImportError:
 class IntelligentNotifier(Notifier):
     """智能通知器 - 集成所有智能功能的完整版本"""
     
-    def __init__(self, config_path: Optional[str] = None):
-        """初始化智能通知器"""
+    def __init__(self, config_path: Optional[str] = None, start_worker: bool = False):
+        """初始化智能通知器（参数同 Notifier）"""
         if not INTELLIGENCE_AVAILABLE:
             raise ImportError(
                 "智能功能模块未安装。请运行: pip install claude-notifier[intelligence]"
             )
             
-        super().__init__(config_path)
+        super().__init__(config_path, start_worker=start_worker)
         
         # 智能功能开关
         self.intelligence_config = self.config.get('intelligent_limiting', {})
@@ -65,17 +68,31 @@ class IntelligentNotifier(Notifier):
             # 通知频率控制器
             if self.intelligence_config.get('notification_throttle', {}).get('enabled', True):
                 self.notification_throttle = NotificationThrottle(self.config)
+                # 延迟通知由分发线程按时发送
+                self.delayed_dispatcher = DelayedNotificationDispatcher(
+                    self.notification_throttle, self._intelligent_send
+                )
+                if self.notification_throttle.next_delayed_at() is not None:
+                    # 共享队列中有其他进程留下的延迟通知
+                    self.delayed_dispatcher.wake()
                 self.logger.info("✅ 通知频率控制已启用")
             else:
                 self.notification_throttle = None
+                self.delayed_dispatcher = None
                 
             # 消息分组器
             grouping_config = self.intelligence_config.get('message_grouper', {})
             if grouping_config.get('enabled', True):
                 self.message_grouper = MessageGrouper(self.config)
+                # 分组在超时或达到发送条件时由分发线程合并发送
+                self.group_dispatcher = GroupFlushDispatcher(self.message_grouper, self._send_group)
+                if self.message_grouper.next_flush_at() is not None:
+                    # 持久化的分组来自之前的进程
+                    self.group_dispatcher.wake()
                 self.logger.info("✅ 消息分组功能已启用")
             else:
                 self.message_grouper = None
+                self.group_dispatcher = None
                 
             # 冷却管理器
             cooldown_config = self.intelligence_config.get('cooldown_manager', {})
@@ -102,12 +119,74 @@ class IntelligentNotifier(Notifier):
         if not self.intelligence_enabled:
             return super().send(message, channels, event_type, **kwargs)
             
+        handled, notification_request = self._apply_intelligence(
+            message, channels, event_type, operation_context, **kwargs
+        )
+        if notification_request is None:
+            return handled
+            
+        # 6. 正常发送
+        return self._intelligent_send(notification_request)
+        
+    async def asend(self,
+                    message: Union[str, Dict[str, Any]],
+                    channels: Optional[List[str]] = None,
+                    event_type: str = 'custom',
+                    operation_context: Optional[Dict[str, Any]] = None,
+                    **kwargs) -> bool:
+        """智能异步发送通知 - send() 的原生 asyncio 版本
+        
+        只使用进程内状态时智能判断直接在事件循环中执行；启用持久化后限流、分组和
+        使用量检查会执行阻塞的 SQLite 事务（等待其他进程释放锁），改在线程池中执行。
+        最终发送不阻塞事件循环。
+        """
+        if not self.intelligence_enabled:
+            return await super().asend(message, channels, event_type, **kwargs)
+            
+        if self._uses_shared_state():
+            handled, notification_request = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(
+                    self._apply_intelligence, message, channels, event_type, operation_context, **kwargs
+                )
+            )
+        else:
+            handled, notification_request = self._apply_intelligence(
+                message, channels, event_type, operation_context, **kwargs
+            )
+        if notification_request is None:
+            return handled
+            
+        return await self._aintelligent_send(notification_request)
+        
+    def _uses_shared_state(self) -> bool:
+        """智能组件是否使用跨进程共享的 SQLite 存储"""
+        throttle = getattr(self, 'notification_throttle', None)
+        grouper = getattr(self, 'message_grouper', None)
+        gate = getattr(self, 'operation_gate', None)
+        return bool(
+            (throttle is not None and throttle.shared)
+            or (grouper is not None and grouper.store is not None)
+            or (gate is not None and gate.rate_tracker.store is not None)
+        )
+        
+    def _apply_intelligence(self,
+                            message: Union[str, Dict[str, Any]],
+                            channels: Optional[List[str]],
+                            event_type: str,
+                            operation_context: Optional[Dict[str, Any]],
+                            **kwargs) -> Tuple[bool, Optional['NotificationRequest']]:
+        """执行智能判断 (操作门、冷却、限流、分组)
+        
+        Returns:
+            (结果, 通知请求)：通知请求为 None 表示已被拦截/延迟/分组，
+            直接返回结果；否则需要正常发送该请求
+        """
         # 1. 操作检查 (如果提供了操作上下文)
         if operation_context and self.operation_gate:
             operation_result = self._check_operation_gate(operation_context)
             if operation_result[0] != OperationResult.ALLOWED:
                 self.logger.warning(f"操作被阻止: {operation_result[1]}")
-                return False
+                return False, None
                 
         # 2. 冷却检查
         if self.cooldown_manager:
@@ -124,7 +203,7 @@ class IntelligentNotifier(Notifier):
                 self.logger.info(f"触发冷却机制: {reason}")
                 if remaining:
                     self.logger.info(f"冷却剩余时间: {remaining:.1f}秒")
-                return False
+                return False, None
                 
         # 3. 准备通知请求
         notification_request = self._prepare_notification_request(
@@ -139,26 +218,25 @@ class IntelligentNotifier(Notifier):
             
             if throttle_result[0] == ThrottleAction.BLOCK:
                 self.logger.info(f"通知被限流阻止: {throttle_result[1]}")
-                return False
+                return False, None
             elif throttle_result[0] == ThrottleAction.DELAY:
                 self.logger.info(f"通知延迟发送: {throttle_result[1]}")
                 self.notification_throttle.add_delayed_notification(
                     notification_request, throttle_result[2]
                 )
-                return True  # 延迟发送也算成功
+                self.delayed_dispatcher.wake()
+                return True, None  # 延迟发送也算成功
             elif throttle_result[0] == ThrottleAction.MERGE:
                 # 消息合并逻辑
-                return self._handle_message_merge(notification_request)
+                return self._handle_message_merge(notification_request), None
                 
-        # 5. 消息分组 (如果启用)
-        if self.message_grouper:
-            group_result = self.message_grouper.should_group_message(notification_request)
-            if group_result[0]:  # 需要分组
-                self.logger.info(f"消息已分组: {group_result[1]}")
-                return True  # 分组处理也算成功
+        # 5. 消息分组 (如果启用)：高优先级通知立即发送，不等待分组超时
+        if self.message_grouper and notification_request.priority.value < NotificationPriority.HIGH.value:
+            if self._handle_message_merge(notification_request):
+                self.logger.info(f"消息已分组: {notification_request.notification_id}")
+                return True, None  # 分组处理也算成功
                 
-        # 6. 正常发送
-        return self._intelligent_send(notification_request)
+        return True, notification_request
         
     def _check_operation_gate(self, operation_context: Dict[str, Any]) -> Tuple[OperationResult, str]:
         """检查操作门控制"""
@@ -210,8 +288,17 @@ class IntelligentNotifier(Notifier):
         if not self.message_grouper:
             return False
             
-        # 将消息添加到分组中
-        self.message_grouper.add_message(notification_request)
+        # 将消息添加到分组中，分组器按消息字典处理
+        message = {
+            **notification_request.content,
+            'event_type': notification_request.event_type,
+            'channel': notification_request.channel,
+            'priority': notification_request.priority.value
+        }
+        if not self.message_grouper.add_message(message):
+            return False
+            
+        self.group_dispatcher.wake()
         return True
         
     def _intelligent_send(self, notification_request: 'NotificationRequest') -> bool:
@@ -226,25 +313,61 @@ class IntelligentNotifier(Notifier):
             notification_request.event_type
         )
         
+    async def _aintelligent_send(self, notification_request: 'NotificationRequest') -> bool:
+        """智能异步发送通知"""
+        template_data = notification_request.content
+        channels = [notification_request.channel] if notification_request.channel != 'default' else None
+        
+        return await super().asend(
+            template_data,
+            channels,
+            notification_request.event_type
+        )
+        
     def process_delayed_notifications(self):
-        """处理延迟通知队列"""
+        """立即处理延迟通知队列中已到期的通知（分发线程会自动按时处理）"""
         if not self.notification_throttle:
             return
             
-        ready_notifications = self.notification_throttle.get_ready_notifications()
-        for notification in ready_notifications:
-            self._intelligent_send(notification)
+        self.delayed_dispatcher.dispatch_ready()
             
     def process_grouped_messages(self):
-        """处理分组消息"""
+        """立即发送已到期的分组（分发线程会自动按时处理）"""
         if not self.message_grouper:
             return
             
-        ready_groups = self.message_grouper.get_ready_groups()
-        for group in ready_groups:
-            # 发送合并后的消息
-            merged_content = self.message_grouper.merge_messages(group['messages'])
-            super().send(merged_content, event_type='grouped_notification')
+        self.group_dispatcher.dispatch_ready()
+        
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """发送延迟通知和分组中可在截止时间前发送的部分，再完成渠道的后台重试"""
+        deadline = time.time() + timeout if timeout is not None else None
+        for dispatcher in (getattr(self, 'delayed_dispatcher', None), getattr(self, 'group_dispatcher', None)):
+            if dispatcher is not None:
+                dispatcher.drain(None if deadline is None else max(0.0, deadline - time.time()))
+        return super().drain(None if deadline is None else max(0.0, deadline - time.time()))
+            
+    def close(self):
+        """停止发件箱投递线程，发送分发线程中剩余的延迟通知和分组后关闭"""
+        if self.outbox_worker is not None:
+            self.outbox_worker.stop()
+        for dispatcher in (getattr(self, 'delayed_dispatcher', None), getattr(self, 'group_dispatcher', None)):
+            if dispatcher is not None:
+                dispatcher.drain()
+        super().close()
+        
+    def _send_group(self, group: 'MessageGroup') -> bool:
+        """发送一个分组：单条消息原样发送，多条消息合并发送"""
+        if len(group.messages) == 1:
+            message = group.messages[0]
+            channel = message.get('channel', 'default')
+            return super().send(
+                message,
+                [channel] if channel != 'default' else None,
+                message.get('event_type', 'custom')
+            )
+            
+        merged_content = self.message_grouper.merge_group_messages(group)
+        return super().send(merged_content, event_type='grouped_notification')
             
     def get_intelligence_status(self) -> Dict[str, Any]:
         """获取智能功能状态"""
@@ -265,12 +388,14 @@ class IntelligentNotifier(Notifier):
         # 通知限流状态
         if self.notification_throttle:
             status['components']['notification_throttle'] = self.notification_throttle.get_throttle_stats()
+            status['components']['notification_throttle']['dispatcher'] = self.delayed_dispatcher.get_status()
         else:
             status['components']['notification_throttle'] = {'enabled': False}
             
         # 消息分组状态
         if self.message_grouper:
             status['components']['message_grouper'] = self.message_grouper.get_grouper_status()
+            status['components']['message_grouper']['dispatcher'] = self.group_dispatcher.get_status()
         else:
             status['components']['message_grouper'] = {'enabled': False}
             
@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from claude_notifier.events.base import BaseEvent
+from claude_notifier.events.context import HookContext
 from claude_notifier.events.builtin import (
     SensitiveOperationEvent, TaskCompletionEvent, RateLimitEvent,
     ConfirmationRequiredEvent, SessionStartEvent, ErrorOccurredEvent
@@ -24,6 +25,10 @@ class EventManager:
         self.template_engine = TemplateEngine()
         self.logger = logging.getLogger(self.__class__.__name__)
         
+        # 分发索引: (钩子事件, 工具名) -> 候选事件，事件集合变化时重建
+        self._dispatch_table: Dict[Tuple[Optional[str], Optional[str]], List[BaseEvent]] = {}
+        self._dispatch_signature: Optional[Tuple] = None
+        
         # 注册内置事件
         self._register_builtin_events()
         
@@ -32,8 +37,10 @@ class EventManager:
         
     def _register_builtin_events(self):
         """注册内置事件"""
+        # 配置中的附加敏感模式与内置模式一起编译
+        sensitive_config = self.config.get('events', {}).get('sensitive_operation', {})
         builtin_events = [
-            SensitiveOperationEvent(),
+            SensitiveOperationEvent(sensitive_config.get('patterns', [])),
             TaskCompletionEvent(),
             RateLimitEvent(),
             ConfirmationRequiredEvent(),
@@ -60,12 +67,35 @@ class EventManager:
         # 默认启用，除非明确禁用
         return event_config.get('enabled', True)
         
+    def _candidate_events(self, context: Dict[str, Any]) -> List[BaseEvent]:
+        """按钩子事件和工具名查找可能触发的事件（内置事件在前，保持注册顺序）"""
+        signature = (tuple(self.events), self.custom_registry.version)
+        if signature != self._dispatch_signature:
+            self._dispatch_table = {}
+            self._dispatch_signature = signature
+            
+        hook_event = context.get('hook_event')
+        tool_name = context.get('tool_name')
+        key = (hook_event if isinstance(hook_event, str) else None,
+               tool_name if isinstance(tool_name, str) else None)
+        
+        candidates = self._dispatch_table.get(key)
+        if candidates is None:
+            all_events = self.events + list(self.custom_registry.events.values())
+            candidates = [event for event in all_events if event.applies_to(*key)]
+            self._dispatch_table[key] = candidates
+        return candidates
+        
     def process_context(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """处理上下文，返回触发的事件数据"""
+        """处理上下文，返回触发的事件数据
+        
+        只评估适用范围包含当前钩子事件和工具名的事件，候选列表按 (钩子事件, 工具名) 缓存。
+        上下文包装为 HookContext，工具输入解析、项目名称等只计算一次，由所有事件共享。
+        """
+        context = HookContext.wrap(context)
         triggered_events = []
         
-        # 处理内置事件
-        for event in self.events:
+        for event in self._candidate_events(context):
             if not self._is_event_enabled(event.event_id):
                 continue
                 
@@ -80,24 +110,6 @@ class EventManager:
                     event_data['channels'] = self._get_event_channels(event.event_id)
                     triggered_events.append(event_data)
                 
-        # 处理自定义事件
-        for event_id in self.custom_registry.list_events():
-            if not self._is_event_enabled(event_id):
-                continue
-                
-            custom_event = self.custom_registry.get_event(event_id)
-            if custom_event:
-                event_data = custom_event.trigger(context)
-                if event_data:
-                    # 渲染模板
-                    template_name = self._get_event_template(event_id)
-                    rendered_data = self.template_engine.render_template(template_name, event_data)
-                    
-                    if rendered_data:
-                        event_data['rendered'] = rendered_data
-                        event_data['channels'] = self._get_event_channels(event_id)
-                        triggered_events.append(event_data)
-                
         return triggered_events
         
     def _get_event_channels(self, event_id: str) -> List[str]:
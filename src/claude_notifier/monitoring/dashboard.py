@@ -17,6 +17,7 @@ from enum import Enum
 from .statistics import StatisticsManager
 from .health_check import HealthChecker, HealthStatus
 from .performance import PerformanceMonitor, PerformanceLevel
+from ..core.channels.circuit_breaker import CircuitState, DEFAULT_BREAKER_CONFIG, get_circuit_breaker_states
 
 
 class DashboardMode(Enum):
@@ -222,6 +223,11 @@ class MonitoringDashboard:
             except Exception as e:
                 self.logger.error(f"获取统计数据失败: {e}")
                 
+        # 收集渠道熔断状态（包括其他进程写入共享存储的状态）
+        circuit_data = get_circuit_breaker_states(
+            self.config.get('circuit_breaker_store', DEFAULT_BREAKER_CONFIG['persistence']['path'])
+        )
+        
         # 确定整体状态
         overall_status = self._determine_overall_status(health_status, performance_status)
         
@@ -249,6 +255,17 @@ class MonitoringDashboard:
                     'component': 'health_check'
                 })
                 
+        # 渠道熔断报警
+        for channel_name, breaker in circuit_data.items():
+            if breaker['state'] != CircuitState.CLOSED:
+                all_alerts.append({
+                    'type': 'channel',
+                    'level': 'warning',
+                    'message': f"渠道 {channel_name} 已熔断 (连续失败 {breaker['consecutive_failures']} 次)",
+                    'timestamp': time.time(),
+                    'component': 'circuit_breaker'
+                })
+                
         # 性能监控报警
         all_alerts.extend([{
             **alert,
@@ -269,7 +286,8 @@ class MonitoringDashboard:
             components={
                 'health': health_data,
                 'performance': performance_data,
-                'statistics': statistics_data
+                'statistics': statistics_data,
+                'circuit_breakers': circuit_data
             },
             alerts=all_alerts,
             metrics=self._collect_key_metrics()
@@ -395,6 +413,11 @@ class MonitoringDashboard:
         lines.append(f"⚡ 性能状态: {status.performance_status}")
         lines.append(f"📈 统计功能: {'可用' if status.statistics_available else '不可用'}")
         
+        breakers = status.components.get('circuit_breakers', {})
+        if breakers:
+            open_count = sum(1 for breaker in breakers.values() if breaker['state'] != CircuitState.CLOSED)
+            lines.append(f"🔌 渠道熔断: {open_count}/{len(breakers)}")
+        
         last_update = datetime.fromtimestamp(status.last_update)
         lines.append(f"🕐 最后更新: {last_update.strftime('%Y-%m-%d %H:%M:%S')}")
         lines.append("")
@@ -477,6 +500,21 @@ class MonitoringDashboard:
                 lines.append(f"    {level_icon} {metric_name}: {metric_data['value']}{metric_data['unit']}")
             lines.append("")
             
+        # 渠道熔断详情
+        if status.components.get('circuit_breakers'):
+            lines.append("🔌 渠道熔断状态:")
+            for channel_name, breaker in status.components['circuit_breakers'].items():
+                icon = {
+                    CircuitState.CLOSED: '🟢',
+                    CircuitState.HALF_OPEN: '🟡',
+                    CircuitState.OPEN: '🔴'
+                }.get(breaker['state'], '⚪')
+                detail = f"连续失败 {breaker['consecutive_failures']}/{breaker['failure_threshold']}"
+                if breaker.get('retry_in') is not None:
+                    detail += f", {breaker['retry_in']:.0f}秒后探测"
+                lines.append(f"    {icon} {channel_name}: {breaker['state']} ({detail})")
+            lines.append("")
+            
         # 统计数据详情
         if status.components.get('statistics'):
             stats_data = status.components['statistics']
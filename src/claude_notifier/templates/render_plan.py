@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模板渲染计划
+模板在加载时编译为渲染计划：每段文本按 string.Template 的占位符语法预先切分为字面量和
+占位符片段，并记录引用的字段。渲染时按片段查找数据后一次拼接，不再为标题、内容和每个
+字段、按钮文本构造 Template 对象并重新解析。
+"""
+
+from string import Template
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+# 与 Template.safe_substitute 使用同一个占位符正则，解析结果完全一致
+_PLACEHOLDER = Template.pattern
+
+# 片段：字面量字符串，或 (字段名, 缺失时保留的原文)
+Segment = Union[str, Tuple[str, str]]
+
+
+class TextPlan:
+    """单段文本的渲染计划，结果与 Template(text).safe_substitute(data) 相同"""
+
+    __slots__ = ('segments', 'fields', 'constant')
+
+    def __init__(self, text: str):
+        if not isinstance(text, str):
+            raise TypeError(f"模板文本必须是字符串: {text!r}")
+
+        segments: List[Segment] = []
+        fields: List[str] = []
+        literal: List[str] = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+
+            named = match.group('named') or match.group('braced')
+            if named is None:
+                # $$ 转义为 $，无效的 $ 原样保留
+                literal.append(Template.delimiter if match.group('escaped') is not None else match.group())
+                continue
+
+            if literal:
+                segments.append(''.join(literal))
+                literal = []
+            segments.append((named, match.group()))
+            fields.append(named)
+
+        literal.append(text[position:])
+        if ''.join(literal):
+            segments.append(''.join(literal))
+
+        self.segments = tuple(segments)
+        self.fields = tuple(dict.fromkeys(fields))
+        # 不含占位符的文本直接返回
+        self.constant: Optional[str] = ''.join(segments) if not fields else None
+
+    def render(self, data: Dict[str, Any]) -> str:
+        """按数据渲染，缺失的字段保留占位符原文"""
+        if self.constant is not None:
+            return self.constant
+        return ''.join([
+            segment if segment.__class__ is str
+            else (str(data[segment[0]]) if segment[0] in data else segment[1])
+            for segment in self.segments
+        ])
+
+
+class RenderPlan:
+    """整个模板的渲染计划，输出结构与 TemplateEngine 的渲染结果一致"""
+
+    # 原样复制的属性
+    PASSTHROUGH_KEYS = ('color', 'image', 'thumbnail')
+
+    def __init__(self, template: Dict[str, Any]):
+        """编译模板，模板结构无效时抛出 TypeError"""
+        self.title = TextPlan(template['title']) if 'title' in template else None
+        self.content = TextPlan(template['content']) if 'content' in template else None
+
+        # 字段: (标签计划, 值计划, 是否有 short, short)
+        self.fields: Optional[List[Tuple[Optional[TextPlan], Optional[TextPlan], bool, Any]]] = None
+        if 'fields' in template:
+            self.fields = [
+                (TextPlan(field['label']) if 'label' in field else None,
+                 TextPlan(field['value']) if 'value' in field else None,
+                 'short' in field,
+                 field.get('short'))
+                for field in self._entries(template['fields'], 'fields')
+            ]
+
+        # 按钮: (原始配置, 文本计划, 链接计划)
+        self.actions: Optional[List[Tuple[Dict[str, Any], Optional[TextPlan], Optional[TextPlan]]]] = None
+        if 'actions' in template:
+            self.actions = [
+                (action,
+                 TextPlan(action['text']) if 'text' in action else None,
+                 TextPlan(action['url']) if 'url' in action else None)
+                for action in self._entries(template['actions'], 'actions')
+            ]
+
+        self.passthrough = {key: template[key] for key in self.PASSTHROUGH_KEYS if key in template}
+
+        # 模板引用的全部字段
+        plans = [self.title, self.content]
+        plans += [plan for field in self.fields or [] for plan in field[:2]]
+        plans += [plan for action in self.actions or [] for plan in action[1:]]
+        self.placeholders = tuple(dict.fromkeys(name for plan in plans if plan for name in plan.fields))
+
+    @staticmethod
+    def _entries(entries: Any, name: str) -> List[Dict[str, Any]]:
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise TypeError(f"{name} 必须是对象数组")
+        return entries
+
+    def render(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """渲染模板"""
+        rendered: Dict[str, Any] = {}
+
+        if self.title is not None:
+            rendered['title'] = self.title.render(data)
+        if self.content is not None:
+            rendered['content'] = self.content.render(data)
+
+        if self.fields is not None:
+            rendered_fields = []
+            for label, value, has_short, short in self.fields:
+                rendered_field = {}
+                if label is not None:
+                    rendered_field['label'] = label.render(data)
+                if value is not None:
+                    rendered_field['value'] = value.render(data)
+                if has_short:
+                    rendered_field['short'] = short
+                rendered_fields.append(rendered_field)
+            rendered['fields'] = rendered_fields
+
+        if self.actions is not None:
+            rendered_actions = []
+            for action, text, url in self.actions:
+                rendered_action = action.copy()
+                if text is not None:
+                    rendered_action['text'] = text.render(data)
+                if url is not None:
+                    rendered_action['url'] = url.render(data)
+                rendered_actions.append(rendered_action)
+            rendered['actions'] = rendered_actions
+
+        rendered.update(self.passthrough)
+        return rendered
@@ -5,16 +5,19 @@ import os
 import json
 import yaml
 import logging
-from typing import Dict, Any, Optional, List
-from string import Template
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
+from .render_plan import RenderPlan
+
 class TemplateEngine:
     """通知模板引擎"""
     
     def __init__(self, template_dir: Optional[str] = None):
         self.template_dir = template_dir or os.path.expanduser('~/.claude-notifier/templates')
         self.templates: Dict[str, Dict[str, Any]] = {}
+        # 编译后的渲染计划: 模板名 -> (模板配置, 渲染计划)，所有事件共用
+        self._plans: Dict[str, Tuple[Dict[str, Any], RenderPlan]] = {}
         self.logger = logging.getLogger(self.__class__.__name__)
         
         # 确保模板目录存在
@@ -26,6 +29,10 @@ class TemplateEngine:
         # 加载用户自定义模板
         self._load_user_templates()
         
+        # 加载时编译所有模板
+        for template_name in self.templates:
+            self.get_render_plan(template_name)
+        
     def _load_default_templates(self):
         """加载默认模板"""
         default_templates = {
@@ -137,55 +144,42 @@ class TemplateEngine:
         """获取模板"""
         return self.templates.get(template_name)
         
+    def get_render_plan(self, template_name: str) -> Optional[RenderPlan]:
+        """获取模板的渲染计划
+        
+        模板配置被替换（创建、更新、导入）后重新编译；原地修改模板字典不会被察觉。
+        模板不存在或结构无效时返回 None。
+        """
+        template = self.templates.get(template_name)
+        if template is None:
+            return None
+            
+        cached = self._plans.get(template_name)
+        if cached is not None and cached[0] is template:
+            return cached[1]
+            
+        try:
+            plan = RenderPlan(template)
+        except Exception as e:
+            self.logger.error(f"编译模板失败 {template_name}: {e}")
+            self._plans.pop(template_name, None)
+            return None
+            
+        self._plans[template_name] = (template, plan)
+        return plan
+        
     def render_template(self, template_name: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """渲染模板"""
-        template = self.get_template(template_name)
-        if not template:
+        if not self.get_template(template_name):
             self.logger.warning(f"模板不存在: {template_name}")
             return None
             
-        try:
-            rendered = {}
-            
-            # 渲染标题
-            if 'title' in template:
-                rendered['title'] = Template(template['title']).safe_substitute(data)
-                
-            # 渲染内容
-            if 'content' in template:
-                rendered['content'] = Template(template['content']).safe_substitute(data)
-                
-            # 渲染字段
-            if 'fields' in template:
-                rendered['fields'] = []
-                for field in template['fields']:
-                    rendered_field = {}
-                    if 'label' in field:
-                        rendered_field['label'] = Template(field['label']).safe_substitute(data)
-                    if 'value' in field:
-                        rendered_field['value'] = Template(field['value']).safe_substitute(data)
-                    if 'short' in field:
-                        rendered_field['short'] = field['short']
-                    rendered['fields'].append(rendered_field)
-                    
-            # 渲染动作按钮
-            if 'actions' in template:
-                rendered['actions'] = []
-                for action in template['actions']:
-                    rendered_action = action.copy()
-                    if 'text' in action:
-                        rendered_action['text'] = Template(action['text']).safe_substitute(data)
-                    if 'url' in action:
-                        rendered_action['url'] = Template(action['url']).safe_substitute(data)
-                    rendered['actions'].append(rendered_action)
-                    
-            # 复制其他属性
-            for key in ['color', 'image', 'thumbnail']:
-                if key in template:
-                    rendered[key] = template[key]
-                    
-            return rendered
+        plan = self.get_render_plan(template_name)
+        if plan is None:
+            return None
             
+        try:
+            return plan.render(data)
         except Exception as e:
             self.logger.error(f"渲染模板失败 {template_name}: {e}")
             return None
@@ -234,6 +228,7 @@ class TemplateEngine:
             
         try:
             del self.templates[template_name]
+            self._plans.pop(template_name, None)
             
             # 删除文件
             template_file = Path(self.template_dir) / f"{template_name}.yaml"
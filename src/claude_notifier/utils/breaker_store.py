@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+渠道熔断状态持久化
+每次钩子调用都是新进程，进程内的熔断器无法累积到失败阈值。开启持久化后各渠道的
+熔断状态保存在 SQLite 中，所有钩子进程、守护进程和监控仪表板看到同一份状态。
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from .throttle_store import SQLiteStateStore
+
+
+class SQLiteBreakerStore(SQLiteStateStore):
+    """SQLite 共享熔断状态"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS circuit_breakers (
+            name TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            failures INTEGER NOT NULL,
+            opened_at REAL NOT NULL,
+            probe_started_at REAL NOT NULL,
+            failure_threshold INTEGER NOT NULL,
+            recovery_timeout REAL NOT NULL,
+            opened INTEGER NOT NULL DEFAULT 0
+        );
+    """
+
+    def __init__(self, path: str = '~/.claude-notifier/circuit.db'):
+        """初始化熔断状态存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        super().__init__(path)
+
+    def load(self, name: str) -> Optional[Tuple[str, int, float, float]]:
+        """加载渠道的熔断状态 (状态, 连续失败次数, 熔断时间, 探测开始时间)"""
+        return self._connect().execute(
+            "SELECT state, failures, opened_at, probe_started_at FROM circuit_breakers WHERE name = ?",
+            (name,)
+        ).fetchone()
+
+    def save(self, name: str, state: Tuple[str, int, float, float],
+             failure_threshold: int, recovery_timeout: float, opened: int = 0):
+        """保存渠道的熔断状态
+
+        Args:
+            name: 渠道名称
+            state: (状态, 连续失败次数, 熔断时间, 探测开始时间)
+            failure_threshold: 熔断阈值（供监控展示）
+            recovery_timeout: 熔断冷却时间（供监控展示）
+            opened: 本次新增的熔断次数
+        """
+        self._connect().execute(
+            "INSERT INTO circuit_breakers (name, state, failures, opened_at, probe_started_at, "
+            "failure_threshold, recovery_timeout, opened) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET state = excluded.state, failures = excluded.failures, "
+            "opened_at = excluded.opened_at, probe_started_at = excluded.probe_started_at, "
+            "failure_threshold = excluded.failure_threshold, recovery_timeout = excluded.recovery_timeout, "
+            "opened = opened + excluded.opened",
+            (name, *state, failure_threshold, recovery_timeout, opened)
+        )
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """加载所有渠道的熔断状态"""
+        rows = self._connect().execute(
+            "SELECT name, state, failures, opened_at, failure_threshold, recovery_timeout, opened "
+            "FROM circuit_breakers ORDER BY name"
+        ).fetchall()
+        return [
+            {
+                'name': row[0],
+                'state': row[1],
+                'failures': row[2],
+                'opened_at': row[3],
+                'failure_threshold': row[4],
+                'recovery_timeout': row[5],
+                'opened': row[6]
+            }
+            for row in rows
+        ]
+
+    def clear(self):
+        """删除所有熔断状态"""
+        self._connect().execute("DELETE FROM circuit_breakers")
+
+
+def create_breaker_store(config: Optional[Dict[str, Any]] = None) -> Optional[SQLiteBreakerStore]:
+    """根据配置创建熔断状态存储 (notifications.circuit_breaker.persistence)
+
+    未启用或初始化失败时返回 None，熔断状态只保存在进程内。
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+
+    try:
+        return SQLiteBreakerStore(config.get('path', '~/.claude-notifier/circuit.db'))
+    except Exception as e:
+        logging.getLogger('CircuitBreaker').error(f"熔断状态持久化初始化失败，使用进程内状态: {e}")
+        return None
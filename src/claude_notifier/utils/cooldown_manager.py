@@ -19,6 +19,11 @@ from enum import Enum
 from collections import defaultdict, deque
 
 from .time_utils import TimeManager
+from .timing_wheel import TimingWheel
+
+
+# 冷却结束后保留状态的时长（秒），保留期内的触发历史仍参与指数退避和窗口计数
+STATE_RETENTION = 3600
 
 
 class CooldownType(Enum):
@@ -63,6 +68,8 @@ class CooldownState:
     trigger_count: int = 0
     last_trigger: float = 0
     history: deque = field(default_factory=lambda: deque(maxlen=100))
+    # 规则时间窗口内的触发时间，随检查从左侧淘汰，窗口计数为其长度
+    window: deque = field(default_factory=lambda: deque(maxlen=100))
     
     @property
     def is_active(self) -> bool:
@@ -81,6 +88,20 @@ class CooldownState:
         self.trigger_count += 1
         self.last_trigger = timestamp
         self.history.append(timestamp)
+        self.window.append(timestamp)
+        
+    def count_since(self, cutoff: float) -> int:
+        """统计 cutoff 及之后的触发次数（均摊 O(1)）"""
+        window = self.window
+        while window and window[0] < cutoff:
+            window.popleft()
+        return len(window)
+        
+    def clear_triggers(self):
+        """清空触发计数和历史"""
+        self.trigger_count = 0
+        self.history.clear()
+        self.window.clear()
 
 
 class CooldownManager:
@@ -106,6 +127,9 @@ class CooldownManager:
         self.cooldown_states: Dict[str, CooldownState] = {}
         self.state_lock = threading.RLock()
         
+        # 状态过期时间轮：冷却结束 STATE_RETENTION 秒后回收状态
+        self.expiry_wheel = TimingWheel(tick=1.0)
+        
         # 统计信息
         self.stats = {
             'cooldowns_applied': 0,
@@ -117,9 +141,6 @@ class CooldownManager:
         # 控制标志
         self._running = True
         
-        # 启动清理线程
-        self._start_cleanup_thread()
-        
     def _load_cooldown_rules(self) -> List[CooldownRule]:
         """加载冷却规则配置"""
         default_rules = [
@@ -217,16 +238,23 @@ class CooldownManager:
         current_time = time.time()
         
         try:
-            for rule in self.cooldown_rules:
-                key = self._generate_key(rule.scope, event_context)
+            with self.state_lock:
+                self._reap_expired(current_time)
                 
-                with self.state_lock:
+                # 每个范围的键只计算一次（多条规则可能共享同一范围）
+                keys: Dict[CooldownScope, str] = {}
+                
+                for rule in self.cooldown_rules:
                     # 检查优先级绕过
                     if priority.lower() in rule.priority_bypass:
                         self.stats['cooldowns_bypassed'] += 1
                         continue
                         
-                    # 获取或创建冷却状态
+                    key = keys.get(rule.scope)
+                    if key is None:
+                        key = keys[rule.scope] = self._generate_key(rule.scope, event_context)
+                        
+                    # 没有触发记录的键不保存状态，使用临时状态判断
                     state = self.cooldown_states.get(key)
                     if state is None:
                         state = CooldownState(
@@ -235,7 +263,6 @@ class CooldownManager:
                             start_time=current_time,
                             end_time=current_time
                         )
-                        self.cooldown_states[key] = state
                         
                     # 检查当前冷却是否激活
                     if state.is_active:
@@ -247,6 +274,7 @@ class CooldownManager:
                         state.start_time = current_time
                         state.end_time = current_time + cooldown_duration
                         state.add_trigger(current_time)
+                        self._store_state(state)
                         
                         self.stats['cooldowns_applied'] += 1
                         
@@ -281,6 +309,19 @@ class CooldownManager:
         else:
             return f"unknown:{scope.value}"
             
+    def _store_state(self, state: CooldownState):
+        """保存状态并安排在冷却结束 STATE_RETENTION 秒后回收"""
+        self.cooldown_states[state.key] = state
+        self.expiry_wheel.schedule(state.key, state.end_time + STATE_RETENTION)
+        
+    def _reap_expired(self, current_time: float) -> int:
+        """回收时间轮中到期的状态（调用方持有 state_lock）"""
+        expired = self.expiry_wheel.advance(current_time)
+        for key in expired:
+            if self.cooldown_states.pop(key, None) is not None:
+                self.stats['cooldowns_expired'] += 1
+        return len(expired)
+        
     def _should_start_cooldown(self, state: CooldownState, current_time: float) -> bool:
         """判断是否应该启动冷却"""
         rule = state.rule
@@ -288,16 +329,12 @@ class CooldownManager:
         try:
             if rule.cooldown_type == CooldownType.SLIDING:
                 # 滑动窗口：检查窗口内触发次数
-                window_start = current_time - rule.window_size
-                recent_triggers = sum(1 for ts in state.history if ts >= window_start)
-                return recent_triggers >= rule.trigger_count
+                return state.count_since(current_time - rule.window_size) >= rule.trigger_count
             else:
                 # 其他类型：累积触发次数（考虑时间衰减）
                 if rule.window_size > 0:
                     # 在时间窗口内才计算触发
-                    window_start = current_time - rule.window_size
-                    recent_triggers = sum(1 for ts in state.history if ts >= window_start)
-                    return recent_triggers >= rule.trigger_count
+                    return state.count_since(current_time - rule.window_size) >= rule.trigger_count
                 else:
                     # 累积计数
                     return state.trigger_count >= rule.trigger_count
@@ -332,8 +369,7 @@ class CooldownManager:
                 
             elif rule.cooldown_type == CooldownType.SLIDING:
                 # 滑动窗口：基于窗口内触发密度
-                window_start = current_time - rule.window_size
-                recent_count = sum(1 for ts in state.history if ts >= window_start)
+                recent_count = state.count_since(current_time - rule.window_size)
                 if rule.window_size > 0:
                     density = recent_count / (rule.window_size / 60)  # 每分钟触发次数
                     duration = rule.base_duration * max(1, density / 2)
@@ -394,7 +430,7 @@ class CooldownManager:
             )
             state.add_trigger(current_time)
             
-            self.cooldown_states[cooldown_key] = state
+            self._store_state(state)
             self.stats['cooldowns_applied'] += 1
             
         self.logger.info(f"强制冷却已应用: {cooldown_key}, 时长: {duration}秒, 原因: {reason}")
@@ -414,6 +450,7 @@ class CooldownManager:
         with self.state_lock:
             if cooldown_key in self.cooldown_states:
                 del self.cooldown_states[cooldown_key]
+                self.expiry_wheel.cancel(cooldown_key)
                 self.stats['cooldowns_reset'] += 1
                 self.logger.info(f"冷却已取消: {cooldown_key}")
                 return True
@@ -435,9 +472,9 @@ class CooldownManager:
         with self.state_lock:
             if cooldown_key in self.cooldown_states:
                 state = self.cooldown_states[cooldown_key]
-                state.trigger_count = 0
-                state.history.clear()
+                state.clear_triggers()
                 state.end_time = time.time()  # 立即结束当前冷却
+                self._store_state(state)
                 self.stats['cooldowns_reset'] += 1
                 self.logger.info(f"冷却计数器已重置: {cooldown_key}")
                 return True
@@ -455,6 +492,8 @@ class CooldownManager:
             冷却状态信息
         """
         with self.state_lock:
+            self._reap_expired(time.time())
+            
             if scope and key:
                 # 获取特定冷却状态
                 cooldown_key = f"{scope}:{key}"
@@ -492,40 +531,21 @@ class CooldownManager:
                     'statistics': self.stats.copy()
                 }
                 
-    def cleanup_expired_cooldowns(self):
-        """清理过期的冷却状态"""
-        current_time = time.time()
-        expired_keys = []
+    def cleanup_expired_cooldowns(self) -> int:
+        """回收冷却结束超过 STATE_RETENTION 秒的状态
         
+        过期状态由时间轮管理，每次检查时惰性回收；此方法可用于立即回收。
+        
+        Returns:
+            回收的状态数量
+        """
         with self.state_lock:
-            for key, state in list(self.cooldown_states.items()):
-                # 清理1小时后的非活跃状态
-                if not state.is_active and (current_time - state.end_time) > 3600:
-                    expired_keys.append(key)
-                    
-            for key in expired_keys:
-                if key in self.cooldown_states:
-                    del self.cooldown_states[key]
-                    self.stats['cooldowns_expired'] += 1
+            expired = self._reap_expired(time.time())
                 
-        if expired_keys:
-            self.logger.debug(f"清理了{len(expired_keys)}个过期冷却状态")
+        if expired:
+            self.logger.debug(f"清理了{expired}个过期冷却状态")
+        return expired
             
-    def _start_cleanup_thread(self):
-        """启动清理线程"""
-        def cleanup_worker():
-            while self._running:
-                try:
-                    self.cleanup_expired_cooldowns()
-                    time.sleep(300)  # 每5分钟清理一次
-                except Exception as e:
-                    self.logger.error(f"冷却清理线程异常: {e}")
-                    time.sleep(60)
-                    
-        cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
-        cleanup_thread.start()
-        self.logger.debug("冷却管理器清理线程已启动")
-        
     def stop(self):
         """停止冷却管理器"""
         self._running = False
@@ -538,6 +558,8 @@ class CooldownManager:
             统计信息字典
         """
         with self.state_lock:
+            self._reap_expired(time.time())
+            
             # 统计不同类型的冷却
             type_counts = defaultdict(int)
             scope_counts = defaultdict(int)
@@ -556,7 +578,8 @@ class CooldownManager:
                 'type_distribution': dict(type_counts),
                 'scope_distribution': dict(scope_counts),
                 'lifetime_stats': self.stats.copy(),
-                'rules_count': len(self.cooldown_rules)
+                'rules_count': len(self.cooldown_rules),
+                'expiry_wheel': self.expiry_wheel.get_status()
             }
             
     def configure_rule(self, rule_index: int, **kwargs):
@@ -647,8 +670,9 @@ class CooldownManager:
                         for ts in state_data.get('history', []):
                             if current_time - ts < 3600:  # 只保留1小时内的历史
                                 state.history.append(ts)
+                                state.window.append(ts)
                                 
-                        self.cooldown_states[key] = state
+                        self._store_state(state)
                         imported_count += 1
                         
                 except Exception as e:
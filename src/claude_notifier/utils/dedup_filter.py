@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+重复通知过滤器
+按时间分片的计数 Bloom 过滤器：重复检测窗口被切分为若干时间片，每片一个固定大小的
+计数单元数组，过期的片整体清零复用。内存与通知数量无关，查询和记录只需计算一次摘要
+（双重哈希派生 k 个位置）。共享模式下单元数组映射到文件，多个进程直接读写同一块内存。
+"""
+
+import os
+import math
+import mmap
+import struct
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# 文件头: 魔数, 单元数, 哈希数, 片数, 每片时长
+_HEADER = struct.Struct('<8sIIId')
+_MAGIC = b'CNDEDUP1'
+_EPOCH = struct.Struct('<q')
+_DATA_OFFSET = 32
+
+# 单元为 1 字节饱和计数
+_MAX_COUNT = 255
+
+
+def bloom_parameters(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """容纳 capacity 个元素、误判率为 error_rate 时的单元数和哈希数"""
+    capacity = max(1, int(capacity))
+    error_rate = min(max(error_rate, 1e-9), 0.5)
+    cells = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(cells / capacity * math.log(2)))
+    return cells, hashes
+
+
+class SlicedBloomFilter:
+    """按时间分片的计数 Bloom 过滤器
+
+    共 slices + 1 个时间片轮流使用，查询覆盖最近 slices + 1 个片，即过去
+    window 到 window + window / slices 秒。单元保存计数（最小值估计出现次数），
+    只会高估不会低估：不会漏判重复，误判率由 capacity 和 error_rate 决定。
+    """
+
+    def __init__(self,
+                 window: float,
+                 capacity: int = 2000,
+                 error_rate: float = 0.01,
+                 slices: int = 4,
+                 path: Optional[str] = None):
+        """初始化过滤器
+
+        Args:
+            window: 重复检测窗口（秒）
+            capacity: 每个窗口预期的不同通知数，超出后误判率上升
+            error_rate: 整个窗口的目标误判率
+            slices: 窗口切分的时间片数
+            path: 共享文件路径，None 表示只在进程内使用；实际文件名附加参数摘要，
+                参数不同的进程使用各自的文件
+        """
+        self.window = window
+        self.slices = max(1, int(slices))
+        self.slots = self.slices + 1
+        self.slice_span = max(window / self.slices, 1e-3)
+        # 查询覆盖 slots 个片，每片分摊误判率
+        self.cells, self.hashes = bloom_parameters(capacity, error_rate / self.slots)
+        self._header = _HEADER.pack(_MAGIC, self.cells, self.hashes, self.slots, self.slice_span)
+        self.path = self._shared_path(os.path.expanduser(path)) if path else None
+
+        self._cells_offset = _DATA_OFFSET + _EPOCH.size * self.slots
+        size = self._cells_offset + self.cells * self.slots
+        if self.path:
+            self._buffer = self._open_shared(size)
+        else:
+            self._buffer = bytearray(size)
+            self._write_header(self._buffer)
+
+    def _shared_path(self, path: str) -> str:
+        """在文件名中附加参数摘要：参数变化时使用新文件，不改动其他进程正在映射的旧文件"""
+        root, ext = os.path.splitext(path)
+        return f"{root}-{hashlib.blake2b(self._header, digest_size=4).hexdigest()}{ext}"
+
+    def _write_header(self, buffer):
+        buffer[:_HEADER.size] = self._header
+        for slot in range(self.slots):
+            _EPOCH.pack_into(buffer, _DATA_OFFSET + _EPOCH.size * slot, -1)
+
+    def _open_shared(self, size: int) -> mmap.mmap:
+        """映射共享文件，不存在时创建
+
+        已有文件与当前参数不一致（如损坏）时抛出 ValueError，由调用方回退到进程内过滤器；
+        其他进程可能正在映射该文件，不能截断或改变其大小。
+        """
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            fd = self._create_shared(size)
+        try:
+            if os.fstat(fd).st_size != size or os.pread(fd, _HEADER.size, 0) != self._header:
+                raise ValueError(f"共享过滤器文件与当前参数不一致: {self.path}")
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _create_shared(self, size: int) -> int:
+        """在临时文件中写好文件头后原子地链接到目标路径，返回打开的文件描述符
+
+        多个进程同时创建时只有一个链接成功，其他进程打开已发布的文件。
+        """
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.dedup-')
+        try:
+            header = bytearray(self._cells_offset)
+            self._write_header(header)
+            os.ftruncate(temp_fd, size)
+            os.pwrite(temp_fd, bytes(header), 0)
+            try:
+                os.link(temp_path, self.path)
+            except FileExistsError:
+                pass
+        finally:
+            os.close(temp_fd)
+            os.unlink(temp_path)
+        return os.open(self.path, os.O_RDWR)
+
+    def _positions(self, key: str) -> List[int]:
+        """双重哈希：一次摘要派生 hashes 个单元位置"""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        cells = self.cells
+        return [(h1 + i * h2) % cells for i in range(self.hashes)]
+
+    def _epoch(self, slot: int) -> int:
+        return _EPOCH.unpack_from(self._buffer, _DATA_OFFSET + _EPOCH.size * slot)[0]
+
+    def count(self, key: str, now: float) -> int:
+        """估计 key 在窗口内出现的次数（0 表示一定未出现）"""
+        positions = self._positions(key)
+        current = int(now // self.slice_span)
+        buffer = self._buffer
+        total = 0
+        for epoch in range(current - self.slices, current + 1):
+            slot = epoch % self.slots
+            if self._epoch(slot) != epoch:
+                continue
+            base = self._cells_offset + slot * self.cells
+            total += min(buffer[base + p] for p in positions)
+        return total
+
+    def add(self, key: str, now: float):
+        """在当前时间片中记录一次 key"""
+        positions = self._positions(key)
+        current = int(now // self.slice_span)
+        slot = current % self.slots
+        base = self._cells_offset + slot * self.cells
+        buffer = self._buffer
+
+        if self._epoch(slot) != current:
+            # 片已过期：清零后复用
+            buffer[base:base + self.cells] = bytes(self.cells)
+            _EPOCH.pack_into(buffer, _DATA_OFFSET + _EPOCH.size * slot, current)
+
+        # 保守更新：只增加等于最小值的单元，降低高估
+        smallest = min(buffer[base + p] for p in positions)
+        if smallest >= _MAX_COUNT:
+            return
+        for p in positions:
+            if buffer[base + p] == smallest:
+                buffer[base + p] = smallest + 1
+
+    @property
+    def shared(self) -> bool:
+        return self.path is not None
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取过滤器状态"""
+        return {
+            'cells': self.cells,
+            'hashes': self.hashes,
+            'slices': self.slices,
+            'memory_bytes': len(self._buffer),
+            'shared': self.shared
+        }
+
+
+def create_duplicate_filter(window: float,
+                            config: Optional[Dict[str, Any]] = None,
+                            shared_path: Optional[str] = None) -> SlicedBloomFilter:
+    """根据配置创建重复通知过滤器 (intelligent_limiting.notification_throttle.duplicate_filter)
+
+    Args:
+        window: 重复检测窗口（秒）
+        config: 过滤器配置 (capacity, error_rate, slices, path)
+        shared_path: 共享限流存储启用时的默认共享文件路径
+
+    共享文件初始化失败时回退到进程内过滤器。
+    """
+    config = config or {}
+    options = {
+        'capacity': config.get('capacity', 2000),
+        'error_rate': config.get('error_rate', 0.01),
+        'slices': config.get('slices', 4)
+    }
+
+    path = config.get('path', shared_path)
+    if path:
+        try:
+            return SlicedBloomFilter(window, path=path, **options)
+        except Exception as e:
+            logging.getLogger('NotificationThrottle').error(f"共享重复过滤器初始化失败，使用进程内过滤器: {e}")
+
+    return SlicedBloomFilter(window, **options)
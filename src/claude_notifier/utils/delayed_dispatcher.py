@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+延迟通知与分组消息分发器
+- DelayedNotificationDispatcher: 被限流延迟的通知保存在 NotificationThrottle 的最小堆
+  （或共享 SQLite 队列）中，到期后发送
+- GroupFlushDispatcher: MessageGrouper 的分组在超时或达到发送条件时合并发送
+
+分发线程睡眠到最早的到期时间后取出到期项并发送，无需调用方轮询。
+"""
+
+import os
+import abc
+import time
+import atexit
+import logging
+import weakref
+import threading
+from typing import Dict, Any, Callable, List, Optional
+
+from .notification_throttle import NotificationThrottle, NotificationRequest
+from .message_grouper import MessageGrouper, MessageGroup
+
+# 进程退出时的默认最长等待时间（秒）：需要更长时间的进程应显式调用 drain()
+DEFAULT_EXIT_TIMEOUT = 5.0
+
+# 存活的分发器：退出和 fork 处理只注册一次，不持有分发器的强引用，
+# 被丢弃的通知器（配置重载、测试）及其分组器和频率控制器可以被回收
+_live_dispatchers: 'weakref.WeakSet[DeadlineDispatcher]' = weakref.WeakSet()
+_hooks_lock = threading.Lock()
+_hooks_registered = False
+
+
+def _drain_all_at_exit():
+    """解释器退出前处理所有分发器的剩余任务"""
+    for dispatcher in list(_live_dispatchers):
+        dispatcher._drain_at_exit()
+
+
+def _reset_all_after_fork():
+    """fork 后的子进程不继承父进程的分发线程"""
+    for dispatcher in list(_live_dispatchers):
+        dispatcher._reset_after_fork()
+
+
+def _track(dispatcher: 'DeadlineDispatcher'):
+    """登记启动过分发线程的分发器，首次调用时注册退出和 fork 处理"""
+    global _hooks_registered
+    with _hooks_lock:
+        _live_dispatchers.add(dispatcher)
+        if not _hooks_registered:
+            _hooks_registered = True
+            atexit.register(_drain_all_at_exit)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=_reset_all_after_fork)
+
+
+class DeadlineDispatcher(abc.ABC):
+    """到期任务分发线程基类"""
+
+    def __init__(self,
+                 send: Callable[[Any], Any],
+                 poll_interval: float = 5.0,
+                 exit_timeout: float = DEFAULT_EXIT_TIMEOUT):
+        """初始化分发器
+
+        Args:
+            send: 发送单个到期项的函数
+            poll_interval: 共享队列的最长检查间隔（秒），其他进程加入的任务
+                不会唤醒本进程的分发线程
+            exit_timeout: 进程退出时等待任务到期的最长时间（秒）
+        """
+        self.send = send
+        self.poll_interval = poll_interval
+        self.exit_timeout = exit_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._condition = threading.Condition()
+        self._running = False
+        self._exiting = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'dispatched': 0,
+            'errors': 0
+        }
+
+    @abc.abstractmethod
+    def _next_due(self) -> Optional[float]:
+        """最早的到期时间，没有任务时返回 None"""
+        pass
+
+    @abc.abstractmethod
+    def _pop_ready(self) -> List[Any]:
+        """取出所有到期的任务"""
+        pass
+
+    @abc.abstractmethod
+    def _is_shared(self) -> bool:
+        """任务队列是否与其他进程共享"""
+        pass
+
+    @abc.abstractmethod
+    def _drain(self, deadline: float):
+        """进程结束前处理剩余任务（在调用 drain() 的线程中执行）"""
+        pass
+
+    def _reset_after_fork(self):
+        """fork 后的子进程不继承父进程的分发线程"""
+        self._condition = threading.Condition()
+        self._running = False
+        self._exiting = False
+        self._thread = None
+
+    def wake(self):
+        """加入任务后调用：启动分发线程或让其重新计算睡眠时间"""
+        with self._condition:
+            if self._exiting:
+                return
+            if not self._running:
+                # 只登记实际使用的分发器
+                _track(self)
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run, name=self.__class__.__name__, daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def _next_wait(self) -> Optional[float]:
+        """距下一个到期任务的等待时间，None 表示无限等待"""
+        due_at = self._next_due()
+        if due_at is None:
+            return self.poll_interval if self._is_shared() else None
+
+        wait = max(0.0, due_at - time.time())
+        return min(wait, self.poll_interval) if self._is_shared() else wait
+
+    def _run(self):
+        """分发线程主循环：睡眠到最早的到期时间，发送到期任务"""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                try:
+                    wait = self._next_wait()
+                except Exception as e:
+                    self.logger.error(f"读取待发送队列失败: {e}")
+                    wait = self.poll_interval
+                if wait is None:
+                    # 进程内队列已空：线程退出，不再持有分发器，下次 wake() 时重新启动
+                    self._running = False
+                    return
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+
+            self.dispatch_ready()
+
+    def dispatch_ready(self) -> int:
+        """发送所有到期的任务
+
+        Returns:
+            发送的数量
+        """
+        try:
+            ready = self._pop_ready()
+        except Exception as e:
+            self.logger.error(f"读取待发送队列失败: {e}")
+            return 0
+        return self._send_all(ready)
+
+    def _send_all(self, items: List[Any]) -> int:
+        """逐个发送，单个失败不影响其他（send 抛出异常或返回 False 视为失败）"""
+        for item in items:
+            try:
+                result = self.send(item)
+            except Exception as e:
+                self.logger.error(f"发送失败: {e}")
+                result = False
+            if result is False:
+                self.stats['errors'] += 1
+                self._on_send_failed(item)
+            else:
+                self.stats['dispatched'] += 1
+        return len(items)
+
+    def _on_send_failed(self, item: Any):
+        """处理发送失败的任务（默认丢弃）"""
+
+    def _drain_until(self, deadline: float) -> bool:
+        """等待并发送在 deadline 之前到期的任务
+
+        Returns:
+            队列已清空返回 True
+        """
+        while True:
+            due_at = self._next_due()
+            if due_at is None:
+                return True
+            if due_at > deadline:
+                return False
+            time.sleep(max(0.0, due_at - time.time()))
+            self.dispatch_ready()
+
+    def shutdown(self):
+        """停止分发线程（未到期的任务保留在队列中）"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def drain(self, timeout: Optional[float] = None):
+        """进程结束前停止分发线程并处理剩余任务
+
+        以 os._exit 结束的进程（如分离的钩子子进程）不会执行 atexit 回调，需显式调用。
+
+        Args:
+            timeout: 最长等待时间（秒），None 使用 exit_timeout
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._exiting = True
+            self._running = False
+            self._condition.notify_all()
+
+        try:
+            self._drain(time.time() + (self.exit_timeout if timeout is None else timeout))
+        except Exception as e:
+            self.logger.error(f"退出前发送失败: {e}")
+
+    def _drain_at_exit(self):
+        """解释器退出前处理剩余任务"""
+        self.drain()
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取分发器状态"""
+        due_at = self._next_due()
+        return {
+            'running': self._running,
+            'next_due_in': max(0.0, due_at - time.time()) if due_at is not None else None,
+            **self.stats
+        }
+
+
+class DelayedNotificationDispatcher(DeadlineDispatcher):
+    """延迟通知分发线程"""
+
+    def __init__(self,
+                 throttle: NotificationThrottle,
+                 send: Callable[[NotificationRequest], Any],
+                 poll_interval: float = 5.0,
+                 exit_timeout: float = DEFAULT_EXIT_TIMEOUT):
+        """初始化分发器
+
+        Args:
+            throttle: 保存延迟队列的频率控制器
+            send: 发送单个到期通知的函数
+            poll_interval: 共享队列的最长检查间隔（秒）
+            exit_timeout: 进程退出时等待进程内延迟通知到期的最长时间（秒）
+        """
+        super().__init__(send, poll_interval, exit_timeout)
+        self.throttle = throttle
+
+    def _next_due(self) -> Optional[float]:
+        return self.throttle.next_delayed_at()
+
+    def _pop_ready(self) -> List[NotificationRequest]:
+        return self.throttle.get_ready_notifications()
+
+    def _is_shared(self) -> bool:
+        return self.throttle.shared
+
+    def _drain(self, deadline: float):
+        """共享队列中的通知由后续进程发送；进程内队列等待到 deadline"""
+        if self._is_shared():
+            return
+        if not self._drain_until(deadline):
+            self.logger.warning("进程退出，放弃未到期的延迟通知")
+
+
+class GroupFlushDispatcher(DeadlineDispatcher):
+    """分组消息发送线程：每个分组在超时或达到发送条件时发送"""
+
+    def __init__(self,
+                 grouper: MessageGrouper,
+                 send: Callable[[MessageGroup], Any],
+                 poll_interval: float = 5.0,
+                 exit_timeout: float = DEFAULT_EXIT_TIMEOUT,
+                 retry_delay: float = 30.0,
+                 max_attempts: int = 3):
+        """初始化分发器
+
+        Args:
+            grouper: 消息分组器
+            send: 合并并发送单个分组的函数
+            poll_interval: 持久化分组的最长检查间隔（秒）
+            exit_timeout: 进程退出时的最长等待时间（秒）
+            retry_delay: 发送失败的分组放回后重新发送的等待时间（秒）
+            max_attempts: 单个分组在本进程内的最大发送次数
+        """
+        super().__init__(send, poll_interval, exit_timeout)
+        self.grouper = grouper
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        # 分组ID -> 本进程内失败次数
+        self._failures: Dict[str, int] = {}
+
+    def _next_due(self) -> Optional[float]:
+        return self.grouper.next_flush_at()
+
+    def _pop_ready(self) -> List[MessageGroup]:
+        return self.grouper.get_ready_groups()
+
+    def _is_shared(self) -> bool:
+        return self.grouper.store is not None
+
+    def _send_all(self, items: List[MessageGroup]) -> int:
+        count = super()._send_all(items)
+        for group in items:
+            if group.group_id not in self.grouper.active_groups:
+                self._failures.pop(group.group_id, None)
+        return count
+
+    def _on_send_failed(self, group: MessageGroup):
+        """放回发送失败的分组稍后重试，达到最大次数后放弃"""
+        failures = self._failures.get(group.group_id, 0) + 1
+        if failures >= self.max_attempts:
+            self._failures.pop(group.group_id, None)
+            self.logger.error(f"分组 {group.group_id} 发送 {failures} 次失败，放弃 {len(group.messages)} 条消息")
+            return
+
+        self._failures[group.group_id] = failures
+        try:
+            self.grouper.requeue_group(group, self.retry_delay)
+            self.wake()
+        except Exception as e:
+            self.logger.error(f"放回分组 {group.group_id} 失败: {e}")
+
+    def _drain(self, deadline: float):
+        """进程内分组立即全部发送；持久化分组只发送已到期的，其余留给后续进程"""
+        if not self._is_shared():
+            self._send_all(self.grouper.get_ready_groups(flush_all=True))
+            return
+        self.dispatch_ready()
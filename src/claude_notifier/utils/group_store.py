@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+消息分组持久化
+钩子进程生命周期很短，未发送的分组保存在 SQLite 中，由后续进程继续累积并按时发送。
+每次修改递增版本号，进程发现版本变化时重新加载分组。
+"""
+
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+from .throttle_store import SQLiteStateStore
+
+
+class SQLiteGroupStore(SQLiteStateStore):
+    """SQLite 共享消息分组"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS message_groups (
+            group_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS message_group_meta (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = '~/.claude-notifier/groups.db'):
+        """初始化分组存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        super().__init__(path)
+
+    def version(self) -> int:
+        """分组状态版本号"""
+        row = self._connect().execute(
+            "SELECT value FROM message_group_meta WHERE name = 'version'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """加载所有未发送的分组"""
+        rows = self._connect().execute("SELECT data FROM message_groups").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def apply(self, saved: List[Dict[str, Any]], removed: List[str]) -> int:
+        """写入修改的分组、删除已发送的分组并递增版本号
+
+        Returns:
+            新的版本号
+        """
+        with self.transaction():
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO message_groups (group_id, data) VALUES (?, ?)",
+                [(data['group_id'], json.dumps(data, ensure_ascii=False, default=str)) for data in saved]
+            )
+            conn.executemany("DELETE FROM message_groups WHERE group_id = ?", [(gid,) for gid in removed])
+            version = self.version() + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO message_group_meta (name, value) VALUES ('version', ?)", (version,)
+            )
+        return version
+
+
+def create_group_store(config: Optional[Dict[str, Any]] = None) -> Optional[SQLiteGroupStore]:
+    """根据配置创建分组存储 (intelligent_limiting.message_grouper.persistence)
+
+    未启用或初始化失败时返回 None，分组只保存在进程内。
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+
+    try:
+        return SQLiteGroupStore(config.get('path', '~/.claude-notifier/groups.db'))
+    except Exception as e:
+        logging.getLogger('MessageGrouper').error(f"分组持久化初始化失败，使用进程内分组: {e}")
+        return None
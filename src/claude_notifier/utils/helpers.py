@@ -18,6 +18,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from urllib.parse import urlparse
 
+from .pattern_matcher import PatternMatcher
+
 
 def generate_signature(secret: str, timestamp: str, content: str = "") -> str:
     """生成签名（用于钉钉、飞书等）"""
@@ -104,33 +106,30 @@ def validate_webhook_url(url: str) -> bool:
         return False
 
 
+# 危险操作模式（模块加载时编译为一个匹配器）
+DANGEROUS_OPERATION_PATTERNS = [
+    r'rm\s+-rf',
+    r'sudo\s+rm',
+    r'delete\s+from.*where',
+    r'drop\s+table',
+    r'truncate\s+table',
+    r'git\s+push\s+--force',
+    r'npm\s+publish',
+    r'docker\s+rm.*-f',
+    r'systemctl\s+stop',
+    r'kill\s+-9',
+    r'chmod\s+777',
+]
+
+_dangerous_operation_matcher = PatternMatcher(DANGEROUS_OPERATION_PATTERNS)
+
+
 def is_sensitive_operation(operation: str) -> bool:
     """判断是否为敏感操作"""
     if not operation:
         return False
         
-    operation_lower = operation.lower()
-    
-    # 危险操作模式
-    dangerous_patterns = [
-        r'rm\s+-rf',
-        r'sudo\s+rm',
-        r'delete\s+from.*where',
-        r'drop\s+table',
-        r'truncate\s+table',
-        r'git\s+push\s+--force',
-        r'npm\s+publish',
-        r'docker\s+rm.*-f',
-        r'systemctl\s+stop',
-        r'kill\s+-9',
-        r'chmod\s+777',
-    ]
-    
-    for pattern in dangerous_patterns:
-        if re.search(pattern, operation_lower):
-            return True
-            
-    return False
+    return _dangerous_operation_matcher.search(operation) is not None
 
 
 def get_project_info(project_path: Optional[str] = None) -> Dict[str, Any]:
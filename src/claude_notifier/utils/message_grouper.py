@@ -9,14 +9,21 @@
 
 import time
 import json
+import heapq
 import hashlib
 import logging
+import itertools
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Tuple, Set, Iterator
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .minhash import MinHashLSH
+from .group_store import create_group_store
+
 
 class GroupingStrategy(Enum):
     """分组策略枚举"""
@@ -28,6 +35,21 @@ class GroupingStrategy(Enum):
     BY_SIMILARITY = "by_similarity"
 
 
+# 内容相似策略比较的消息字段
+_CONTENT_FIELDS = ('event_type', 'project', 'operation', 'status', 'title', 'error_type')
+
+# BY_SIMILARITY 策略比较分组中最近的消息数
+_RECENT_SIMILAR = 3
+
+# 精确匹配策略的哈希索引字段（消息字段与 MessageGroup 属性同名）
+_INDEX_FIELDS = {
+    GroupingStrategy.BY_PROJECT: ('project', 'channel'),
+    GroupingStrategy.BY_EVENT_TYPE: ('event_type', 'channel'),
+    GroupingStrategy.BY_CHANNEL: ('channel',),
+    GroupingStrategy.BY_TIME_WINDOW: ('channel',),
+}
+
+
 class MergeAction(Enum):
     """合并动作枚举"""
     MERGE = "merge"
@@ -72,6 +94,26 @@ class MessageGroup:
     def get_idle_time(self) -> float:
         """获取闲置时间（秒）"""
         return time.time() - self.last_updated
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化（用于分组持久化）"""
+        return {
+            'group_id': self.group_id,
+            'strategy': self.strategy.value,
+            'messages': self.messages,
+            'created_at': self.created_at,
+            'last_updated': self.last_updated,
+            'channel': self.channel,
+            'event_type': self.event_type,
+            'project': self.project,
+            'merge_count': self.merge_count,
+            'priority': self.priority
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MessageGroup':
+        """从 to_dict() 的结果恢复"""
+        return cls(**{**data, 'strategy': GroupingStrategy(data['strategy'])})
 
 
 class MessageGrouper:
@@ -92,23 +134,53 @@ class MessageGrouper:
         # 活跃的消息组
         self.active_groups: Dict[str, MessageGroup] = {}
         
+        # 分组索引: 索引字段 -> 字段值 -> 分组ID（按创建顺序，值为占位）
+        self._group_index: Dict[Tuple[str, ...], Dict[tuple, Dict[str, None]]] = {
+            fields: defaultdict(dict) for fields in set(_INDEX_FIELDS.values())
+        }
+        
         # 分组规则
         self.grouping_rules = self._load_grouping_rules()
         
         # 相似度阈值
         self.similarity_threshold = self.grouping_config.get('similarity_threshold', 0.8)
         
+        # 内容相似策略的 MinHash/LSH 候选索引（分组ID -> 首条和最近消息的签名）
+        self._similarity_index = MinHashLSH(
+            self.similarity_threshold,
+            self.grouping_config.get('minhash_permutations', 64)
+        )
+        # 已索引消息的词元: 分组ID -> 消息位置 -> 词元集合
+        self._indexed_tokens: Dict[str, Dict[int, Set[str]]] = {}
+        
         # 统计信息
         self.stats = {
             'groups_created': 0,
             'messages_grouped': 0,
             'messages_merged': 0,
-            'groups_sent': 0
+            'groups_sent': 0,
+            'groups_requeued': 0
         }
         
         # 清理定时器
         self._last_cleanup = time.time()
         
+        # 发送计划: 按发送截止时间排列的最小堆 (deadline, seq, group_id)
+        self._flush_heap: List[Tuple[float, int, str]] = []
+        self._flush_seq = itertools.count()
+        
+        # 分发线程和调用方线程共同访问分组
+        self._lock = threading.RLock()
+        
+        # 跨进程持久化（可选）：版本号变化时重新加载，修改的分组在操作结束时写回
+        self.store = create_group_store(
+            self.config.get('intelligent_limiting', {}).get('message_grouper', {}).get('persistence', {})
+        )
+        self._store_version = -1
+        self._sync_depth = 0
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        
     def _load_grouping_config(self) -> Dict[str, Any]:
         """加载分组配置"""
         default_config = {
@@ -119,6 +191,8 @@ class MessageGrouper:
             'send_threshold': 5,          # 发送阈值（消息数）
             'send_timeout': 60,           # 发送超时（秒）
             'similarity_threshold': 0.8,  # 相似度阈值
+            'minhash_permutations': 64,   # 相似度索引的 MinHash 签名长度
+            'group_by_default': False,    # 未配置分组规则的事件是否分组
             'merge_strategies': [
                 GroupingStrategy.BY_PROJECT,
                 GroupingStrategy.BY_EVENT_TYPE,
@@ -187,6 +261,62 @@ class MessageGrouper:
                     
         return default_rules
         
+    @contextmanager
+    def _synced(self) -> Iterator[None]:
+        """分组操作的同步范围：持久化时在一个写事务中加载最新分组并写回修改"""
+        with self._lock:
+            if self.store is None or self._sync_depth:
+                self._sync_depth += 1
+                try:
+                    yield
+                finally:
+                    self._sync_depth -= 1
+                return
+                
+            self._sync_depth = 1
+            try:
+                with self.store.transaction():
+                    if self.store.version() != self._store_version:
+                        self._load_groups()
+                    yield
+                    if self._dirty or self._removed:
+                        saved = [self.active_groups[g].to_dict() for g in self._dirty if g in self.active_groups]
+                        self._store_version = self.store.apply(saved, list(self._removed))
+            except BaseException:
+                # 事务已回滚，下次重新加载
+                self._store_version = -1
+                raise
+            finally:
+                self._sync_depth = 0
+                self._dirty.clear()
+                self._removed.clear()
+                
+    def _load_groups(self):
+        """从持久化存储重新加载分组并重建索引和发送计划"""
+        groups = sorted(
+            (MessageGroup.from_dict(data) for data in self.store.load_all()),
+            key=lambda g: g.created_at
+        )
+        
+        self.active_groups = {}
+        for index in self._group_index.values():
+            index.clear()
+        self._similarity_index = MinHashLSH(self.similarity_threshold, self._similarity_index.num_perm)
+        self._indexed_tokens = {}
+        self._flush_heap = []
+        
+        for group in groups:
+            self.active_groups[group.group_id] = group
+            self._index_group(group)
+            messages = group.messages
+            group.messages = []
+            for message in messages:
+                group.messages.append(message)
+                self._index_message(group)
+            self._schedule_flush(group)
+            
+        self._store_version = self.store.version()
+        
     def should_group_message(self, message: Dict[str, Any]) -> Tuple[bool, Optional[str], MergeAction]:
         """检查消息是否应该分组
         
@@ -199,41 +329,43 @@ class MessageGrouper:
         if not self.grouping_config.get('enabled', True):
             return False, None, MergeAction.MERGE
             
+        try:
+            with self._synced():
+                return self._check_grouping(message)
+        except Exception as e:
+            self.logger.error(f"分组检查异常: {e}")
+            return False, None, MergeAction.MERGE
+            
+    def _check_grouping(self, message: Dict[str, Any]) -> Tuple[bool, Optional[str], MergeAction]:
+        """查找或创建消息所属的分组"""
         # 定期清理过期组
         self._periodic_cleanup()
         
-        try:
-            event_type = message.get('event_type', 'unknown')
-            channel = message.get('channel', 'unknown')
-            project = message.get('project', 'unknown')
-            
-            # 1. 查找现有组
-            existing_group_id = self._find_matching_group(message)
-            if existing_group_id:
-                group = self.active_groups[existing_group_id]
-                
-                # 检查组是否已满
-                if len(group.messages) >= self._get_max_group_size(event_type):
-                    # 立即发送当前组，创建新组
-                    return False, existing_group_id, MergeAction.ESCALATE
-                    
-                # 检查组是否超时
-                if group.get_age() > self._get_group_timeout(event_type):
-                    return False, existing_group_id, MergeAction.ESCALATE
-                    
-                return True, existing_group_id, MergeAction.GROUP
+        event_type = message.get('event_type', 'unknown')
+        
+        # 1. 查找现有组
+        existing_group_id = self._find_matching_group(message)
+        if existing_group_id:
+            group = self.active_groups[existing_group_id]
+            
+            # 检查组是否已满
+            if len(group.messages) >= self._get_max_group_size(event_type):
+                # 立即发送当前组，创建新组
+                return False, existing_group_id, MergeAction.ESCALATE
                 
-            # 2. 检查是否应该创建新组
-            if self._should_create_group(message):
-                group_id = self._create_group(message)
-                return True, group_id, MergeAction.GROUP
+            # 检查组是否超时
+            if group.get_age() > self._get_group_timeout(event_type):
+                return False, existing_group_id, MergeAction.ESCALATE
                 
-            # 3. 不分组，直接发送
-            return False, None, MergeAction.MERGE
+            return True, existing_group_id, MergeAction.GROUP
             
-        except Exception as e:
-            self.logger.error(f"分组检查异常: {e}")
-            return False, None, MergeAction.MERGE
+        # 2. 检查是否应该创建新组
+        if self._should_create_group(message):
+            group_id = self._create_group(message)
+            return True, group_id, MergeAction.GROUP
+            
+        # 3. 不分组，直接发送
+        return False, None, MergeAction.MERGE
         
     def _find_matching_group(self, message: Dict[str, Any]) -> Optional[str]:
         """查找匹配的现有分组"""
@@ -243,12 +375,79 @@ class MessageGrouper:
         rule = self.grouping_rules.get(event_type, {})
         strategy = rule.get('strategy', GroupingStrategy.BY_PROJECT)
         
-        for group_id, group in self.active_groups.items():
-            if self._messages_match(message, group, strategy):
+        # 精确匹配策略直接查索引
+        fields = _INDEX_FIELDS.get(strategy)
+        if fields is not None:
+            bucket = self._group_index[fields].get(tuple(message.get(f) for f in fields))
+            if not bucket:
+                return None
+            if strategy != GroupingStrategy.BY_TIME_WINDOW:
+                return next(iter(bucket))
+                
+            window = self.grouping_config.get('group_window', 300)
+            for group_id in bucket:
+                if self.active_groups[group_id].get_age() < window:
+                    return group_id
+            return None
+            
+        if strategy not in (GroupingStrategy.BY_CONTENT, GroupingStrategy.BY_SIMILARITY):
+            return None
+            
+        # 内容相似策略只精确比较 LSH 候选分组（按创建顺序）
+        tokens = self._content_tokens(message)
+        candidates = self._similarity_index.query(tokens)
+        for group_id in sorted(candidates, key=lambda gid: self.active_groups[gid].created_at):
+            group_tokens = self._indexed_tokens[group_id]
+            if strategy == GroupingStrategy.BY_CONTENT:
+                positions = [0]
+            else:
+                count = len(self.active_groups[group_id].messages)
+                positions = range(max(0, count - _RECENT_SIMILAR), count)
+            if any(p in group_tokens and self._tokens_similar(tokens, group_tokens[p]) for p in positions):
                 return group_id
                 
         return None
         
+    def _index_group(self, group: MessageGroup):
+        """将分组加入索引"""
+        for fields, index in self._group_index.items():
+            index[tuple(getattr(group, f) for f in fields)][group.group_id] = None
+            
+    def _remove_group(self, group_id: str) -> Optional[MessageGroup]:
+        """移除分组并更新索引"""
+        group = self.active_groups.pop(group_id, None)
+        if group is None:
+            return None
+            
+        for fields, index in self._group_index.items():
+            key = tuple(getattr(group, f) for f in fields)
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(group_id, None)
+                if not bucket:
+                    del index[key]
+        self._similarity_index.remove(group_id)
+        self._indexed_tokens.pop(group_id, None)
+        self._dirty.discard(group_id)
+        self._removed.add(group_id)
+        return group
+        
+    def _index_message(self, group: MessageGroup):
+        """将分组新加入的消息加入相似度索引
+        
+        BY_CONTENT 比较首条消息，BY_SIMILARITY 比较最近几条消息，其他消息移出索引。
+        """
+        position = len(group.messages) - 1
+        tokens = self._content_tokens(group.messages[-1])
+        group_tokens = self._indexed_tokens.setdefault(group.group_id, {})
+        group_tokens[position] = tokens
+        self._similarity_index.add(group.group_id, position, tokens)
+        
+        stale = position - _RECENT_SIMILAR
+        if stale > 0:
+            group_tokens.pop(stale, None)
+            self._similarity_index.remove(group.group_id, stale)
+        
     def _messages_match(self, message: Dict[str, Any], group: MessageGroup, strategy: GroupingStrategy) -> bool:
         """检查消息是否匹配分组"""
         try:
@@ -276,7 +475,7 @@ class MessageGrouper:
             elif strategy == GroupingStrategy.BY_SIMILARITY:
                 if group.messages:
                     # 检查最近3条消息
-                    recent_messages = group.messages[-3:] if len(group.messages) > 3 else group.messages
+                    recent_messages = group.messages[-_RECENT_SIMILAR:]
                     return any(self._content_similar(message, msg) for msg in recent_messages)
                 return False
                 
@@ -288,34 +487,27 @@ class MessageGrouper:
     def _content_similar(self, msg1: Dict[str, Any], msg2: Dict[str, Any]) -> bool:
         """检查两条消息内容是否相似"""
         try:
-            # 提取关键内容进行比较
-            def get_content_tokens(msg):
-                content_parts = [
-                    str(msg.get('event_type', '')),
-                    str(msg.get('project', '')),
-                    str(msg.get('operation', '')),
-                    str(msg.get('status', '')),
-                    str(msg.get('title', '')),
-                    str(msg.get('error_type', ''))
-                ]
-                content = ' '.join(filter(None, content_parts))
-                return set(content.lower().split())
-                
-            tokens1 = get_content_tokens(msg1)
-            tokens2 = get_content_tokens(msg2)
-            
-            if not tokens1 or not tokens2:
-                return False
-                
-            intersection = tokens1 & tokens2
-            union = tokens1 | tokens2
-            
-            jaccard_similarity = len(intersection) / len(union) if union else 0
-            return jaccard_similarity >= self.similarity_threshold
-            
+            return self._tokens_similar(self._content_tokens(msg1), self._content_tokens(msg2))
         except Exception as e:
             self.logger.error(f"内容相似度计算异常: {e}")
             return False
+            
+    def _tokens_similar(self, tokens1: Set[str], tokens2: Set[str]) -> bool:
+        """两个词元集合的 Jaccard 相似度是否达到阈值"""
+        if not tokens1 or not tokens2:
+            return False
+            
+        intersection = tokens1 & tokens2
+        union = tokens1 | tokens2
+        
+        jaccard_similarity = len(intersection) / len(union) if union else 0
+        return jaccard_similarity >= self.similarity_threshold
+        
+    @staticmethod
+    def _content_tokens(message: Dict[str, Any]) -> Set[str]:
+        """提取关键内容的词元集合"""
+        content = ' '.join(filter(None, (str(message.get(f, '')) for f in _CONTENT_FIELDS)))
+        return set(content.lower().split())
         
     def _should_create_group(self, message: Dict[str, Any]) -> bool:
         """检查是否应该创建新分组"""
@@ -334,7 +526,7 @@ class MessageGrouper:
             return True
             
         # 默认策略
-        return self.grouping_config.get('group_by_default', True)
+        return self.grouping_config.get('group_by_default', False)
         
     def _create_group(self, message: Dict[str, Any]) -> str:
         """创建新的消息分组"""
@@ -346,6 +538,11 @@ class MessageGrouper:
         timestamp = int(time.time())
         content_hash = hashlib.md5(f"{event_type}:{channel}:{project}".encode()).hexdigest()[:8]
         group_id = f"{event_type}_{content_hash}_{timestamp}"
+        # 同一秒内创建的同类分组（如内容不相似）使用不同ID
+        base_id, suffix = group_id, 1
+        while group_id in self.active_groups:
+            group_id = f"{base_id}_{suffix}"
+            suffix += 1
         
         # 确定分组策略
         rule = self.grouping_rules.get(event_type, {})
@@ -361,6 +558,9 @@ class MessageGrouper:
         )
         
         self.active_groups[group_id] = group
+        self._index_group(group)
+        self._schedule_flush(group)
+        self._dirty.add(group_id)
         self.stats['groups_created'] += 1
         
         self.logger.debug(f"创建新分组: {group_id} (策略: {strategy.value})")
@@ -376,11 +576,13 @@ class MessageGrouper:
         Returns:
             是否成功添加
         """
-        should_group, group_id, action = self.should_group_message(message)
-        
-        if should_group and group_id:
-            return self.add_message_to_group(group_id, message)
-        
+        # 查找分组和加入消息在同一同步范围内完成，其他进程不会在两步之间发送该分组
+        with self._synced():
+            should_group, group_id, action = self.should_group_message(message)
+            
+            if should_group and group_id:
+                return self.add_message_to_group(group_id, message)
+            
         return False
         
     def add_message_to_group(self, group_id: str, message: Dict[str, Any]) -> bool:
@@ -393,21 +595,24 @@ class MessageGrouper:
         Returns:
             是否成功添加
         """
-        if group_id not in self.active_groups:
-            return False
-            
         try:
-            group = self.active_groups[group_id]
-            group.add_message(message)
-            
-            self.stats['messages_grouped'] += 1
-            
-            # 检查是否应该立即发送
-            if self._should_send_group(group):
-                self._mark_group_for_sending(group_id)
+            with self._synced():
+                if group_id not in self.active_groups:
+                    return False
+                    
+                group = self.active_groups[group_id]
+                group.add_message(message)
+                self._index_message(group)
+                self._dirty.add(group_id)
+                
+                self.stats['messages_grouped'] += 1
+                
+                # 检查是否应该立即发送
+                if self._should_send_group(group):
+                    self._mark_group_for_sending(group_id)
+                    
+                return True
                 
-            return True
-            
         except Exception as e:
             self.logger.error(f"添加消息到分组失败: {e}")
             return False
@@ -444,28 +649,81 @@ class MessageGrouper:
             group = self.active_groups[group_id]
             # 添加标记属性
             setattr(group, 'ready_to_send', True)
+            # 立即到期
+            heapq.heappush(self._flush_heap, (time.time(), next(self._flush_seq), group_id))
             
-    def get_ready_groups(self) -> List[MessageGroup]:
-        """获取准备发送的分组
+    def _flush_deadline(self, group: MessageGroup) -> float:
+        """分组的发送时间：已达到发送条件时为最后更新时间，否则为超时时间"""
+        if self._should_send_group(group):
+            return group.last_updated
+        return group.created_at + self._get_group_timeout(group.event_type)
+        
+    def _schedule_flush(self, group: MessageGroup):
+        """将分组加入发送计划"""
+        heapq.heappush(self._flush_heap, (self._flush_deadline(group), next(self._flush_seq), group.group_id))
+        
+    def next_flush_at(self) -> Optional[float]:
+        """最早的分组发送时间，没有待发送分组时返回 None"""
+        with self._synced():
+            # 丢弃已发送或已清理分组的计划
+            while self._flush_heap and self._flush_heap[0][2] not in self.active_groups:
+                heapq.heappop(self._flush_heap)
+            return self._flush_heap[0][0] if self._flush_heap else None
+            
+    def get_ready_groups(self, flush_all: bool = False) -> List[MessageGroup]:
+        """获取准备发送的分组（按发送计划取出到期分组）
         
+        Args:
+            flush_all: 为 True 时取出所有分组（如进程退出前）
+            
         Returns:
             准备发送的分组列表
         """
-        ready_groups = []
-        groups_to_remove = []
+        with self._synced():
+            if flush_all:
+                ready_groups = list(self.active_groups.values())
+            else:
+                ready = {}
+                now = time.time()
+                while self._flush_heap and self._flush_heap[0][0] <= now:
+                    _, _, group_id = heapq.heappop(self._flush_heap)
+                    group = self.active_groups.get(group_id)
+                    if group is not None and self._should_send_group(group):
+                        ready[group_id] = group
+                ready_groups = list(ready.values())
+                        
+            # 移除已发送的分组
+            for group in ready_groups:
+                if self._remove_group(group.group_id) is not None:
+                    self.stats['groups_sent'] += 1
+                    
+        # 未加入消息的空分组无需发送
+        return [group for group in ready_groups if group.messages]
         
-        for group_id, group in self.active_groups.items():
-            if self._should_send_group(group):
-                ready_groups.append(group)
-                groups_to_remove.append(group_id)
-                
-        # 移除已发送的分组
-        for group_id in groups_to_remove:
-            if group_id in self.active_groups:
-                del self.active_groups[group_id]
-                self.stats['groups_sent'] += 1
+    def requeue_group(self, group: MessageGroup, delay: float = 0.0):
+        """放回发送失败的分组（持久化时写回存储），delay 秒后重新发送
+        
+        Args:
+            group: get_ready_groups() 取出的分组
+            delay: 重新发送前的等待时间（秒）
+        """
+        with self._synced():
+            if group.group_id in self.active_groups:
+                return
                 
-        return ready_groups
+            self.active_groups[group.group_id] = group
+            self._index_group(group)
+            messages = group.messages
+            group.messages = []
+            for message in messages:
+                group.messages.append(message)
+                self._index_message(group)
+            heapq.heappush(self._flush_heap, (time.time() + delay, next(self._flush_seq), group.group_id))
+            self._removed.discard(group.group_id)
+            self._dirty.add(group.group_id)
+            
+            self.stats['groups_sent'] -= 1
+            self.stats['groups_requeued'] += 1
         
     def merge_messages(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """合并消息列表（兼容旧接口）
@@ -642,8 +900,7 @@ class MessageGrouper:
                 
         for group_id in expired_groups:
             self.logger.debug(f"清理过期分组: {group_id}")
-            if group_id in self.active_groups:
-                del self.active_groups[group_id]
+            self._remove_group(group_id)
                 
     def get_grouper_status(self) -> Dict[str, Any]:
         """获取分组器状态信息
@@ -655,6 +912,7 @@ class MessageGrouper:
             'enabled': self.grouping_config.get('enabled', True),
             'stats': self.stats.copy(),
             'active_groups': len(self.active_groups),
+            'similarity_index': self._similarity_index.get_status(),
             'group_details': [
                 {
                     'group_id': group.group_id,
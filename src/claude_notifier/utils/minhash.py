@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+MinHash/LSH 近似重复检测
+为词元集合计算 MinHash 签名，按 LSH 分段放入哈希桶；查询只返回至少一段签名
+相同的候选项，无需与每个已有条目逐一计算 Jaccard 相似度。候选项仍需调用方精确校验。
+"""
+
+import hashlib
+from array import array
+from collections import defaultdict
+from typing import Dict, Any, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+def _token_hashes(token: str, num_perm: int, seed: bytes) -> array:
+    """词元的 num_perm 个独立 32 位哈希值
+
+    一次 SHAKE-128 输出等价于 num_perm 个哈希函数，避免逐个函数计算；
+    结果不受 PYTHONHASHSEED 影响，不同进程的签名一致。
+    """
+    return array('I', hashlib.shake_128(seed + token.encode('utf-8')).digest(4 * num_perm))
+
+
+def optimal_bands(threshold: float, num_perm: int, recall: float = 0.95) -> Tuple[int, int]:
+    """选择分段数和每段行数 (bands, rows)，bands * rows == num_perm
+
+    相似度恰为 threshold 的条目成为候选的概率为 1 - (1 - t^rows)^bands。
+    候选项会被精确校验，因此在该概率不低于 recall 的前提下取最大的 rows（候选最少）。
+    """
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHashLSH:
+    """MinHash 签名的 LSH 索引
+
+    每个键可以插入多个签名（以 slot 区分），查询返回任一签名在某一段上
+    与查询签名完全相同的键。
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, seed: int = 1):
+        """初始化索引
+
+        Args:
+            threshold: 目标 Jaccard 相似度阈值，决定分段方式
+            num_perm: 签名长度（哈希函数个数）
+            seed: 哈希种子
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+        self._seed = seed.to_bytes(4, 'little')
+
+        # 每段一个哈希桶: 段签名 -> 键集合
+        self._buckets: List[Dict[tuple, Set[Hashable]]] = [defaultdict(set) for _ in range(self.bands)]
+        # 键 -> slot -> 各段签名，用于删除
+        self._entries: Dict[Hashable, Dict[Hashable, List[tuple]]] = {}
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """计算词元集合的 MinHash 签名"""
+        hashes = [_token_hashes(token, self.num_perm, self._seed) for token in set(tokens)]
+        if not hashes:
+            return ()
+        # 每个位置取所有词元哈希值的最小值
+        return tuple(map(min, zip(*hashes)))
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[tuple]:
+        """将签名切分为各段"""
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows] for i in range(self.bands)]
+
+    def add(self, key: Hashable, slot: Hashable, tokens: Iterable[str]):
+        """为键插入（或替换）一个签名
+
+        Args:
+            key: 条目键
+            slot: 同一键下签名的标识
+            tokens: 词元集合
+        """
+        self.remove(key, slot)
+        signature = self.signature(tokens)
+        if not signature:
+            return
+
+        band_keys = self._band_keys(signature)
+        for bucket, band_key in zip(self._buckets, band_keys):
+            bucket[band_key].add(key)
+        self._entries.setdefault(key, {})[slot] = band_keys
+
+    def remove(self, key: Hashable, slot: Optional[Hashable] = None):
+        """删除键的一个签名（slot 为 None 时删除全部）"""
+        slots = self._entries.get(key)
+        if not slots:
+            return
+
+        targets = list(slots) if slot is None else [slot]
+        for target in targets:
+            band_keys = slots.pop(target, None)
+            if band_keys is None:
+                continue
+            remaining = list(slots.values())
+            for i, band_key in enumerate(band_keys):
+                # 同一键的其他签名仍落在该桶时保留
+                if any(other[i] == band_key for other in remaining):
+                    continue
+                bucket = self._buckets[i]
+                keys = bucket.get(band_key)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del bucket[band_key]
+
+        if not slots:
+            del self._entries[key]
+
+    def query(self, tokens: Iterable[str]) -> Set[Hashable]:
+        """查找可能相似的候选键"""
+        signature = self.signature(tokens)
+        if not signature:
+            return set()
+
+        candidates: Set[Hashable] = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            keys = bucket.get(band_key)
+            if keys:
+                candidates.update(keys)
+        return candidates
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取索引状态"""
+        return {
+            'entries': len(self._entries),
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'rows': self.rows
+        }
@@ -7,15 +7,18 @@
 从原有utils/notification_throttle.py迁移而来，适配新轻量化架构
 """
 
+import os
 import time
 import hashlib
 import logging
-from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .throttle_store import MemoryThrottleStore, create_throttle_store
+from .dedup_filter import create_duplicate_filter
+
 
 class ThrottleAction(Enum):
     """节流动作枚举"""
@@ -42,9 +45,14 @@ class NotificationRequest:
     priority: NotificationPriority
     content: Dict[str, Any]
     created_at: float = field(default_factory=time.time)
+    # 内容哈希缓存，同一请求的各项检查只计算一次
+    _content_hash: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def get_content_hash(self) -> str:
         """获取内容哈希，用于检测重复通知"""
+        if self._content_hash is not None:
+            return self._content_hash
+            
         # 使用更稳定的内容来生成哈希
         key_content = {
             'event_type': self.event_type,
@@ -55,7 +63,31 @@ class NotificationRequest:
             'title': self.content.get('title', ''),
         }
         content_str = '|'.join(f"{k}:{v}" for k, v in key_content.items())
-        return hashlib.md5(content_str.encode('utf-8')).hexdigest()[:8]
+        self._content_hash = hashlib.md5(content_str.encode('utf-8')).hexdigest()[:8]
+        return self._content_hash
+        
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化（用于共享延迟队列）"""
+        return {
+            'notification_id': self.notification_id,
+            'event_type': self.event_type,
+            'channel': self.channel,
+            'priority': self.priority.name,
+            'content': self.content,
+            'created_at': self.created_at
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'NotificationRequest':
+        """从 to_dict() 的结果恢复"""
+        return cls(
+            notification_id=data['notification_id'],
+            event_type=data['event_type'],
+            channel=data['channel'],
+            priority=NotificationPriority[data['priority']],
+            content=data['content'],
+            created_at=data['created_at']
+        )
 
 
 class NotificationThrottle:
@@ -73,14 +105,20 @@ class NotificationThrottle:
         # 频率限制配置
         self.rate_limits = self._load_rate_limits()
         
-        # 通知历史记录 (使用deque自动限制大小)
-        self.notification_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
-        
-        # 重复检测缓存
-        self.duplicate_cache: Dict[str, Tuple[float, int]] = {}  # hash -> (last_time, count)
-        
-        # 延迟队列
-        self.delayed_notifications: List[Tuple[float, NotificationRequest]] = []
+        # 通知历史、重复检测缓存和延迟队列：默认保存在进程内，
+        # 启用 persistence 后由多个进程通过 SQLite 共享
+        throttle_config = self.config.get('intelligent_limiting', {}).get('notification_throttle', {})
+        self.store = create_throttle_store(throttle_config.get('persistence', {}))
+        
+        # 重复检测：按时间分片的 Bloom 过滤器，内存固定；共享存储时映射到同目录的文件
+        self.duplicate_window = throttle_config.get('duplicate_window', 300)
+        shared_path = None
+        if self.shared:
+            shared_path = os.path.splitext(self.store.db_path)[0] + '.dedup'
+        with self.store.transaction():
+            self.duplicate_filter = create_duplicate_filter(
+                self.duplicate_window, throttle_config.get('duplicate_filter', {}), shared_path
+            )
         
         # 统计信息
         self.stats = {
@@ -91,9 +129,6 @@ class NotificationThrottle:
             'duplicates_filtered': 0
         }
         
-        # 自动清理定时器
-        self._last_cleanup = time.time()
-        
     def _load_rate_limits(self) -> Dict[str, Dict[str, Any]]:
         """加载频率限制配置"""
         # 默认轻量级限制配置
@@ -157,71 +192,64 @@ class NotificationThrottle:
         self._periodic_cleanup()
         
         try:
-            # 1. 检查重复通知
-            duplicate_result = self._check_duplicate(request)
-            if duplicate_result[0] != ThrottleAction.ALLOW:
-                return duplicate_result
-                
-            # 2. 检查全局频率限制
-            global_result = self._check_global_limits(request)
-            if global_result[0] != ThrottleAction.ALLOW:
-                return global_result
-                
-            # 3. 检查渠道特定限制
-            channel_result = self._check_channel_limits(request)
-            if channel_result[0] != ThrottleAction.ALLOW:
-                return channel_result
-                
-            # 4. 检查事件特定限制
-            event_result = self._check_event_limits(request)
-            if event_result[0] != ThrottleAction.ALLOW:
-                return event_result
-                
-            # 5. 检查优先级权重
-            priority_result = self._check_priority_limits(request)
-            if priority_result[0] != ThrottleAction.ALLOW:
-                return priority_result
-                
-            # 6. 记录通知并允许
-            self._record_notification(request)
-            self.stats['allowed'] += 1
-            return ThrottleAction.ALLOW, "通知已允许发送", None
-            
+            # 检查和记录在同一事务中完成，并发进程不会同时通过同一个限制
+            with self.store.transaction():
+                return self._evaluate(request)
         except Exception as e:
             self.logger.error(f"节流检查异常: {e}")
             # 出错时默认允许，但记录错误
             return ThrottleAction.ALLOW, f"节流检查异常，默认允许: {str(e)}", None
+            
+    def _evaluate(self, request: NotificationRequest) -> Tuple[ThrottleAction, str, Optional[float]]:
+        """依次执行各项检查"""
+        # 1. 检查重复通知
+        duplicate_result = self._check_duplicate(request)
+        if duplicate_result[0] != ThrottleAction.ALLOW:
+            return duplicate_result
+            
+        # 2. 检查全局频率限制
+        global_result = self._check_global_limits(request)
+        if global_result[0] != ThrottleAction.ALLOW:
+            return global_result
+            
+        # 3. 检查渠道特定限制
+        channel_result = self._check_channel_limits(request)
+        if channel_result[0] != ThrottleAction.ALLOW:
+            return channel_result
+            
+        # 4. 检查事件特定限制
+        event_result = self._check_event_limits(request)
+        if event_result[0] != ThrottleAction.ALLOW:
+            return event_result
+            
+        # 5. 检查优先级权重
+        priority_result = self._check_priority_limits(request)
+        if priority_result[0] != ThrottleAction.ALLOW:
+            return priority_result
+            
+        # 6. 记录通知并允许
+        self._record_notification(request)
+        self.stats['allowed'] += 1
+        return ThrottleAction.ALLOW, "通知已允许发送", None
         
     def _check_duplicate(self, request: NotificationRequest) -> Tuple[ThrottleAction, str, Optional[float]]:
         """检查重复通知"""
         content_hash = request.get_content_hash()
         current_time = time.time()
         
-        # 配置重复检测窗口（默认5分钟）
-        duplicate_window = self.config.get('intelligent_limiting', {}).get('notification_throttle', {}).get('duplicate_window', 300)
+        # 窗口内出现次数（过滤器只会高估，不会漏判重复）
+        count = self.duplicate_filter.count(content_hash, current_time)
+        self.duplicate_filter.add(content_hash, current_time)
         
-        if content_hash in self.duplicate_cache:
-            last_time, count = self.duplicate_cache[content_hash]
-            
-            # 在重复窗口内
-            if current_time - last_time < duplicate_window:
-                # 更新计数
-                self.duplicate_cache[content_hash] = (current_time, count + 1)
-                
-                # 关键通知允许少量重复
-                if request.priority == NotificationPriority.CRITICAL and count < 3:
-                    self._record_notification(request)
-                    self.stats['allowed'] += 1
-                    return ThrottleAction.ALLOW, f"关键重复通知(#{count + 1})", None
+        if count > 0:
+            # 关键通知允许少量重复
+            if request.priority == NotificationPriority.CRITICAL and count < 3:
+                self._record_notification(request)
+                self.stats['allowed'] += 1
+                return ThrottleAction.ALLOW, f"关键重复通知(#{count + 1})", None
                 
-                self.stats['duplicates_filtered'] += 1
-                return ThrottleAction.BLOCK, f"重复通知已过滤(#{count + 1})", None
-            else:
-                # 超出重复窗口，重置计数
-                self.duplicate_cache[content_hash] = (current_time, 1)
-        else:
-            # 首次出现
-            self.duplicate_cache[content_hash] = (current_time, 1)
+            self.stats['duplicates_filtered'] += 1
+            return ThrottleAction.BLOCK, f"重复通知已过滤(#{count + 1})", None
             
         return ThrottleAction.ALLOW, "", None
         
@@ -327,17 +355,12 @@ class NotificationThrottle:
         
     def _get_notification_count(self, key: str, window_seconds: int) -> int:
         """获取指定时间窗口内的通知计数"""
-        current_time = time.time()
-        cutoff_time = current_time - window_seconds
-        
-        history = self.notification_history[key]
-        count = sum(1 for timestamp in history if timestamp >= cutoff_time)
-        return count
+        return self.store.count_since(key, time.time() - window_seconds)
         
     def _get_last_notification_time(self, key: str) -> Optional[float]:
         """获取最后一次通知时间"""
-        history = self.notification_history[key]
-        return history[-1] if history else None
+        recent = self.store.recent_times(key, 1)
+        return recent[-1] if recent else None
         
     def _calculate_delay(self, key: str, window_seconds: int) -> float:
         """计算合适的延迟时间"""
@@ -345,13 +368,8 @@ class NotificationThrottle:
         if current_count == 0:
             return 0
             
-        # 基于当前频率计算延迟
-        history = self.notification_history[key]
-        if len(history) < 2:
-            return 1.0
-            
-        # 计算平均间隔
-        recent_times = list(history)[-min(10, len(history)):]
+        # 基于当前频率计算延迟，计算最近10次的平均间隔
+        recent_times = self.store.recent_times(key, 10)
         if len(recent_times) < 2:
             return 1.0
             
@@ -378,9 +396,10 @@ class NotificationThrottle:
         current_time = time.time()
         
         # 记录到各种历史中
-        self.notification_history['global'].append(current_time)
-        self.notification_history[f'channel:{request.channel}'].append(current_time)
-        self.notification_history[f'event:{request.event_type}'].append(current_time)
+        self.store.record(
+            ['global', f'channel:{request.channel}', f'event:{request.event_type}'],
+            current_time
+        )
         
     def add_delayed_notification(self, request: NotificationRequest, delay_seconds: float):
         """添加延迟通知
@@ -390,7 +409,7 @@ class NotificationThrottle:
             delay_seconds: 延迟秒数
         """
         execute_at = time.time() + delay_seconds
-        self.delayed_notifications.append((execute_at, request))
+        self.store.push_delayed(execute_at, request.to_dict())
         self.logger.debug(f"添加延迟通知: {request.notification_id}，延迟{delay_seconds:.1f}秒")
         
     def get_ready_notifications(self) -> List[NotificationRequest]:
@@ -399,24 +418,25 @@ class NotificationThrottle:
         Returns:
             准备发送的通知请求列表
         """
-        current_time = time.time()
-        ready_notifications = []
-        
-        # 分离准备好的和未准备好的通知
-        remaining_notifications = []
-        for execute_at, request in self.delayed_notifications:
-            if execute_at <= current_time:
-                ready_notifications.append(request)
-            else:
-                remaining_notifications.append((execute_at, request))
-                
-        self.delayed_notifications = remaining_notifications
+        ready_notifications = [
+            NotificationRequest.from_dict(payload)
+            for payload in self.store.pop_ready(time.time())
+        ]
         
         if ready_notifications:
             self.logger.debug(f"获取到{len(ready_notifications)}个延迟通知可以发送")
             
         return ready_notifications
         
+    def next_delayed_at(self) -> Optional[float]:
+        """最早的延迟通知执行时间，没有延迟通知时返回 None"""
+        return self.store.next_due()
+        
+    @property
+    def shared(self) -> bool:
+        """状态是否与其他进程共享"""
+        return not isinstance(self.store, MemoryThrottleStore)
+        
     def get_throttle_stats(self) -> Dict[str, Any]:
         """获取节流统计信息
         
@@ -430,9 +450,9 @@ class NotificationThrottle:
             'stats': self.stats.copy(),
             'current_load': current_load,
             'load_status': self._get_load_status(current_load),
-            'delayed_count': len(self.delayed_notifications),
-            'duplicate_cache_size': len(self.duplicate_cache),
-            'active_channels': len([k for k in self.notification_history.keys() if k.startswith('channel:') and self.notification_history[k]]),
+            **self.store.get_sizes(),
+            'duplicate_filter': self.duplicate_filter.get_status(),
+            'shared': self.shared,
             'recent_activity': {
                 'global_1min': self._get_notification_count('global', 60),
                 'global_5min': self._get_notification_count('global', 300),
@@ -455,38 +475,17 @@ class NotificationThrottle:
         
     def _periodic_cleanup(self):
         """定期清理缓存"""
-        current_time = time.time()
-        
-        # 每5分钟清理一次
-        if current_time - self._last_cleanup > 300:
+        # 每5分钟清理一次（共享存储时由任一进程完成）
+        if self.store.claim_cleanup(time.time(), 300):
             self.cleanup_cache()
-            self._last_cleanup = current_time
             
     def cleanup_cache(self):
         """清理过期缓存"""
-        current_time = time.time()
-        
-        # 清理重复检测缓存（保留1小时）
-        expired_hashes = [
-            h for h, (last_time, _) in self.duplicate_cache.items()
-            if current_time - last_time > 3600
-        ]
-        
-        for h in expired_hashes:
-            del self.duplicate_cache[h]
-            
-        self.logger.debug(f"清理了{len(expired_hashes)}个过期的重复检测缓存")
-        
-        # 清理过期的延迟通知（超过1小时的）
-        original_delayed_count = len(self.delayed_notifications)
-        self.delayed_notifications = [
-            (execute_at, request) for execute_at, request in self.delayed_notifications
-            if execute_at > current_time - 3600
-        ]
+        # 清理过期的通知历史和延迟通知（超过1小时的）；重复检测过滤器的时间片自动复用
+        purged = self.store.purge(time.time(), delayed_ttl=3600)
         
-        cleaned_delayed = original_delayed_count - len(self.delayed_notifications)
-        if cleaned_delayed > 0:
-            self.logger.debug(f"清理了{cleaned_delayed}个过期的延迟通知")
+        if purged['delayed'] > 0:
+            self.logger.debug(f"清理了{purged['delayed']}个过期的延迟通知")
             
     def reset_stats(self):
         """重置统计信息"""
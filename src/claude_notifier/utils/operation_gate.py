@@ -7,7 +7,10 @@
 从原有utils/operation_gate.py迁移而来，适配新轻量化架构
 """
 
+import re
 import time
+import heapq
+import itertools
 import logging
 import threading
 from datetime import datetime, timedelta
@@ -16,6 +19,9 @@ from enum import Enum
 from dataclasses import dataclass, field
 
 from .time_utils import RateLimitTracker
+from .pattern_matcher import PatternMatcher
+from .usage_store import create_usage_store
+from .delayed_dispatcher import DeadlineDispatcher
 
 
 class OperationResult(Enum):
@@ -55,16 +61,25 @@ class OperationGate:
             config: 配置字典
         """
         self.config = config
-        self.rate_tracker = RateLimitTracker()
+        
+        # 开启持久化后使用量在钩子进程之间共享，重启后仍计入限流
+        gate_config = config.get('intelligent_limiting', {}).get('operation_gate', {})
+        self.rate_tracker = RateLimitTracker(store=create_usage_store(gate_config.get('persistence')))
         self.logger = logging.getLogger(self.__class__.__name__)
         
         # 阻止策略配置
         self.blocking_strategies = self._load_blocking_strategies()
         
-        # 操作队列和延迟执行
-        self.operation_queue: List[OperationRequest] = []
-        self.delayed_operations: List[Tuple[float, OperationRequest]] = []
+        # 操作队列和延迟执行（最小堆）
+        # operation_queue: (-优先级, 序号, 请求)，同优先级按加入顺序
+        # delayed_operations: (执行时间, 序号, 请求)
+        self.operation_queue: List[Tuple[int, int, OperationRequest]] = []
+        self.delayed_operations: List[Tuple[float, int, OperationRequest]] = []
         self.queue_lock = threading.RLock()
+        self._sequence = itertools.count()
+        
+        # 策略关键词编译后的匹配器: 策略名 -> (关键词元组, 匹配器)
+        self._matchers: Dict[str, Tuple[tuple, PatternMatcher]] = {}
         
         # 执行统计
         self.blocked_count = 0
@@ -75,8 +90,8 @@ class OperationGate:
         # 控制标志
         self._running = True
         
-        # 启动后台处理器
-        self._start_background_processor()
+        # 后台处理线程在首个操作入队时启动，睡眠到下一个操作可执行
+        self.processor = OperationGateDispatcher(self)
         
     def _load_blocking_strategies(self) -> Dict[str, Dict[str, Any]]:
         """加载阻止策略配置"""
@@ -169,27 +184,25 @@ class OperationGate:
             self.logger.error(f"操作检查异常: {e}")
             return OperationResult.BLOCKED, f"操作检查失败: {str(e)}"
         
+    def _get_matcher(self, strategy_name: str) -> PatternMatcher:
+        """策略关键词的组合匹配器，关键词被 configure_strategy 修改后重新编译"""
+        patterns = tuple(self.blocking_strategies[strategy_name]['patterns'])
+        cached = self._matchers.get(strategy_name)
+        if cached is None or cached[0] != patterns:
+            # 关键词按字面匹配（忽略大小写）
+            matcher = PatternMatcher({pattern: re.escape(pattern) for pattern in patterns})
+            cached = self._matchers[strategy_name] = (patterns, matcher)
+        return cached[1]
+        
     def _is_critical_operation(self, request: OperationRequest) -> bool:
         """检查是否为关键危险操作"""
-        operation_text = str(request.context.get('command', '')).lower()
-        patterns = self.blocking_strategies['critical_operations']['patterns']
-        
-        for pattern in patterns:
-            if pattern.lower() in operation_text:
-                return True
-                
-        return False
+        operation_text = str(request.context.get('command', ''))
+        return self._get_matcher('critical_operations').search(operation_text) is not None
         
     def _is_sensitive_operation(self, request: OperationRequest) -> bool:
         """检查是否为敏感操作"""
-        operation_text = str(request.context.get('command', '')).lower()
-        patterns = self.blocking_strategies['sensitive_operations']['patterns']
-        
-        for pattern in patterns:
-            if pattern.lower() in operation_text:
-                return True
-                
-        return False
+        operation_text = str(request.context.get('command', ''))
+        return self._get_matcher('sensitive_operations').search(operation_text) is not None
         
     def _is_resource_intensive(self, request: OperationRequest) -> bool:
         """检查是否为资源密集型操作"""
@@ -229,9 +242,7 @@ class OperationGate:
         # 延迟执行
         execute_at = time.time() + delay_seconds
         
-        with self.queue_lock:
-            self.delayed_operations.append((execute_at, request))
-            self.deferred_count += 1
+        self._defer_operation(request, execute_at)
             
         message = f"{strategy_config['message']}，将在{delay_seconds}秒后执行"
         self.logger.info(f"敏感操作延迟: {request.operation_id}")
@@ -243,16 +254,15 @@ class OperationGate:
         max_concurrent = strategy_config.get('max_concurrent', 3)
         
         # 检查当前并发数
-        current_concurrent = len([op for op in self.operation_queue 
-                                if op.operation_type == request.operation_type])
+        with self.queue_lock:
+            current_concurrent = sum(1 for _, _, op in self.operation_queue
+                                     if op.operation_type == request.operation_type)
                                 
         if current_concurrent >= max_concurrent:
             throttle_delay = strategy_config.get('throttle_delay', 2)
             execute_at = time.time() + throttle_delay
             
-            with self.queue_lock:
-                self.delayed_operations.append((execute_at, request))
-                self.deferred_count += 1
+            self._defer_operation(request, execute_at)
                 
             message = f"资源使用已达上限，操作将延迟{throttle_delay}秒执行"
             return OperationResult.DEFERRED, message
@@ -272,10 +282,11 @@ class OperationGate:
                 self.blocked_count += 1
                 return OperationResult.BLOCKED, "队列已满，操作被阻止"
                 
-            self.operation_queue.append(request)
+            heapq.heappush(self.operation_queue, (-request.priority, next(self._sequence), request))
             self.queued_count += 1
+            position = len(self.operation_queue)
             
-        position = len(self.operation_queue)
+        self.processor.wake()
         message = f"操作已加入队列，当前位置: {position}"
         return OperationResult.QUEUED, message
         
@@ -286,51 +297,54 @@ class OperationGate:
         
         execute_at = time.time() + throttle_delay
         
-        with self.queue_lock:
-            self.delayed_operations.append((execute_at, request))
-            self.deferred_count += 1
+        self._defer_operation(request, execute_at)
             
         message = f"操作被节流，将在{throttle_delay}秒后执行"
         return OperationResult.DEFERRED, message
         
-    def _start_background_processor(self):
-        """启动后台处理器"""
-        def process_operations():
-            while self._running:
-                try:
-                    self._process_delayed_operations()
-                    self._process_queue()
-                    time.sleep(0.5)  # 500ms检查间隔
-                    
-                except Exception as e:
-                    self.logger.error(f"后台处理器异常: {e}")
-                    time.sleep(1)
-                    
-        processor_thread = threading.Thread(target=process_operations, daemon=True)
-        processor_thread.start()
-        self.logger.info("操作门后台处理器已启动")
-        
-    def _process_delayed_operations(self):
-        """处理延迟操作"""
-        if not self.delayed_operations:
-            return
+    def _defer_operation(self, request: OperationRequest, execute_at: float):
+        """将操作加入延迟堆并唤醒后台处理线程"""
+        with self.queue_lock:
+            heapq.heappush(self.delayed_operations, (execute_at, next(self._sequence), request))
+            self.deferred_count += 1
             
+        self.processor.wake()
+        
+    def next_operation_at(self) -> Optional[float]:
+        """下一个操作可执行的时间，没有待执行操作时返回 None
+        
+        延迟操作取堆顶的执行时间；排队操作在分钟级限流重新有额度时可执行。
+        """
+        with self.queue_lock:
+            due_times = []
+            if self.delayed_operations:
+                due_times.append(self.delayed_operations[0][0])
+            if self.operation_queue:
+                due_times.append(time.time() + self.rate_tracker.seconds_until_available('minute'))
+                
+        return min(due_times) if due_times else None
+        
+    def pop_ready_operations(self) -> List[OperationRequest]:
+        """取出到期的延迟操作和限流额度内优先级最高的排队操作"""
         current_time = time.time()
-        ready_operations = []
+        ready = []
         
         with self.queue_lock:
-            # 分离准备执行和继续等待的操作
-            remaining_operations = []
-            for exec_time, operation in self.delayed_operations:
-                if exec_time <= current_time:
-                    ready_operations.append(operation)
-                else:
-                    remaining_operations.append((exec_time, operation))
+            while self.delayed_operations and self.delayed_operations[0][0] <= current_time:
+                ready.append(heapq.heappop(self.delayed_operations)[2])
+                
+            if self.operation_queue:
+                # 延迟操作执行时同样占用限流额度
+                remaining = self.rate_tracker.check_rate_limit('minute')['remaining'] - len(ready)
+                while self.operation_queue and remaining > 0:
+                    ready.append(heapq.heappop(self.operation_queue)[2])
+                    remaining -= 1
                     
-            self.delayed_operations = remaining_operations
-            
-        # 执行准备好的操作
-        for operation in ready_operations:
+        return ready
+        
+    def _process_delayed_operations(self):
+        """处理延迟操作和队列中的操作"""
+        for operation in self.pop_ready_operations():
             self._execute_delayed_operation(operation)
             
     def _execute_delayed_operation(self, operation: OperationRequest):
@@ -348,23 +362,6 @@ class OperationGate:
         except Exception as e:
             self.logger.error(f"执行延迟操作失败 {operation.operation_id}: {e}")
             
-    def _process_queue(self):
-        """处理队列中的操作"""
-        if not self.operation_queue:
-            return
-            
-        # 检查是否可以处理队列中的操作
-        rate_status = self.rate_tracker.check_rate_limit('minute')
-        if rate_status['remaining'] <= 0:
-            return
-            
-        with self.queue_lock:
-            if self.operation_queue:
-                # 按优先级排序后取出第一个操作
-                self.operation_queue.sort(key=lambda op: op.priority, reverse=True)
-                operation = self.operation_queue.pop(0)
-                self._execute_delayed_operation(operation)
-                
     def get_gate_status(self) -> Dict[str, Any]:
         """获取门控状态"""
         with self.queue_lock:
@@ -376,6 +373,7 @@ class OperationGate:
             'rate_limits': self.rate_tracker.get_all_limits_status(),
             'queue_length': queue_length,
             'delayed_operations': delayed_length,
+            'processor': self.processor.get_status(),
             'statistics': {
                 'total_allowed': self.allowed_count,
                 'total_blocked': self.blocked_count,
@@ -405,18 +403,12 @@ class OperationGate:
         
         with self.queue_lock:
             # 从队列中移除
-            original_queue_len = len(self.operation_queue)
-            self.operation_queue = [op for op in self.operation_queue 
-                                  if op.operation_id != operation_id]
-            if len(self.operation_queue) < original_queue_len:
-                removed = True
-                                  
-            # 从延迟操作中移除
-            original_delayed_len = len(self.delayed_operations)
-            self.delayed_operations = [(exec_time, op) for exec_time, op in self.delayed_operations
-                                     if op.operation_id != operation_id]
-            if len(self.delayed_operations) < original_delayed_len:
-                removed = True
+            for heap in (self.operation_queue, self.delayed_operations):
+                remaining = [entry for entry in heap if entry[2].operation_id != operation_id]
+                if len(remaining) < len(heap):
+                    heap[:] = remaining
+                    heapq.heapify(heap)
+                    removed = True
                                      
         if removed:
             self.logger.info(f"操作已取消: {operation_id}")
@@ -426,6 +418,7 @@ class OperationGate:
     def emergency_stop(self):
         """紧急停止所有操作"""
         self._running = False
+        self.processor.shutdown()
         
         with self.queue_lock:
             blocked_ops = len(self.operation_queue) + len(self.delayed_operations)
@@ -439,7 +432,7 @@ class OperationGate:
         """恢复操作门"""
         if not self._running:
             self._running = True
-            self._start_background_processor()
+            self.processor.wake()
             self.logger.info("操作门已恢复运行")
             
     def configure_strategy(self, strategy_name: str, **kwargs):
@@ -453,4 +446,29 @@ class OperationGate:
             self.blocking_strategies[strategy_name].update(kwargs)
             self.logger.info(f"策略已更新: {strategy_name}")
         else:
-            self.logger.warning(f"未知策略: {strategy_name}")
\ No newline at end of file
+            self.logger.warning(f"未知策略: {strategy_name}")
+
+
+class OperationGateDispatcher(DeadlineDispatcher):
+    """操作门后台处理线程：睡眠到下一个延迟操作到期或排队操作获得限流额度"""
+    
+    def __init__(self, gate: OperationGate):
+        """初始化处理线程
+        
+        Args:
+            gate: 操作门控制器
+        """
+        super().__init__(gate._execute_delayed_operation)
+        self.gate = gate
+        
+    def _next_due(self) -> Optional[float]:
+        return self.gate.next_operation_at()
+        
+    def _pop_ready(self) -> List[OperationRequest]:
+        return self.gate.pop_ready_operations()
+        
+    def _is_shared(self) -> bool:
+        return False
+        
+    def _drain(self, deadline: float):
+        """进程退出时未到期的操作随进程结束"""
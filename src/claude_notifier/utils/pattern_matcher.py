@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多模式匹配器
+从每条正则规则中提取开头的字面量锚点，所有锚点合并为一个字典树正则。一次扫描文本
+找出锚点出现的位置，只在这些位置用对应规则做锚定匹配，并报告命中的规则；规则数增加
+不会增加对文本的完整扫描次数。没有字面量锚点的规则单独匹配。
+"""
+
+import re
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+
+# 规则开头遇到这些字符时锚点结束
+_META = set('.^$[]()|\\')
+# 量词：作用于前一个字符
+_QUANTIFIERS = set('*+?{')
+
+
+def _has_top_level_branch(pattern: str) -> bool:
+    """规则是否在最外层使用 |（此时开头的字面量不是必需的）"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def literal_prefix(pattern: str) -> str:
+    """规则任一匹配都必须以之开头的字面量前缀（无法确定时返回空字符串）"""
+    if _has_top_level_branch(pattern):
+        return ''
+
+    prefix: List[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char in _QUANTIFIERS:
+            # 前一个字符可以不出现（+ 至少出现一次，保留）
+            if char != '+' and prefix:
+                prefix.pop()
+            break
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            # \s、\d、\b、\1 等不是字面量
+            if not escaped or escaped.isalnum():
+                break
+            prefix.append(escaped)
+            i += 2
+            continue
+        if char in _META:
+            break
+        prefix.append(char)
+        i += 1
+    return ''.join(prefix)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """将一组字面量编译为字典树形式的正则，按首字符分支，避免逐个尝试"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class PatternMatcher:
+    """多条正则规则的组合匹配器"""
+
+    def __init__(self, rules: Union[Dict[str, str], Iterable[str]], flags: int = re.IGNORECASE):
+        """编译规则
+
+        Args:
+            rules: 规则名 -> 正则表达式；传入列表时以表达式本身作为规则名
+            flags: 正则标志，默认忽略大小写
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if not isinstance(rules, dict):
+            rules = {pattern: pattern for pattern in rules}
+
+        self.flags = flags
+        self._fold = bool(flags & re.IGNORECASE)
+
+        # 逐条校验，跳过无效规则
+        self.rules: Dict[str, re.Pattern] = {}
+        for name, pattern in rules.items():
+            try:
+                self.rules[name] = re.compile(pattern, flags)
+            except re.error as e:
+                self.logger.warning(f"忽略无效的匹配规则 {name!r}: {e}")
+
+        # 锚点 -> 规则名；无锚点的规则逐条匹配
+        self._anchored: Dict[str, List[str]] = {}
+        self._unanchored: List[str] = []
+        for name, regex in self.rules.items():
+            anchor = '' if flags & re.VERBOSE else literal_prefix(regex.pattern)
+            if anchor:
+                self._anchored.setdefault(anchor.lower() if self._fold else anchor, []).append(name)
+            else:
+                self._unanchored.append(name)
+
+        self._anchor_lengths = sorted({len(anchor) for anchor in self._anchored})
+        self._scanner = re.compile(_trie_regex(self._anchored)) if self._anchored else None
+
+    def _prepare(self, text: str) -> str:
+        # 忽略大小写时统一转为小写，锚点扫描无需 IGNORECASE（快一个数量级）
+        return text.lower() if self._fold else text
+
+    def _anchor_hits(self, text: str, exclude: Set[str]) -> Iterator[str]:
+        """按位置顺序产生在锚点处命中的规则名（跳过 exclude 中的规则）"""
+        scanner = self._scanner
+        if scanner is None:
+            return
+
+        position = 0
+        while True:
+            match = scanner.search(text, position)
+            if match is None:
+                return
+            start = match.start()
+            # 同一位置可能出现多个长度不同的锚点
+            for length in self._anchor_lengths:
+                for name in self._anchored.get(text[start:start + length], ()):
+                    if name not in exclude and self.rules[name].match(text, start):
+                        yield name
+            position = start + 1
+
+    def search(self, text: str) -> Optional[str]:
+        """返回命中的任一规则名，未命中返回 None"""
+        if not text or not self.rules:
+            return None
+
+        text = self._prepare(text)
+        for name in self._anchor_hits(text, set()):
+            return name
+        for name in self._unanchored:
+            if self.rules[name].search(text):
+                return name
+        return None
+
+    def matches(self, text: str) -> Set[str]:
+        """返回文本命中的所有规则名"""
+        if not text or not self.rules:
+            return set()
+
+        text = self._prepare(text)
+        hits: Set[str] = set()
+        for name in self._anchor_hits(text, hits):
+            hits.add(name)
+        hits.update(name for name in self._unanchored if self.rules[name].search(text))
+        return hits
+
+    def __len__(self) -> int:
+        return len(self.rules)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+通知频率控制状态存储
+- MemoryThrottleStore: 进程内存储（默认），频率计数使用按秒分桶的滑动窗口计数器
+- SQLiteThrottleStore: 基于 SQLite (WAL 模式，SQLiteStateStore) 的共享存储，多个钩子进程和并行会话
+  共享同一份频率计数和延迟队列（重复检测过滤器见 dedup_filter），每次检查在一个写事务中原子完成
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import logging
+import itertools
+import threading
+from array import array
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+
+# 历史记录的最长保留时间（秒），与最大的频率窗口（每小时）一致
+HISTORY_RETENTION = 3600
+
+# 每个键保留的最近通知时间数（用于冷却判断和延迟估算）
+RECENT_TIMES = 10
+
+
+class SlidingWindowCounter:
+    """按时间分桶的滑动窗口计数器
+
+    环形数组的每个桶保存截至该时间段的累计通知数，任意不超过保留时长的窗口计数
+    都是两个累计值之差，查询为 O(1)；记录时只补齐自上次记录以来跳过的桶，
+    均摊 O(1)。计数精度为一个桶（与 cutoff 同一桶内的通知也计入窗口）。
+    """
+
+    def __init__(self, retention: int = HISTORY_RETENTION, resolution: int = 1):
+        """初始化计数器
+
+        Args:
+            retention: 可查询的最长窗口（秒）
+            resolution: 每个桶覆盖的秒数
+        """
+        self.resolution = resolution
+        # 保留时长内的桶，加上 cutoff 所在桶之前的一个桶（查询以其累计值为基准）
+        self.size = -(-int(retention) // resolution) + 2
+        self.cumulative = array('q', bytes(8 * self.size))
+        self.total = 0
+        self.last_bucket = None
+        self.recent: deque = deque(maxlen=RECENT_TIMES)
+
+    @property
+    def last_second(self) -> Optional[int]:
+        """最近一次记录所在桶的起始时间"""
+        return None if self.last_bucket is None else self.last_bucket * self.resolution
+
+    def add(self, timestamp: float, count: int = 1):
+        """记录 count 次通知"""
+        bucket = int(timestamp // self.resolution)
+        last = self.last_bucket
+        if last is None:
+            last = bucket - 1
+        elif bucket < last:
+            # 时钟回拨或线程交错，计入最近一个桶
+            bucket = last
+
+        # 跳过的桶沿用之前的累计值
+        for skipped in range(max(last + 1, bucket - self.size + 1), bucket):
+            self.cumulative[skipped % self.size] = self.total
+
+        self.total += count
+        self.cumulative[bucket % self.size] = self.total
+        self.last_bucket = bucket
+        self.recent.append(timestamp)
+
+    def count_since(self, cutoff: float) -> int:
+        """统计 cutoff 所在桶及之后的通知数"""
+        last = self.last_bucket
+        if last is None:
+            return 0
+
+        before = int(cutoff // self.resolution) - 1
+        if before >= last:
+            return 0
+
+        # 超出保留时长的窗口按环形数组中最早的桶计算
+        before = max(before, last - self.size + 1)
+        return self.total - self.cumulative[before % self.size]
+
+    def seconds_until_below(self, limit: int, window: float, now: float) -> float:
+        """距离窗口计数降到 limit 以下的秒数，当前已低于 limit 时返回 0"""
+        if limit <= 0:
+            return float(window)
+        if self.count_since(now - window) < limit:
+            return 0.0
+
+        # 累计值单调不减：二分查找第一个累计值超过 total - limit 的桶，
+        # 该桶移出窗口后计数降到 limit - 1
+        threshold = self.total - limit
+        low, high = self.last_bucket - self.size + 2, self.last_bucket
+        while low < high:
+            middle = (low + high) // 2
+            if self.cumulative[middle % self.size] > threshold:
+                high = middle
+            else:
+                low = middle + 1
+        return max(0.0, (low + 1) * self.resolution + window - now)
+
+
+class MemoryThrottleStore:
+    """进程内频率控制状态"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # 通知计数: key -> 滑动窗口计数器（覆盖完整的小时窗口）
+        self.history: Dict[str, SlidingWindowCounter] = defaultdict(SlidingWindowCounter)
+        # 延迟队列: 按执行时间排列的最小堆 (execute_at, seq, payload)
+        self.delayed: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._delayed_seq = itertools.count()
+        self._last_cleanup = time.time()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """在一个原子操作中完成检查和记录"""
+        with self._lock:
+            yield
+
+    def record(self, keys: List[str], timestamp: float):
+        """记录一次通知"""
+        with self._lock:
+            for key in keys:
+                self.history[key].add(timestamp)
+
+    def count_since(self, key: str, cutoff: float) -> int:
+        """统计 cutoff 之后的通知数"""
+        with self._lock:
+            counter = self.history.get(key)
+            return counter.count_since(cutoff) if counter else 0
+
+    def recent_times(self, key: str, limit: int) -> List[float]:
+        """最近 limit 次通知时间（升序，最多 RECENT_TIMES 次）"""
+        with self._lock:
+            counter = self.history.get(key)
+            if counter is None:
+                return []
+            return list(counter.recent)[-limit:]
+
+    def push_delayed(self, execute_at: float, payload: Dict[str, Any]):
+        """加入延迟队列"""
+        with self._lock:
+            heapq.heappush(self.delayed, (execute_at, next(self._delayed_seq), payload))
+
+    def pop_ready(self, now: float) -> List[Dict[str, Any]]:
+        """按执行时间顺序取出到期的延迟通知"""
+        with self._lock:
+            ready = []
+            while self.delayed and self.delayed[0][0] <= now:
+                ready.append(heapq.heappop(self.delayed)[2])
+            return ready
+
+    def next_due(self) -> Optional[float]:
+        """最早的延迟通知执行时间"""
+        with self._lock:
+            return self.delayed[0][0] if self.delayed else None
+
+    def claim_cleanup(self, now: float, interval: float) -> bool:
+        """距上次清理超过 interval 秒时返回 True 并记录本次清理时间"""
+        with self._lock:
+            if now - self._last_cleanup <= interval:
+                return False
+            self._last_cleanup = now
+            return True
+
+    def purge(self, now: float, delayed_ttl: float = 3600) -> Dict[str, int]:
+        """清理过期的计数器和延迟通知"""
+        with self._lock:
+            idle = [k for k, v in self.history.items() if v.last_second < now - HISTORY_RETENTION]
+            for k in idle:
+                del self.history[k]
+
+            original = len(self.delayed)
+            self.delayed = [item for item in self.delayed if item[0] > now - delayed_ttl]
+            heapq.heapify(self.delayed)
+            return {'delayed': original - len(self.delayed)}
+
+    def get_sizes(self) -> Dict[str, int]:
+        """获取存储规模"""
+        cutoff = time.time() - HISTORY_RETENTION
+        with self._lock:
+            return {
+                'delayed_count': len(self.delayed),
+                'active_channels': len([k for k, v in self.history.items()
+                                        if k.startswith('channel:') and v.count_since(cutoff)])
+            }
+
+
+class SQLiteStateStore:
+    """SQLite (WAL 模式) 跨进程状态存储基类
+
+    每个线程使用独立连接，写操作在 BEGIN IMMEDIATE 事务中串行化。
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        """打开数据库并创建表
+
+        Args:
+            path: 数据库文件路径
+        """
+        self.db_path = os.path.expanduser(path)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        # 每个线程 (及 fork 出的子进程) 使用独立连接
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # 限流和分组状态丢失最近一次提交可以接受，避免每次提交 fsync
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """写事务（可嵌套）：检查和修改对其他进程原子可见"""
+        conn = self._connect()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            self._local.depth = 0
+            conn.execute('ROLLBACK')
+            raise
+        self._local.depth = 0
+        conn.execute('COMMIT')
+
+
+class SQLiteThrottleStore(SQLiteStateStore):
+    """SQLite 共享频率控制状态
+
+    所有进程共享同一个数据库文件：检查和记录在 BEGIN IMMEDIATE 事务中完成，
+    并发的钩子进程不会同时通过同一个频率限制。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS throttle_events (
+            key TEXT NOT NULL,
+            ts REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_throttle_events ON throttle_events (key, ts);
+        CREATE INDEX IF NOT EXISTS idx_throttle_events_ts ON throttle_events (ts);
+        DROP TABLE IF EXISTS throttle_duplicates;
+        CREATE TABLE IF NOT EXISTS throttle_delayed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execute_at REAL NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_throttle_delayed ON throttle_delayed (execute_at);
+        CREATE TABLE IF NOT EXISTS throttle_meta (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = '~/.claude-notifier/throttle.db'):
+        """初始化共享存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        super().__init__(path)
+
+    def record(self, keys: List[str], timestamp: float):
+        """记录一次通知"""
+        self._connect().executemany(
+            "INSERT INTO throttle_events (key, ts) VALUES (?, ?)",
+            [(key, timestamp) for key in keys]
+        )
+
+    def count_since(self, key: str, cutoff: float) -> int:
+        """统计 cutoff 之后的通知数"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM throttle_events WHERE key = ? AND ts >= ?", (key, cutoff)
+        ).fetchone()
+        return row[0]
+
+    def recent_times(self, key: str, limit: int) -> List[float]:
+        """最近 limit 次通知时间（升序）"""
+        rows = self._connect().execute(
+            "SELECT ts FROM throttle_events WHERE key = ? ORDER BY ts DESC LIMIT ?", (key, limit)
+        ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def push_delayed(self, execute_at: float, payload: Dict[str, Any]):
+        """加入延迟队列"""
+        self._connect().execute(
+            "INSERT INTO throttle_delayed (execute_at, payload) VALUES (?, ?)",
+            (execute_at, json.dumps(payload, ensure_ascii=False, default=str))
+        )
+
+    def pop_ready(self, now: float) -> List[Dict[str, Any]]:
+        """取出到期的延迟通知（同一条通知只会被一个进程取出）"""
+        with self.transaction():
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT id, payload FROM throttle_delayed WHERE execute_at <= ? ORDER BY execute_at, id", (now,)
+            ).fetchall()
+            if rows:
+                conn.executemany("DELETE FROM throttle_delayed WHERE id = ?", [(row[0],) for row in rows])
+        return [json.loads(row[1]) for row in rows]
+
+    def next_due(self) -> Optional[float]:
+        """最早的延迟通知执行时间（任一进程加入）"""
+        row = self._connect().execute("SELECT MIN(execute_at) FROM throttle_delayed").fetchone()
+        return row[0]
+
+    def claim_cleanup(self, now: float, interval: float) -> bool:
+        """距上次清理（任一进程）超过 interval 秒时返回 True 并记录本次清理时间
+
+        钩子进程生命周期很短，清理时间记录在数据库中而不是进程内。
+        """
+        with self.transaction():
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM throttle_meta WHERE name = 'last_cleanup'").fetchone()
+            if row is not None and now - row[0] <= interval:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO throttle_meta (name, value) VALUES ('last_cleanup', ?)", (now,)
+            )
+            return True
+
+    def purge(self, now: float, delayed_ttl: float = 3600) -> Dict[str, int]:
+        """清理过期的历史和延迟通知"""
+        with self.transaction():
+            conn = self._connect()
+            conn.execute("DELETE FROM throttle_events WHERE ts < ?", (now - HISTORY_RETENTION,))
+            delayed = conn.execute(
+                "DELETE FROM throttle_delayed WHERE execute_at <= ?", (now - delayed_ttl,)
+            ).rowcount
+        return {'delayed': delayed}
+
+    def get_sizes(self) -> Dict[str, int]:
+        """获取存储规模"""
+        conn = self._connect()
+        return {
+            'delayed_count': conn.execute("SELECT COUNT(*) FROM throttle_delayed").fetchone()[0],
+            'active_channels': conn.execute(
+                "SELECT COUNT(DISTINCT key) FROM throttle_events WHERE key LIKE 'channel:%'"
+            ).fetchone()[0]
+        }
+
+
+def create_throttle_store(config: Optional[Dict[str, Any]] = None):
+    """根据配置创建状态存储 (intelligent_limiting.notification_throttle.persistence)
+
+    共享存储初始化失败时回退到进程内存储。
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return MemoryThrottleStore()
+
+    try:
+        return SQLiteThrottleStore(config.get('path', '~/.claude-notifier/throttle.db'))
+    except Exception as e:
+        logging.getLogger('NotificationThrottle').error(f"共享限流存储初始化失败，使用进程内存储: {e}")
+        return MemoryThrottleStore()
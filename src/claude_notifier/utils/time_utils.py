@@ -7,8 +7,10 @@
 """
 
 import time
+import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 # 可选依赖 - pytz用于时区处理
 try:
@@ -18,6 +20,8 @@ except ImportError:
     PYTZ_AVAILABLE = False
     pytz = None
 
+from .throttle_store import SlidingWindowCounter
+
 
 class TimeManager:
     """时间管理器 - 处理静默时间和时间窗口"""
@@ -179,15 +183,26 @@ class TimeManager:
 
 
 class RateLimitTracker:
-    """Claude使用限流追踪器 - 轻量级版本"""
+    """Claude使用限流追踪器 - 轻量级版本
+    
+    每种操作类型（及全部操作）维护两级滑动窗口计数器：一小时内按秒分桶，
+    一天内按分钟分桶，任意窗口的使用次数查询为 O(1)。配置使用量存储后，
+    使用记录在进程间共享并在重启后恢复。
+    """
     
-    def __init__(self, custom_limits: Optional[dict] = None):
+    # 秒级计数器覆盖的最长窗口（秒）
+    FINE_RETENTION = 3600
+    # 超过秒级范围的窗口按分钟分桶
+    COARSE_RESOLUTION = 60
+    
+    def __init__(self, custom_limits: Optional[dict] = None, store=None):
         """初始化限流追踪器
         
         Args:
             custom_limits: 自定义限流配置
+            store: 共享使用量存储（SQLiteUsageStore），None 表示只在进程内计数
         """
-        self.usage_history = []  # [(timestamp, operation)]
+        self.logger = logging.getLogger(self.__class__.__name__)
         
         # 默认限流配置
         default_limits = {
@@ -198,23 +213,79 @@ class RateLimitTracker:
         
         self.rate_limits = custom_limits if custom_limits else default_limits
         
+        # 使用记录至少保留24小时
+        self.retention = max([86400] + [config['window'] for config in self.rate_limits.values()])
+        
+        # 操作类型（None 表示全部操作） -> (秒级计数器, 分钟级计数器)
+        self._counters: Dict[Optional[str], Tuple[SlidingWindowCounter, SlidingWindowCounter]] = {}
+        self._lock = threading.RLock()
+        
+        self.store = store
+        self._version = None
+        self._sync()
+        
+    def _new_counters(self) -> Tuple[SlidingWindowCounter, SlidingWindowCounter]:
+        return (SlidingWindowCounter(self.FINE_RETENTION),
+                SlidingWindowCounter(self.retention, self.COARSE_RESOLUTION))
+        
+    def _add(self, operation: str, timestamp: float, count: int = 1):
+        """计入操作类型和全部操作的计数器"""
+        for key in (None, operation):
+            counters = self._counters.get(key)
+            if counters is None:
+                counters = self._counters[key] = self._new_counters()
+            for counter in counters:
+                counter.add(timestamp, count)
+                
+    def _reload(self, version: int):
+        """从共享存储重建计数器"""
+        rows = self.store.load_since(time.time() - self.retention)
+        self._counters = {}
+        for operation, second, count in rows:
+            self._add(operation, second, count)
+        self._version = version
+        
+    def _sync(self):
+        """其他进程写入使用记录后重新加载"""
+        if self.store is None:
+            return
+        try:
+            version = self.store.version()
+            if version != self._version:
+                self._reload(version)
+        except Exception as e:
+            self.logger.error(f"读取使用量存储失败: {e}")
+        
     def record_usage(self, operation: str = 'api_call'):
         """记录一次使用
         
         Args:
             operation: 操作类型
         """
-        self.usage_history.append((time.time(), operation))
-        self._cleanup_old_records()
-        
-    def _cleanup_old_records(self):
-        """清理过期记录"""
         current_time = time.time()
-        # 只保留24小时内的记录
-        self.usage_history = [
-            (ts, op) for ts, op in self.usage_history 
-            if current_time - ts < 86400
-        ]
+        
+        with self._lock:
+            if self.store is not None:
+                try:
+                    previous = self.store.record(operation, current_time, self.retention)
+                    if previous == self._version:
+                        self._add(operation, current_time)
+                        self._version = previous + 1
+                    else:
+                        # 期间有其他进程写入，重新加载（包含本次记录）
+                        self._reload(previous + 1)
+                    return
+                except Exception as e:
+                    self.logger.error(f"写入使用量存储失败: {e}")
+                    
+            self._add(operation, current_time)
+            
+    def _counter_for(self, window_seconds: float, operation: Optional[str] = None) -> Optional[SlidingWindowCounter]:
+        """选择覆盖该窗口的最细粒度计数器"""
+        counters = self._counters.get(operation)
+        if counters is None:
+            return None
+        return counters[0] if window_seconds <= self.FINE_RETENTION else counters[1]
         
     def get_usage_count(self, window_seconds: int, operation_filter: Optional[str] = None) -> int:
         """获取指定时间窗口内的使用次数
@@ -226,16 +297,12 @@ class RateLimitTracker:
         Returns:
             使用次数
         """
-        current_time = time.time()
-        cutoff_time = current_time - window_seconds
-        
-        if operation_filter:
-            count = sum(1 for ts, op in self.usage_history 
-                       if ts >= cutoff_time and op == operation_filter)
-        else:
-            count = sum(1 for ts, _ in self.usage_history if ts >= cutoff_time)
-            
-        return count
+        with self._lock:
+            self._sync()
+            counter = self._counter_for(window_seconds, operation_filter or None)
+            if counter is None:
+                return 0
+            return counter.count_since(time.time() - window_seconds)
         
     def check_rate_limit(self, level: str = 'minute') -> dict:
         """检查限流状态
@@ -263,6 +330,31 @@ class RateLimitTracker:
             'reset_in': limit_config['window']
         }
         
+    def seconds_until_available(self, level: str = 'minute') -> float:
+        """距离指定级别重新有可用额度的秒数，未限流时返回 0
+
+        Args:
+            level: 限流级别（minute/hour/day）
+
+        Returns:
+            等待秒数
+        """
+        if level not in self.rate_limits:
+            level = 'minute'
+
+        limit_config = self.rate_limits[level]
+        window = limit_config['window']
+        limit = limit_config['limit']
+        if limit <= 0:
+            return float(window)
+
+        with self._lock:
+            self._sync()
+            counter = self._counter_for(window)
+            if counter is None:
+                return 0.0
+            return counter.seconds_until_below(limit, window, time.time())
+
     def get_all_limits_status(self) -> dict:
         """获取所有级别的限流状态
         
@@ -317,7 +409,7 @@ class RateLimitTracker:
         }
         
         stats = {
-            'total_records': len(self.usage_history),
+            'total_records': self.get_usage_count(self.retention),
             'usage_by_window': {},
             'limits_status': self.get_all_limits_status()
         }
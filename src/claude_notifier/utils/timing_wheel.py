@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分层时间轮
+按到期时间管理大量定时条目：插入、取消均为 O(1)，推进时只访问到期的槽位，
+高层槽位中的条目在进入低层范围时逐级下移。适合由调用方在每次访问时惰性推进，
+无需后台线程定期扫描全部条目。
+"""
+
+import math
+from typing import Dict, Any, Hashable, List, Optional, Tuple
+
+
+class TimingWheel:
+    """分层时间轮
+
+    第 L 层有 slots 个槽位，每个槽位覆盖 slots^L 个刻度；到期刻度距当前刻度
+    小于 slots^(L+1) 的条目放在第 L 层。超出最高层范围的条目放在最高层，
+    被访问时重新计算位置。
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, start: Optional[float] = None):
+        """初始化时间轮
+
+        Args:
+            tick: 刻度长度（秒），到期精度
+            slots: 每层槽位数
+            levels: 层数，slots=64、levels=4 时 1 秒刻度覆盖约 194 天
+            start: 起始时间，默认为 0（首次推进时跳到当前时间）
+        """
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+
+        # 每层每个槽位: 键 -> 到期刻度
+        self._wheel: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        # 键 -> (层, 槽位)，用于取消
+        self._positions: Dict[Hashable, Tuple[int, int]] = {}
+        self._level_counts = [0] * levels
+        self._spans = [slots ** level for level in range(levels + 1)]
+        self._current = self._to_tick(start) if start is not None else None
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick)
+
+    def _place(self, key: Hashable, expire_tick: int):
+        """按到期刻度与当前刻度的距离放入对应层的槽位"""
+        delta = expire_tick - self._current
+        level = 0
+        while level < self.levels - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        slot = (expire_tick // self._spans[level]) % self.slots
+
+        self._wheel[level][slot][key] = expire_tick
+        self._positions[key] = (level, slot)
+        self._level_counts[level] += 1
+
+    def schedule(self, key: Hashable, deadline: float):
+        """安排（或重新安排）键在 deadline 到期"""
+        self.cancel(key)
+        expire_tick = math.ceil(deadline / self.tick)
+        if self._current is None:
+            self._current = expire_tick - 1
+        # 已到期的条目在下一个刻度处理
+        self._place(key, max(expire_tick, self._current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        """取消键的定时，返回是否存在"""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return False
+        level, slot = position
+        del self._wheel[level][slot][key]
+        self._level_counts[level] -= 1
+        return True
+
+    def _process_tick(self, tick: int, expired: List[Hashable]):
+        """处理一个刻度：高层槽位下移，然后取出第 0 层的到期条目"""
+        for level in range(self.levels - 1, 0, -1):
+            if tick % self._spans[level]:
+                continue
+            slot = self._wheel[level][(tick // self._spans[level]) % self.slots]
+            if not slot:
+                continue
+            entries = list(slot.items())
+            slot.clear()
+            self._level_counts[level] -= len(entries)
+            for key, expire_tick in entries:
+                self._place(key, max(expire_tick, tick))
+
+        slot = self._wheel[0][tick % self.slots]
+        if slot:
+            self._level_counts[0] -= len(slot)
+            for key in slot:
+                del self._positions[key]
+                expired.append(key)
+            slot.clear()
+
+    def advance(self, now: float) -> List[Hashable]:
+        """推进到 now，返回到期的键（按到期刻度排序）"""
+        target = self._to_tick(now)
+        if self._current is None or not self._positions:
+            self._current = target if self._current is None else max(self._current, target)
+            return []
+
+        expired: List[Hashable] = []
+        while self._current < target:
+            if not self._positions:
+                self._current = target
+                break
+
+            # 低层为空时直接跳到第一个非空层的下一个槽位边界
+            step = 1
+            for level in range(self.levels - 1):
+                if self._level_counts[level]:
+                    break
+                step = self._spans[level + 1]
+
+            next_tick = (self._current // step + 1) * step
+            if next_tick > target:
+                self._current = target
+                break
+            self._current = next_tick
+            self._process_tick(next_tick, expired)
+
+        return expired
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """键的到期时间（按刻度取整），不存在时返回 None"""
+        position = self._positions.get(key)
+        if position is None:
+            return None
+        level, slot = position
+        return self._wheel[level][slot][key] * self.tick
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取时间轮状态"""
+        return {
+            'entries': len(self._positions),
+            'tick': self.tick,
+            'levels': self.levels,
+            'level_counts': list(self._level_counts)
+        }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+使用量持久化
+RateLimitTracker 的使用记录按 (操作类型, 秒) 聚合保存在 SQLite 中，钩子进程重启后
+仍能看到最近一天的真实使用量。每次写入递增版本号，进程发现版本变化时重新加载计数。
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from .throttle_store import SQLiteStateStore
+
+
+class SQLiteUsageStore(SQLiteStateStore):
+    """SQLite 共享使用量记录"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_usage (
+            operation TEXT NOT NULL,
+            second INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (operation, second)
+        );
+        CREATE INDEX IF NOT EXISTS idx_rate_usage_second ON rate_usage(second);
+        CREATE TABLE IF NOT EXISTS rate_usage_meta (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = '~/.claude-notifier/usage.db'):
+        """初始化使用量存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        super().__init__(path)
+
+    def version(self) -> int:
+        """使用量版本号"""
+        row = self._connect().execute(
+            "SELECT value FROM rate_usage_meta WHERE name = 'version'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def load_since(self, cutoff: float) -> List[Tuple[str, int, int]]:
+        """加载 cutoff 之后的使用记录 (操作类型, 秒, 次数)，按时间升序"""
+        return self._connect().execute(
+            "SELECT operation, second, count FROM rate_usage WHERE second >= ? ORDER BY second",
+            (int(cutoff),)
+        ).fetchall()
+
+    def record(self, operation: str, timestamp: float, retention: float) -> int:
+        """记录一次使用、清理超出保留时长的记录并递增版本号
+
+        Returns:
+            写入前的版本号
+        """
+        second = int(timestamp)
+        with self.transaction():
+            conn = self._connect()
+            previous = self.version()
+            conn.execute(
+                "INSERT INTO rate_usage (operation, second, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (operation, second) DO UPDATE SET count = count + 1",
+                (operation, second)
+            )
+            conn.execute("DELETE FROM rate_usage WHERE second < ?", (int(timestamp - retention),))
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_usage_meta (name, value) VALUES ('version', ?)", (previous + 1,)
+            )
+        return previous
+
+
+def create_usage_store(config: Optional[Dict[str, Any]] = None) -> Optional[SQLiteUsageStore]:
+    """根据配置创建使用量存储 (intelligent_limiting.operation_gate.persistence)
+
+    未启用或初始化失败时返回 None，使用量只记录在进程内。
+    """
+    config = config or {}
+    if not config.get('enabled', False):
+        return None
+
+    try:
+        return SQLiteUsageStore(config.get('path', '~/.claude-notifier/usage.db'))
+    except Exception as e:
+        logging.getLogger('RateLimitTracker').error(f"使用量持久化初始化失败，使用进程内计数: {e}")
+        return None
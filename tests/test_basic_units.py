@@ -406,6 +406,72 @@ class TestConfigManager(unittest.TestCase):
         self.assertEqual(len(errors), 0, f"配置验证错误: {errors}")
 
 
+class TestCoreConfigCache(unittest.TestCase):
+    """测试核心配置编译缓存"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        from claude_notifier.core.config import ConfigManager
+        self.ConfigManager = ConfigManager
+        
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_dir, 'config.yaml')
+        self.write_config('dingtalk')
+        
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        
+    def write_config(self, channel):
+        """写入配置文件"""
+        with open(self.config_path, 'w') as f:
+            f.write(
+                "channels:\n"
+                f"  {channel}:\n"
+                "    enabled: true\n"
+                "events:\n"
+                "  error_occurred:\n"
+                f"    channels: [{channel}]\n"
+            )
+            
+    def test_cache_skips_yaml(self):
+        """测试缓存命中时不解析 YAML"""
+        first = self.ConfigManager(self.config_path)
+        self.assertFalse(first.cache_hit)
+        self.assertTrue(os.path.exists(first.cache_path))
+        
+        with patch.dict(sys.modules, {'yaml': None}):
+            second = self.ConfigManager(self.config_path)
+            
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.get_config(), first.get_config())
+        self.assertEqual(second.routing, first.routing)
+        self.assertEqual(second.routing['events']['error_occurred'], ['dingtalk'])
+        
+    def test_content_change_invalidates_cache(self):
+        """测试修改时间和大小不变时按内容校验和失效"""
+        self.ConfigManager(self.config_path)
+        stat = os.stat(self.config_path)
+        
+        self.write_config('telegram')
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.path.getsize(self.config_path), stat.st_size)
+        
+        manager = self.ConfigManager(self.config_path)
+        self.assertFalse(manager.cache_hit)
+        self.assertIn('telegram', manager.get_config()['channels'])
+        
+    def test_unmarshallable_config_is_not_cached(self):
+        """测试包含日期等类型的配置不写入缓存"""
+        with open(self.config_path, 'a') as f:
+            f.write("updated: 2024-01-01\n")
+            
+        manager = self.ConfigManager(self.config_path)
+        self.assertIn('dingtalk', manager.get_config()['channels'])
+        self.assertFalse(os.path.exists(manager.cache_path))
+        
+        
 class TestTimeUtils(unittest.TestCase):
     """测试时间工具"""
     
@@ -24,7 +24,10 @@ from claude_notifier.events.builtin import (
     SessionStartEvent
 )
 from claude_notifier.events.custom import CustomEvent
+from claude_notifier.events.context import HookContext
 from claude_notifier.managers.event_manager import EventManager
+from claude_notifier.utils.pattern_matcher import PatternMatcher, literal_prefix
+from claude_notifier.utils.helpers import is_sensitive_operation
 
 class TestBuiltinEvents(unittest.TestCase):
     """内置事件测试"""
@@ -50,6 +53,17 @@ class TestBuiltinEvents(unittest.TestCase):
         data = event.extract_data(context)
         self.assertIn('operation', data)
         self.assertIn('project', data)
+        self.assertEqual(data['matched_patterns'], [r'rm\s+-[rf]*', r'sudo\s+'])
+        
+    def test_sensitive_operation_extra_patterns(self):
+        """测试附加敏感模式与修改模式后重新编译"""
+        event = SensitiveOperationEvent([r'terraform\s+destroy'])
+        context = {'tool_input': 'Terraform  destroy -auto-approve', 'tool_name': 'Bash'}
+        self.assertTrue(event.should_trigger(context))
+        
+        event.patterns.append(r'helm\s+uninstall')
+        context = {'tool_input': 'helm uninstall api', 'tool_name': 'Bash'}
+        self.assertTrue(event.should_trigger(context))
         
     def test_task_completion_event(self):
         """测试任务完成事件"""
@@ -128,6 +142,65 @@ class TestCustomEvents(unittest.TestCase):
         context = {'tool_input': 'git status'}
         self.assertFalse(event.should_trigger(context))
         
+    def test_trigger_scope(self):
+        """测试适用范围的声明与推导"""
+        # 每个触发器都要求 tool_name 等于某个值时推导出工具范围
+        config = {
+            'name': '文件写入',
+            'triggers': [
+                {'type': 'condition', 'field': 'tool_name', 'operator': 'equals', 'value': 'Write'},
+                {'type': 'condition', 'field': 'tool_name', 'operator': 'equals', 'value': 'Edit'}
+            ]
+        }
+        event = CustomEvent('file_write', config)
+        self.assertEqual(event.tool_names, frozenset({'Write', 'Edit'}))
+        self.assertIsNone(event.hook_events)
+        
+        # 任一触发器不受限时范围不受限
+        config['triggers'].append({'type': 'pattern', 'pattern': 'x', 'field': 'tool_input'})
+        self.assertIsNone(CustomEvent('file_write', config).tool_names)
+        
+        # 显式声明的范围同样约束 should_trigger
+        config = {
+            'name': 'Bash 中的 Git 提交',
+            'hook_events': ['PreToolUse'],
+            'tool_names': ['Bash'],
+            'triggers': [{'type': 'pattern', 'pattern': r'git\s+commit', 'field': 'tool_input'}]
+        }
+        event = CustomEvent('git_commit', config)
+        context = {'hook_event': 'PreToolUse', 'tool_name': 'Bash', 'tool_input': 'git commit'}
+        self.assertTrue(event.should_trigger(context))
+        self.assertFalse(event.should_trigger(dict(context, tool_name='Write')))
+        self.assertFalse(event.should_trigger(dict(context, hook_event='PostToolUse')))
+        
+    def test_invalid_rules_rejected(self):
+        """测试无效规则在注册时被拒绝"""
+        from claude_notifier.events.custom import CustomEventRegistry
+        invalid_triggers = [
+            {'type': 'pattern', 'pattern': r'(unclosed', 'field': 'tool_input'},
+            {'type': 'pattern', 'pattern': r'x', 'flags': ['VERBOSE_TYPO']},
+            {'type': 'condition', 'field': 'project', 'operator': 'matches', 'value': 'x'},
+            {'type': 'condition', 'field': 'duration', 'operator': 'greater_than', 'value': 'soon'},
+            {'type': 'function', 'function': 'is_holiday'},
+            {'type': 'webhook'}
+        ]
+        registry = CustomEventRegistry()
+        for trigger in invalid_triggers:
+            config = {'name': '无效规则', 'triggers': [trigger]}
+            with self.assertRaises(ValueError):
+                CustomEvent('invalid', config)
+            self.assertTrue(registry.validate_event_config(config))
+            
+        # 提取器引用不存在的分组
+        config = {
+            'name': '无效提取器',
+            'triggers': [{'type': 'pattern', 'pattern': 'x'}],
+            'data_extractors': {'version': {'type': 'regex', 'pattern': r'v\d+', 'group': 1}}
+        }
+        with self.assertLogs('CustomEventRegistry', level='ERROR'):
+            self.assertFalse(registry.register_event('invalid', config))
+        self.assertNotIn('invalid', registry.list_events())
+        
     def test_condition_trigger(self):
         """测试条件触发器"""
         config = {
@@ -233,6 +306,14 @@ class TestEventManager(unittest.TestCase):
         self.assertIn('sensitive_operation', event_ids)
         self.assertIn('task_completion', event_ids)
         
+    def test_sensitive_patterns_from_config(self):
+        """测试配置中的附加敏感模式"""
+        config = dict(self.config, events={'sensitive_operation': {'patterns': [r'terraform\s+destroy']}})
+        manager = EventManager(config)
+        event = next(e for e in manager.events if e.event_id == 'sensitive_operation')
+        self.assertIn(r'terraform\s+destroy', event.patterns)
+        self.assertTrue(event.should_trigger({'tool_input': 'terraform destroy', 'tool_name': 'Bash'}))
+        
     def test_event_enabling_disabling(self):
         """测试事件启用/禁用"""
         # 禁用事件
@@ -262,6 +343,36 @@ class TestEventManager(unittest.TestCase):
         custom_event_ids = self.manager.custom_registry.list_events()
         self.assertNotIn('test_event', custom_event_ids)
         
+    def test_dispatch_index(self):
+        """测试只评估适用范围内的事件"""
+        self.manager.add_custom_event('bash_only', {
+            'name': 'Bash 专用',
+            'tool_names': ['Bash'],
+            'triggers': [{'type': 'pattern', 'pattern': r'deploy', 'field': 'tool_input'}]
+        })
+        
+        context = {'hook_event': 'PreToolUse', 'tool_name': 'Read', 'tool_input': 'deploy'}
+        candidates = [event.event_id for event in self.manager._candidate_events(context)]
+        self.assertNotIn('task_completion', candidates)
+        self.assertNotIn('sensitive_operation', candidates)
+        self.assertNotIn('bash_only', candidates)
+        self.assertIn('error_occurred', candidates)
+        
+        context = dict(context, tool_name='Bash')
+        candidates = [event.event_id for event in self.manager._candidate_events(context)]
+        self.assertIn('sensitive_operation', candidates)
+        self.assertIn('bash_only', candidates)
+        
+        # 注销事件后重建索引
+        self.manager.remove_custom_event('bash_only')
+        candidates = [event.event_id for event in self.manager._candidate_events(context)]
+        self.assertNotIn('bash_only', candidates)
+        
+        context = {'hook_event': 'Stop'}
+        candidates = [event.event_id for event in self.manager._candidate_events(context)]
+        self.assertIn('task_completion', candidates)
+        self.assertNotIn('session_start', candidates)
+        
     def test_context_processing(self):
         """测试上下文处理"""
         # 使用完整的上下文（包含 tool_name）
@@ -332,6 +443,143 @@ class TestEventIntegration(unittest.TestCase):
         events3 = manager.process_context(context3)
         self.assertTrue(any(e.get('event_id') == 'task_completion' for e in events3))
 
+class TestHookContext(unittest.TestCase):
+    """共享钩子上下文测试"""
+    
+    def test_derived_views(self):
+        """测试工具输入解析和派生视图"""
+        context = HookContext({
+            'tool_input': '{"command": "Sudo LS", "file_path": "/tmp/a.txt"}',
+            'error_message': None,
+            'project': 'demo'
+        })
+        self.assertEqual(context.tool_input_data['command'], 'Sudo LS')
+        self.assertEqual(context.command, 'Sudo LS')
+        self.assertEqual(context.file_path, '/tmp/a.txt')
+        self.assertEqual(context.project, 'demo')
+        self.assertEqual(context.lower('tool_input'), context.text('tool_input').lower())
+        self.assertEqual(context.text('error_message'), 'None')
+        self.assertIs(HookContext.wrap(context), context)
+        
+        # 非 JSON 输入原样作为命令
+        context = HookContext({'tool_input': '{not json'})
+        self.assertIsNone(context.tool_input_data)
+        self.assertEqual(context.command, '{not json')
+        self.assertEqual(context.file_path, '')
+        
+    def test_project_resolution(self):
+        """测试项目名称解析"""
+        from unittest import mock
+        with mock.patch.dict(os.environ, {'CLAUDE_PROJECT_DIR': '/work/notifier'}):
+            self.assertEqual(HookContext({}).project, 'notifier')
+            self.assertEqual(HookContext({'project': 'explicit'}).project, 'explicit')
+            
+    def test_parsed_once_per_payload(self):
+        """测试所有事件共享一次解析"""
+        import json
+        from unittest import mock
+        config = {
+            'custom_events': {
+                f'rule_{i}': {
+                    'name': f'规则 {i}',
+                    'triggers': [{'type': 'pattern', 'pattern': f'deploy{i}', 'field': 'tool_input'}],
+                    'data_extractors': {'project': {'type': 'function', 'function': 'get_project_name'}}
+                } for i in range(20)
+            }
+        }
+        manager = EventManager(config)
+        context = {'tool_name': 'Bash', 'tool_input': '{"command": "sudo deploy3"}'}
+        with mock.patch('claude_notifier.events.context.json.loads', wraps=json.loads) as loads, \
+                mock.patch('claude_notifier.events.context.os.getcwd', wraps=os.getcwd) as getcwd:
+            manager.process_context(context)
+        self.assertEqual(loads.call_count, 1)
+        self.assertLessEqual(getcwd.call_count, 1)
+
+class TestTemplateRenderPlan(unittest.TestCase):
+    """模板渲染计划测试"""
+    
+    def setUp(self):
+        import tempfile
+        from claude_notifier.templates.template_engine import TemplateEngine
+        self.engine = TemplateEngine(template_dir=tempfile.mkdtemp())
+        
+    def test_safe_substitute_semantics(self):
+        """测试与 string.Template.safe_substitute 一致"""
+        from string import Template
+        from claude_notifier.templates.render_plan import TextPlan
+        data = {'project': 'demo', 'count': 3}
+        for text in ['${project} 共 $count 项', '费用 $$5，缺失 ${missing} 与 $missing', '末尾 $', '无占位符']:
+            self.assertEqual(TextPlan(text).render(data), Template(text).safe_substitute(data))
+        self.assertEqual(TextPlan('$a ${b} $a').fields, ('a', 'b'))
+        
+    def test_plan_reused_and_recompiled(self):
+        """测试渲染计划复用，模板被替换后重新编译"""
+        plan = self.engine.get_render_plan('task_completion_default')
+        self.assertIs(self.engine.get_render_plan('task_completion_default'), plan)
+        self.assertIn('project', plan.placeholders)
+        
+        self.engine.templates['task_completion_default'] = {'title': '完成: ${project}', 'content': ''}
+        rendered = self.engine.render_template('task_completion_default', {'project': 'demo'})
+        self.assertEqual(rendered, {'title': '完成: demo', 'content': ''})
+        
+    def test_invalid_template(self):
+        """测试结构无效的模板渲染返回 None"""
+        self.engine.templates['broken'] = {'title': 'x', 'content': 'y', 'fields': 'not-a-list'}
+        with self.assertLogs('TemplateEngine', level='ERROR'):
+            self.assertIsNone(self.engine.render_template('broken', {}))
+
+class TestPatternMatcher(unittest.TestCase):
+    """多模式匹配器测试"""
+    
+    def test_literal_prefix(self):
+        """测试字面量锚点提取"""
+        self.assertEqual(literal_prefix(r'git\s+push'), 'git')
+        self.assertEqual(literal_prefix(r'\.env'), '.env')
+        self.assertEqual(literal_prefix(r'ab*c'), 'a')
+        self.assertEqual(literal_prefix(r'ab+c'), 'ab')
+        self.assertEqual(literal_prefix(r'foo|bar'), '')
+        self.assertEqual(literal_prefix(r'(?i)foo'), '')
+        
+    def test_matches_all_rules(self):
+        """测试一次匹配报告所有命中的规则"""
+        matcher = PatternMatcher({
+            'force_push': r'git\s+push\s+--force',
+            'push': r'git\s+push',
+            'remove': r'rm\s+-rf',
+            'either': r'shutdown|reboot',
+        })
+        text = 'GIT PUSH --force origin main && perform -x; sudo reboot'
+        self.assertEqual(matcher.matches(text), {'force_push', 'push', 'either'})
+        self.assertIn(matcher.search(text), {'force_push', 'push', 'either'})
+        self.assertIsNone(matcher.search('git status'))
+        self.assertEqual(matcher.matches(''), set())
+        
+    def test_equivalent_to_individual_search(self):
+        """测试结果与逐条 re.search 一致"""
+        import re
+        import random
+        rules = [r'rm\s+-rf', r'rm', r'rmdir\s', r'a+b', r'ab?c', r'x|yz', r'\.env', r'(?:cd)+e', r'de\w+']
+        matcher = PatternMatcher(rules)
+        rng = random.Random(7)
+        for _ in range(2000):
+            text = ''.join(rng.choice('abcdexyzrmRMDI .-f') for _ in range(rng.randint(0, 24)))
+            expected = {rule for rule in rules if re.search(rule, text, re.IGNORECASE)}
+            self.assertEqual(matcher.matches(text), expected, text)
+            
+    def test_invalid_rule_skipped(self):
+        """测试无效规则被跳过"""
+        with self.assertLogs('PatternMatcher', level='WARNING'):
+            matcher = PatternMatcher([r'sudo\s+', r'(unclosed'])
+        self.assertEqual(len(matcher), 1)
+        self.assertEqual(matcher.search('sudo ls'), r'sudo\s+')
+        
+    def test_is_sensitive_operation(self):
+        """测试危险操作判断"""
+        self.assertTrue(is_sensitive_operation('DROP TABLE users'))
+        self.assertTrue(is_sensitive_operation('docker rm web -f'))
+        self.assertFalse(is_sensitive_operation('git push origin main'))
+        self.assertFalse(is_sensitive_operation(''))
+
 def run_tests():
     """运行所有测试"""
     # 创建测试套件
@@ -342,7 +590,10 @@ def run_tests():
         TestBuiltinEvents,
         TestCustomEvents,
         TestEventManager,
-        TestEventIntegration
+        TestEventIntegration,
+        TestHookContext,
+        TestTemplateRenderPlan,
+        TestPatternMatcher
     ]
     
     for test_class in test_classes:
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+钩子守护进程测试
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import socket
+import tempfile
+import time
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目路径和src路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+from claude_notifier.hooks.client import (
+    is_supported,
+    forward_hook_event,
+    ping_daemon,
+    request_daemon
+)
+from claude_notifier.hooks.claude_hook import ClaudeHook, is_detached_delivery_enabled
+from claude_notifier.hooks.daemon import NotifierDaemon
+
+
+class _RecordingNotifier:
+    """记录发送内容的通知器"""
+
+    def __init__(self):
+        self.config = {}
+        self.sent = []
+
+    def send(self, message, **kwargs):
+        self.sent.append((message, kwargs))
+        return True
+
+
+class _SlowNotifier(_RecordingNotifier):
+    """模拟慢速渠道，直到 release 被设置才返回"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def send(self, message, **kwargs):
+        self.release.wait(5)
+        return super().send(message, **kwargs)
+
+
+class TestDetachedDelivery(unittest.TestCase):
+    """分离投递模式测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.env_patch = patch.dict(os.environ, {'HOME': self.temp_dir})
+        self.env_patch.start()
+        os.environ.pop('CLAUDE_NOTIFIER_DETACHED', None)
+
+    def tearDown(self):
+        self.env_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_detached_option(self):
+        """测试配置项与环境变量"""
+        self.assertFalse(is_detached_delivery_enabled({}))
+        config = {'advanced': {'hooks': {'detached_delivery': True}}}
+        self.assertTrue(is_detached_delivery_enabled(config))
+
+        os.environ['CLAUDE_NOTIFIER_DETACHED'] = '0'
+        self.assertFalse(is_detached_delivery_enabled(config))
+        os.environ['CLAUDE_NOTIFIER_DETACHED'] = '1'
+        self.assertTrue(is_detached_delivery_enabled({}))
+
+    def test_notifications_are_deferred(self):
+        """测试分离投递模式下钩子不直接发送通知"""
+        notifier = _RecordingNotifier()
+        hook = ClaudeHook(notifier=notifier)
+        hook.detached = True
+
+        result = hook.on_notification({'type': 'idle_prompt'})
+        self.assertEqual(result, {'continue': True})
+        self.assertEqual(notifier.sent, [])
+
+        pending = hook.take_pending_notifications()
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(hook.pending_notifications, [])
+
+        hook.deliver_notifications(pending)
+        self.assertEqual(notifier.sent[0][1].get('event_type'), 'idle_prompt')
+
+
+    def test_deliver_drains_background_retries(self):
+        """测试后台投递显式等待渠道重试，等待时间受 drain_timeout 限制"""
+        notifier = _RecordingNotifier()
+        notifier.config = {'advanced': {'hooks': {'drain_timeout': 5}}}
+        timeouts = []
+        notifier.drain = lambda timeout=None: timeouts.append(timeout)
+
+        hook = ClaudeHook(notifier=notifier)
+        hook.deliver_notifications([('你好', {})])
+
+        self.assertEqual(len(notifier.sent), 1)
+        self.assertEqual(len(timeouts), 1)
+        self.assertTrue(0 < timeouts[0] <= 5)
+
+    def test_hook_notifier_defers_delivery(self):
+        """测试钩子进程的通知器只写入发件箱，进程内直接发送时渠道不排期后台重试"""
+        channel = type('Channel', (), {'retry_mode': 'scheduled'})
+
+        def create_notifier():
+            notifier = _RecordingNotifier()
+            notifier.channels = {'webhook': channel()}
+            notifier.outbox_inline_delivery = True
+            return notifier
+
+        with patch('claude_notifier.hooks.claude_hook._load_notifier_class', return_value=create_notifier):
+            os.environ['CLAUDE_NOTIFIER_DETACHED'] = '0'
+            notifier = ClaudeHook().notifier
+            self.assertFalse(notifier.outbox_inline_delivery)
+            self.assertEqual(notifier.channels['webhook'].retry_mode, 'blocking')
+
+            os.environ['CLAUDE_NOTIFIER_DETACHED'] = '1'
+            self.assertEqual(ClaudeHook().notifier.channels['webhook'].retry_mode, 'scheduled')
+
+@unittest.skipUnless(is_supported(), "当前平台不支持 Unix 域套接字")
+class _ClosableNotifier(_RecordingNotifier):
+    """记录是否被关闭的通知器"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class TestNotifierDaemon(unittest.TestCase):
+    """守护进程与客户端测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, 'daemon.sock')
+        self.home_patch = patch.dict(os.environ, {'HOME': self.temp_dir})
+        self.home_patch.start()
+
+    def tearDown(self):
+        self.home_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _start_daemon(self, notifier=None, detached=False):
+        notifier = notifier or _RecordingNotifier()
+        daemon = NotifierDaemon(socket_path=self.socket_path)
+        daemon.hook = ClaudeHook(notifier=notifier)
+        daemon.hook.detached = detached
+        daemon.start()
+
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(daemon.shutdown)
+        return daemon, notifier
+
+    def test_forward_without_daemon(self):
+        """测试守护进程未运行时返回 None (调用方回退到进程内处理)"""
+        self.assertIsNone(forward_hook_event('Stop', {}, socket_path=self.socket_path))
+        self.assertIsNone(ping_daemon(self.socket_path))
+
+    def test_forward_daemon_error(self):
+        """测试守护进程处理失败时返回其结果，不回退到进程内处理"""
+        daemon, notifier = self._start_daemon()
+
+        with patch.object(daemon, '_handle_hook', side_effect=RuntimeError('boom')), \
+                self.assertLogs('HookClient', level='WARNING') as logs:
+            result = forward_hook_event('Stop', {}, socket_path=self.socket_path)
+
+        self.assertEqual(result, {'continue': True})
+        self.assertIn('boom', logs.output[0])
+
+    def test_forward_after_request_written(self):
+        """测试请求写入后连接断开或响应无效时放行，不回退到进程内处理"""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        self.addCleanup(server.close)
+
+        def serve(replies):
+            for reply in replies:
+                conn, _ = server.accept()
+                conn.recv(65536)
+                conn.sendall(reply)
+                conn.close()
+
+        replies = [b'', b'not json\n']
+        thread = threading.Thread(target=serve, args=(replies,), daemon=True)
+        thread.start()
+
+        for _ in replies:
+            with self.assertLogs('HookClient', level='WARNING'):
+                self.assertEqual(forward_hook_event('Stop', {}, socket_path=self.socket_path), {'continue': True})
+        thread.join(5)
+
+    def test_forward_hook_event(self):
+        """测试钩子事件经守护进程处理"""
+        daemon, notifier = self._start_daemon()
+
+        payload = {'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf build'}}
+        result = forward_hook_event('PreToolUse', payload, socket_path=self.socket_path)
+
+        self.assertEqual(result, {'continue': True})
+        self.assertEqual(len(notifier.sent), 1)
+        self.assertEqual(notifier.sent[0][1].get('event_type'), 'sensitive_operation')
+        self.assertEqual(daemon.stats['hook_events'], 1)
+
+    def test_detached_delivery_does_not_block(self):
+        """测试分离投递：慢速渠道不阻塞钩子响应"""
+        notifier = _SlowNotifier()
+        daemon, _ = self._start_daemon(notifier, detached=True)
+
+        start = time.time()
+        result = forward_hook_event('Notification', {'type': 'idle_prompt'}, socket_path=self.socket_path)
+        self.assertEqual(result, {'continue': True})
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(notifier.sent, [])
+
+        notifier.release.set()
+        deadline = time.time() + 5
+        while not notifier.sent and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(notifier.sent), 1)
+
+    def test_reload_closes_previous_notifier(self):
+        """测试重新加载后关闭被替换的通知器，新通知器接管钩子事件"""
+        old_notifier = _ClosableNotifier()
+        new_notifier = _RecordingNotifier()
+        daemon, _ = self._start_daemon(old_notifier)
+
+        with patch.object(daemon, '_create_notifier', return_value=new_notifier):
+            response = request_daemon({'action': 'reload'}, socket_path=self.socket_path)
+        self.assertTrue(response['ok'])
+        self.assertTrue(old_notifier.closed.wait(5))
+
+        payload = {'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf build'}}
+        forward_hook_event('PreToolUse', payload, socket_path=self.socket_path)
+        self.assertEqual(len(new_notifier.sent), 1)
+        self.assertEqual(old_notifier.sent, [])
+
+    def test_ping_and_unknown_action(self):
+        """测试状态查询和未知请求"""
+        daemon, _ = self._start_daemon()
+
+        info = ping_daemon(self.socket_path)
+        self.assertIsNotNone(info)
+        self.assertEqual(info['pid'], os.getpid())
+        self.assertEqual(info['mode'], 'pypi_full')
+
+        response = request_daemon({'action': 'unknown'}, socket_path=self.socket_path)
+        self.assertFalse(response['ok'])
+
+    def test_stale_socket_is_replaced(self):
+        """测试清理异常退出残留的套接字文件"""
+        Path(self.socket_path).touch()
+
+        self._start_daemon()
+        self.assertIsNotNone(ping_daemon(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,860 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+智能组件数据结构测试 - 共享限流状态、滑动窗口计数、延迟通知调度、分组索引、MinHash/LSH、分组定时发送、冷却时间轮、操作门调度、使用量计数、重复通知过滤器
+"""
+
+import gc
+import unittest
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from unittest import mock
+
+# 添加项目路径和src路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+from claude_notifier.utils.notification_throttle import (
+    NotificationThrottle,
+    NotificationRequest,
+    NotificationPriority,
+    ThrottleAction
+)
+from claude_notifier.utils.cooldown_manager import CooldownManager, STATE_RETENTION
+from claude_notifier.utils.dedup_filter import SlicedBloomFilter, create_duplicate_filter
+from claude_notifier.utils import delayed_dispatcher
+from claude_notifier.utils.delayed_dispatcher import (
+    DeadlineDispatcher,
+    DelayedNotificationDispatcher,
+    GroupFlushDispatcher
+)
+from claude_notifier.utils.message_grouper import MessageGrouper, GroupingStrategy
+from claude_notifier.utils.minhash import MinHashLSH
+from claude_notifier.utils.operation_gate import OperationGate, OperationRequest, OperationResult
+from claude_notifier.utils.throttle_store import (
+    MemoryThrottleStore,
+    SQLiteThrottleStore,
+    SlidingWindowCounter
+)
+from claude_notifier.utils.time_utils import RateLimitTracker
+from claude_notifier.utils.timing_wheel import TimingWheel
+from claude_notifier.utils.usage_store import SQLiteUsageStore
+
+
+def make_request(index, event_type='custom_event', priority=NotificationPriority.NORMAL):
+    """构造通知请求"""
+    return NotificationRequest(
+        notification_id=f'n{index}',
+        event_type=event_type,
+        channel='test',
+        priority=priority,
+        content={'title': f'通知 {index}'}
+    )
+
+
+def _throttle_worker(config, offset, count, queue):
+    """子进程：发送若干请求并返回允许的数量"""
+    throttle = NotificationThrottle(config)
+    allowed = 0
+    for i in range(count):
+        action, _, _ = throttle.should_allow_notification(make_request(offset + i))
+        if action == ThrottleAction.ALLOW:
+            allowed += 1
+    queue.put(allowed)
+
+
+class TestSharedThrottleState(unittest.TestCase):
+    """测试跨进程共享的限流状态"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = {
+            'intelligent_limiting': {
+                'notification_throttle': {
+                    'persistence': {
+                        'enabled': True,
+                        'path': os.path.join(self.temp_dir, 'throttle.db')
+                    },
+                    'rate_limits': {
+                        'by_event': {'custom_event': {'max_per_minute': 5, 'cooldown': 0}}
+                    }
+                }
+            }
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_default_store_is_in_memory(self):
+        """测试默认使用进程内存储"""
+        throttle = NotificationThrottle({})
+        self.assertIsInstance(throttle.store, MemoryThrottleStore)
+        self.assertFalse(throttle.get_throttle_stats()['shared'])
+
+    def test_duplicates_and_limits_are_shared(self):
+        """测试重复检测和频率限制在实例之间共享"""
+        first = NotificationThrottle(self.config)
+        second = NotificationThrottle(self.config)
+        self.assertIsInstance(first.store, SQLiteThrottleStore)
+
+        self.assertEqual(first.should_allow_notification(make_request(0))[0], ThrottleAction.ALLOW)
+        self.assertEqual(second.should_allow_notification(make_request(0))[0], ThrottleAction.BLOCK)
+
+        for i in range(1, 5):
+            self.assertEqual(second.should_allow_notification(make_request(i))[0], ThrottleAction.ALLOW)
+        self.assertEqual(first.should_allow_notification(make_request(5))[0], ThrottleAction.BLOCK)
+        self.assertEqual(first.get_throttle_stats()['recent_activity']['global_1min'], 5)
+
+    def test_delayed_queue_is_shared(self):
+        """测试延迟通知可由其他进程取出"""
+        first = NotificationThrottle(self.config)
+        second = NotificationThrottle(self.config)
+
+        first.add_delayed_notification(make_request(1, priority=NotificationPriority.HIGH), 0)
+        first.add_delayed_notification(make_request(2), 60)
+
+        ready = second.get_ready_notifications()
+        self.assertEqual([r.notification_id for r in ready], ['n1'])
+        self.assertEqual(ready[0].priority, NotificationPriority.HIGH)
+        self.assertEqual(first.get_ready_notifications(), [])
+        self.assertEqual(first.get_throttle_stats()['delayed_count'], 1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "需要 fork")
+    def test_concurrent_processes_respect_limit(self):
+        """测试并发进程合计不超过频率限制"""
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [
+            context.Process(target=_throttle_worker, args=(self.config, i * 10, 3, queue))
+            for i in range(6)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+
+        allowed = sum(queue.get(timeout=5) for _ in processes)
+        self.assertEqual(allowed, 5)
+
+    def test_check_cost(self):
+        """测试共享存储的单次检查开销"""
+        throttle = NotificationThrottle(self.config)
+        throttle.should_allow_notification(make_request(0))
+
+        start = time.perf_counter()
+        for i in range(200):
+            throttle.should_allow_notification(make_request(i + 1))
+        per_check = (time.perf_counter() - start) / 200
+
+        print(f"共享限流检查: {per_check * 1000:.3f}ms/次")
+        self.assertLess(per_check, 0.005)
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    """测试按秒分桶的滑动窗口计数器"""
+
+    def test_window_counts(self):
+        """测试不同窗口的计数"""
+        counter = SlidingWindowCounter()
+        base = 1_000_000.0
+        for offset in (0, 0.5, 10, 59, 120, 3000):
+            counter.add(base + offset)
+
+        now = base + 3000
+        self.assertEqual(counter.count_since(now - 60), 1)
+        self.assertEqual(counter.count_since(now - 2880), 2)
+        self.assertEqual(counter.count_since(now - 3600), 6)
+        self.assertEqual(counter.count_since(now + 1), 0)
+        self.assertEqual(list(counter.recent)[-2:], [base + 120, base + 3000])
+
+    def test_expired_buckets_are_dropped(self):
+        """测试超出保留时长的通知不再计入"""
+        counter = SlidingWindowCounter(retention=60)
+        base = 1_000_000.0
+        for i in range(5):
+            counter.add(base + i)
+        counter.add(base + 500)
+
+        self.assertEqual(counter.count_since(base), 1)
+        self.assertEqual(counter.count_since(base + 450), 1)
+
+    def test_window_of_exactly_retention(self):
+        """测试窗口恰好等于保留时长时计入 cutoff 所在的桶"""
+        for resolution in (1, 10):
+            counter = SlidingWindowCounter(retention=60, resolution=resolution)
+            base = 1_000_000.0
+            counter.add(base)
+            counter.add(base + 30)
+            counter.add(base + 60)
+
+            self.assertEqual(counter.count_since(base), 3)
+            self.assertEqual(counter.count_since(base + 60 - 60), 3)
+            self.assertEqual(counter.count_since(base + 60 - 61), 3)
+            self.assertEqual(counter.count_since(base + 30), 2)
+
+    def test_hour_limit_beyond_history_size(self):
+        """测试小时窗口不再受历史记录条数限制"""
+        store = MemoryThrottleStore()
+        now = time.time()
+        for i in range(1500):
+            store.record(['global'], now - 3000 + i)
+
+        self.assertEqual(store.count_since('global', now - 3600), 1500)
+        self.assertEqual(store.count_since('global', now - 60), 0)
+        self.assertEqual(store.recent_times('global', 1), [now - 3000 + 1499])
+
+    def test_count_cost_is_constant(self):
+        """测试计数开销与历史数量无关"""
+        store = MemoryThrottleStore()
+        now = time.time()
+        for i in range(3600):
+            store.record(['global'], now - 3599 + i)
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            store.count_since('global', now - 3600)
+        per_query = (time.perf_counter() - start) / 10000
+
+        print(f"窗口计数: {per_query * 1e6:.2f}µs/次")
+        self.assertLess(per_query, 0.0001)
+
+
+class TestDelayedNotificationDispatcher(unittest.TestCase):
+    """测试延迟通知的堆调度和分发线程"""
+
+    def setUp(self):
+        self.throttle = NotificationThrottle({})
+        self.sent = []
+        self.sent_event = threading.Event()
+        self.dispatcher = DelayedNotificationDispatcher(self.throttle, self._send)
+
+    def tearDown(self):
+        self.dispatcher.shutdown()
+
+    def _send(self, request):
+        self.sent.append((request.notification_id, time.time()))
+        self.sent_event.set()
+
+    def test_base_dispatcher_is_abstract(self):
+        """测试分发器基类未实现队列接口时不能实例化"""
+        with self.assertRaises(TypeError):
+            DeadlineDispatcher(self._send)
+
+    def test_ready_notifications_in_due_order(self):
+        """测试到期通知按执行时间顺序取出"""
+        for index, delay in ((1, -1), (2, -3), (3, 30), (4, -2)):
+            self.throttle.add_delayed_notification(make_request(index), delay)
+
+        ready = self.throttle.get_ready_notifications()
+        self.assertEqual([r.notification_id for r in ready], ['n2', 'n4', 'n1'])
+        self.assertAlmostEqual(self.throttle.next_delayed_at() - time.time(), 30, delta=1)
+
+    def test_dispatches_on_time(self):
+        """测试延迟通知到期后自动发送"""
+        start = time.time()
+        self.throttle.add_delayed_notification(make_request(1), 0.2)
+        self.dispatcher.wake()
+
+        self.assertTrue(self.sent_event.wait(2))
+        self.assertEqual(self.sent[0][0], 'n1')
+        self.assertGreaterEqual(self.sent[0][1] - start, 0.19)
+        self.assertEqual(self.dispatcher.get_status()['dispatched'], 1)
+
+    def test_earlier_notification_wakes_dispatcher(self):
+        """测试更早到期的通知会打断分发线程的睡眠"""
+        self.throttle.add_delayed_notification(make_request(1), 30)
+        self.dispatcher.wake()
+        time.sleep(0.05)
+
+        self.throttle.add_delayed_notification(make_request(2), 0.1)
+        self.dispatcher.wake()
+
+        self.assertTrue(self.sent_event.wait(2))
+        self.assertEqual([name for name, _ in self.sent], ['n2'])
+        self.assertIsNotNone(self.dispatcher.get_status()['next_due_in'])
+
+    def test_idle_dispatchers_are_released(self):
+        """测试退出处理只注册一次，空闲后被丢弃的分发器可以被回收"""
+        with mock.patch.object(delayed_dispatcher, '_hooks_registered', False), \
+                mock.patch.object(delayed_dispatcher.atexit, 'register') as register:
+            refs = []
+            for index in range(3):
+                throttle = NotificationThrottle({})
+                dispatcher = DelayedNotificationDispatcher(throttle, self._send)
+                throttle.add_delayed_notification(make_request(index), 0)
+                dispatcher.wake()
+                refs.append(weakref.ref(dispatcher))
+                del throttle, dispatcher
+
+        self.assertEqual(register.call_count, 1)
+        deadline = time.time() + 2
+        while any(ref() is not None for ref in refs) and time.time() < deadline:
+            gc.collect()
+            time.sleep(0.01)
+        self.assertEqual([ref() for ref in refs], [None, None, None])
+        self.assertEqual(len(self.sent), 3)
+
+
+class TestMessageGrouperIndex(unittest.TestCase):
+    """测试分组查找索引"""
+
+    def setUp(self):
+        self.grouper = MessageGrouper({
+            'intelligent_limiting': {
+                'message_grouper': {'grouping': {'max_groups': 5000}}
+            }
+        })
+
+    def test_exact_strategies_use_index(self):
+        """测试按项目和时间窗口查找分组"""
+        _, project_group, _ = self.grouper.should_group_message(
+            {'event_type': 'sensitive_operation', 'channel': 'dingtalk', 'project': 'alpha'}
+        )
+        self.assertEqual(self.grouper._find_matching_group(
+            {'event_type': 'custom', 'channel': 'dingtalk', 'project': 'alpha'}
+        ), project_group)
+        self.assertIsNone(self.grouper._find_matching_group(
+            {'event_type': 'custom', 'channel': 'feishu', 'project': 'alpha'}
+        ))
+
+        # 时间窗口策略跳过已超出窗口的分组
+        self.grouper.active_groups[project_group].created_at -= 1000
+        _, window_group, _ = self.grouper.should_group_message(
+            {'event_type': 'task_completion', 'channel': 'dingtalk', 'project': 'beta'}
+        )
+        self.assertNotEqual(window_group, project_group)
+        self.assertEqual(self.grouper._find_matching_group(
+            {'event_type': 'task_completion', 'channel': 'dingtalk', 'project': 'gamma'}
+        ), window_group)
+
+    def test_removed_groups_leave_index(self):
+        """测试发送和清理后的分组从索引中移除"""
+        message = {'event_type': 'sensitive_operation', 'channel': 'dingtalk', 'project': 'alpha'}
+        _, group_id, _ = self.grouper.should_group_message(message)
+        self.grouper.add_message_to_group(group_id, message)
+
+        self.assertEqual([g.group_id for g in self.grouper.get_ready_groups(flush_all=True)], [group_id])
+        self.assertIsNone(self.grouper._find_matching_group(message))
+        self.assertTrue(all(not index for index in self.grouper._group_index.values()))
+
+    def test_lookup_cost_with_many_groups(self):
+        """测试大量分组时的查找开销"""
+        for i in range(2000):
+            self.grouper._create_group(
+                {'event_type': 'sensitive_operation', 'channel': 'dingtalk', 'project': f'p{i}'}
+            )
+        self.assertEqual(len(self.grouper.active_groups), 2000)
+
+        message = {'event_type': 'sensitive_operation', 'channel': 'dingtalk', 'project': 'p1999'}
+        start = time.perf_counter()
+        for _ in range(1000):
+            group_id = self.grouper._find_matching_group(message)
+        per_lookup = (time.perf_counter() - start) / 1000
+
+        print(f"分组查找: {per_lookup * 1e6:.2f}µs/次 (2000 个分组)")
+        self.assertEqual(self.grouper.active_groups[group_id].project, 'p1999')
+        self.assertLess(per_lookup, 0.0002)
+
+
+class TestMinHashSimilarity(unittest.TestCase):
+    """测试 MinHash/LSH 相似分组查找"""
+
+    def setUp(self):
+        self.grouper = MessageGrouper({
+            'intelligent_limiting': {
+                'message_grouper': {'grouping': {'max_groups': 5000, 'similarity_threshold': 0.6}}
+            }
+        })
+
+    def _error(self, index, title):
+        return {
+            'event_type': 'error_occurred', 'channel': 'dingtalk',
+            'project': f'p{index}', 'title': title, 'error_type': f'E{index}'
+        }
+
+    def test_lsh_candidates(self):
+        """测试相似集合成为候选，删除后不再返回"""
+        index = MinHashLSH(threshold=0.8)
+        tokens = set(f'token{i}' for i in range(20))
+        index.add('a', 0, tokens)
+        index.add('b', 0, set(f'other{i}' for i in range(20)))
+
+        self.assertEqual(index.query(tokens | {'extra'}), {'a'})
+        index.remove('a')
+        self.assertEqual(index.query(tokens), set())
+        self.assertEqual(len(index), 1)
+
+    def test_similar_messages_share_group(self):
+        """测试相似错误归入同一分组"""
+        message = self._error(1, 'connection refused by upstream server during deploy')
+        _, group_id, _ = self.grouper.should_group_message(message)
+        self.grouper.add_message_to_group(group_id, message)
+
+        similar = dict(message, title='connection refused by upstream server during build')
+        self.assertEqual(self.grouper._find_matching_group(similar), group_id)
+        self.assertIsNone(self.grouper._find_matching_group(self._error(2, 'disk quota exceeded')))
+
+    def test_only_recent_messages_stay_indexed(self):
+        """测试相似度索引只保留首条和最近的消息"""
+        first = self._error(1, 'alpha beta gamma delta')
+        _, group_id, _ = self.grouper.should_group_message(first)
+        self.grouper.add_message_to_group(group_id, first)
+        for i in range(5):
+            self.grouper.active_groups[group_id].add_message(first)
+            self.grouper._index_message(self.grouper.active_groups[group_id])
+
+        self.assertEqual(sorted(self.grouper._similarity_index._entries[group_id]), [0, 3, 4, 5])
+        self.grouper._remove_group(group_id)
+        self.assertEqual(len(self.grouper._similarity_index), 0)
+
+    def test_lookup_cost_with_many_groups(self):
+        """测试大量分组时相似查找的开销"""
+        rng = random.Random(7)
+        vocabulary = [f'word{i}' for i in range(5000)]
+        titles = [' '.join(rng.sample(vocabulary, 12)) for _ in range(2000)]
+        for i, title in enumerate(titles):
+            message = self._error(i, title)
+            group_id = self.grouper._create_group(message)
+            self.grouper.add_message_to_group(group_id, message)
+
+        message = self._error(1999, titles[1999])
+        start = time.perf_counter()
+        for _ in range(100):
+            group_id = self.grouper._find_matching_group(message)
+        per_lookup = (time.perf_counter() - start) / 100
+
+        print(f"相似分组查找: {per_lookup * 1e6:.2f}µs/次 (2000 个分组)")
+        self.assertEqual(self.grouper.active_groups[group_id].project, 'p1999')
+        self.assertLess(per_lookup, 0.005)
+
+
+class TestGroupFlushing(unittest.TestCase):
+    """测试分组按发送计划自动发送和跨进程持久化"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sent = []
+        self.sent_event = threading.Event()
+        self.dispatchers = []
+
+    def tearDown(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _grouper(self, persistent=False):
+        grouper_config = {
+            'rules': {'build': {'strategy': GroupingStrategy.BY_PROJECT, 'timeout': 0.3}}
+        }
+        if persistent:
+            grouper_config['persistence'] = {'enabled': True, 'path': os.path.join(self.temp_dir, 'groups.db')}
+        return MessageGrouper({'intelligent_limiting': {'message_grouper': grouper_config}})
+
+    def _dispatcher(self, grouper):
+        dispatcher = GroupFlushDispatcher(grouper, self._send)
+        self.dispatchers.append(dispatcher)
+        return dispatcher
+
+    def _send(self, group):
+        self.sent.append((group, time.time()))
+        self.sent_event.set()
+
+    def _message(self, index, project='alpha'):
+        return {'event_type': 'build', 'channel': 'dingtalk', 'project': project, 'title': f'构建 {index}'}
+
+    def test_group_flushes_at_timeout(self):
+        """测试分组在超时时自动发送"""
+        grouper = self._grouper()
+        dispatcher = self._dispatcher(grouper)
+        start = time.time()
+        for i in range(2):
+            self.assertTrue(grouper.add_message(self._message(i)))
+        dispatcher.wake()
+
+        self.assertTrue(self.sent_event.wait(2))
+        group, sent_at = self.sent[0]
+        self.assertEqual(len(group.messages), 2)
+        self.assertGreaterEqual(sent_at - start, 0.25)
+        self.assertEqual(grouper.active_groups, {})
+        self.assertIsNone(grouper.next_flush_at())
+
+    def test_group_flushes_at_size_threshold(self):
+        """测试分组达到发送阈值时立即发送"""
+        grouper = self._grouper()
+        grouper.grouping_rules['build']['timeout'] = 30
+        dispatcher = self._dispatcher(grouper)
+        for i in range(5):
+            grouper.add_message(self._message(i))
+        dispatcher.wake()
+
+        self.assertTrue(self.sent_event.wait(2))
+        self.assertEqual(len(self.sent[0][0].messages), 5)
+
+    def test_groups_persist_across_processes(self):
+        """测试未发送的分组由其他进程继续累积和发送"""
+        first = self._grouper(persistent=True)
+        second = self._grouper(persistent=True)
+
+        self.assertTrue(first.add_message(self._message(1)))
+        self.assertTrue(second.add_message(self._message(2)))
+        self.assertTrue(second.add_message(self._message(3, project='beta')))
+        # 下一次操作时加载其他进程的修改
+        self.assertEqual(len(first.active_groups), 1)
+        self.assertIsNotNone(first.next_flush_at())
+        self.assertEqual(len(first.active_groups), 2)
+
+        time.sleep(0.35)
+        ready = first.get_ready_groups()
+        self.assertEqual(sorted(len(g.messages) for g in ready), [1, 2])
+        self.assertEqual(second.get_ready_groups(flush_all=True), [])
+        self.assertIsNone(second.next_flush_at())
+
+
+    def test_failed_group_is_requeued(self):
+        """测试发送失败的分组写回存储并稍后重试，达到最大次数后放弃"""
+        grouper = self._grouper(persistent=True)
+        results = [False, True]
+        dispatcher = GroupFlushDispatcher(grouper, lambda group: results.pop(0), retry_delay=0.1)
+        self.dispatchers.append(dispatcher)
+        grouper.add_message(self._message(1))
+
+        time.sleep(0.35)
+        self.assertEqual(dispatcher.dispatch_ready(), 1)
+        # 其他进程也能看到放回的分组
+        self.assertEqual(len(self._grouper(persistent=True).get_ready_groups(flush_all=True)), 1)
+        self.assertEqual(dispatcher.dispatch_ready(), 0)
+
+        grouper = self._grouper()
+        grouper.add_message(self._message(2))
+        dispatcher = GroupFlushDispatcher(grouper, lambda group: False, retry_delay=0.1, max_attempts=2)
+        self.dispatchers.append(dispatcher)
+        time.sleep(0.35)
+        dispatcher.dispatch_ready()
+        self.assertIsNotNone(grouper.next_flush_at())
+        # 分发线程到期重试后放弃
+        time.sleep(0.3)
+        self.assertIsNone(grouper.next_flush_at())
+        self.assertEqual(dispatcher.get_status()['errors'], 2)
+
+    def test_shared_drain_sends_only_due_groups(self):
+        """测试持久化分组在退出时只发送已到期的，不等待未到期的分组"""
+        grouper = self._grouper(persistent=True)
+        grouper.grouping_rules['deploy'] = {'strategy': GroupingStrategy.BY_PROJECT, 'timeout': 30}
+        dispatcher = self._dispatcher(grouper)
+        grouper.add_message(self._message(1))
+        grouper.add_message(dict(self._message(2, project='beta'), event_type='deploy'))
+        dispatcher.wake()
+        time.sleep(0.35)
+
+        start = time.time()
+        dispatcher.drain()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual([group.event_type for group, _ in self.sent], ['build'])
+        remaining = self._grouper(persistent=True).get_ready_groups(flush_all=True)
+        self.assertEqual([group.event_type for group in remaining], ['deploy'])
+
+class TestCooldownTimingWheel(unittest.TestCase):
+    """测试分层时间轮和冷却状态回收"""
+
+    def test_wheel_matches_brute_force(self):
+        """每个条目在到期刻度被取出，不提前也不延后"""
+        rng = random.Random(7)
+        wheel = TimingWheel(tick=1.0, slots=8, levels=3, start=0)
+        deadlines = {}
+        for i in range(500):
+            deadline = rng.randint(1, 2000)
+            wheel.schedule(i, deadline)
+            deadlines[i] = deadline
+        for i in range(0, 500, 5):
+            wheel.cancel(i)
+            del deadlines[i]
+
+        now = 0
+        while deadlines:
+            now += rng.randint(1, 40)
+            expired = wheel.advance(now)
+            expected = {key for key, deadline in deadlines.items() if deadline <= now}
+            self.assertEqual(set(expired), expected)
+            for key in expired:
+                del deadlines[key]
+        self.assertEqual(len(wheel), 0)
+
+    def test_wheel_reschedule_and_idle_jump(self):
+        """重新安排覆盖原到期时间，长时间空闲后推进不逐刻度扫描"""
+        wheel = TimingWheel(tick=1.0, start=1000)
+        wheel.schedule('a', 1010)
+        wheel.schedule('a', 5000)
+        self.assertEqual(wheel.advance(1100), [])
+        self.assertEqual(wheel.deadline('a'), 5000)
+        self.assertEqual(wheel.advance(4999), [])
+        self.assertEqual(wheel.advance(5000), ['a'])
+
+        wheel.schedule('b', 10 ** 9)
+        start = time.perf_counter()
+        self.assertEqual(wheel.advance(10 ** 9 - 1), [])
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(wheel.advance(10 ** 9), ['b'])
+
+    def test_untriggered_keys_not_stored(self):
+        """未触发冷却的内容哈希不保留状态"""
+        manager = CooldownManager({})
+        for i in range(1000):
+            should, _, _ = manager.should_cooldown({'event_type': 'e', 'title': f'消息 {i}'})
+            self.assertFalse(should)
+        self.assertEqual(len(manager.cooldown_states), 0)
+
+    def test_keys_generated_once_per_scope(self):
+        """同一范围的多条规则共享一次键计算"""
+        config = {'intelligent_limiting': {'cooldown_manager': {'rules': [
+            {'scope': 'content_hash', 'type': 'static', 'base_duration': 60, 'trigger_count': 3}
+        ]}}}
+        manager = CooldownManager(config)
+        with mock.patch.object(manager, '_generate_key', wraps=manager._generate_key) as generate:
+            manager.should_cooldown({'event_type': 'e', 'title': 't'})
+        scopes = [call.args[0] for call in generate.call_args_list]
+        self.assertEqual(len(scopes), len(set(scopes)))
+        self.assertEqual(len(scopes), 5)
+
+    def test_triggered_state_reclaimed_after_retention(self):
+        """冷却结束 STATE_RETENTION 秒后状态被回收"""
+        config = {'intelligent_limiting': {'cooldown_manager': {'rules': [
+            {'scope': 'event_type', 'type': 'static', 'base_duration': 30, 'trigger_count': 0}
+        ]}}}
+        manager = CooldownManager(config)
+        should, _, duration = manager.should_cooldown({'event_type': 'burst'})
+        self.assertTrue(should)
+        self.assertEqual(duration, 30)
+        should, reason, _ = manager.should_cooldown({'event_type': 'burst'})
+        self.assertTrue(should)
+        self.assertIn('冷却中', reason)
+
+        state = manager.cooldown_states['event:burst']
+        manager._reap_expired(state.end_time + STATE_RETENTION - 2)
+        self.assertIn('event:burst', manager.cooldown_states)
+        manager._reap_expired(state.end_time + STATE_RETENTION + 1)
+        self.assertNotIn('event:burst', manager.cooldown_states)
+        self.assertEqual(manager.stats['cooldowns_expired'], 1)
+
+        manager.force_cooldown('channel', 'slack', 10)
+        self.assertTrue(manager.cancel_cooldown('channel', 'slack'))
+        self.assertEqual(len(manager.expiry_wheel), 0)
+
+    def test_window_count_incremental(self):
+        """窗口计数从左侧淘汰过期触发"""
+        manager = CooldownManager({})
+        manager.force_cooldown('project', 'p', 1)
+        state = manager.cooldown_states['project:p']
+        state.clear_triggers()
+        now = time.time()
+        for offset in (100, 50, 10, 5):
+            state.add_trigger(now - offset)
+        self.assertEqual(state.count_since(now - 60), 3)
+        self.assertEqual(state.count_since(now - 20), 2)
+        self.assertEqual(len(state.window), 2)
+        self.assertEqual(len(state.history), 4)
+
+
+class TestOperationGateProcessing(unittest.TestCase):
+    """测试操作门的堆队列和按需唤醒的处理线程"""
+
+    def setUp(self):
+        self.gate = OperationGate({})
+        self.executed = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        self.gate.emergency_stop()
+
+    def make_operation(self, operation_id, priority=1, command=''):
+        def callback(operation):
+            self.executed.append((operation.operation_id, time.time()))
+            self.done.set()
+        return OperationRequest(operation_id, 'custom', priority=priority,
+                                context={'command': command}, callback=callback)
+
+    def test_processor_idle_until_enqueued(self):
+        """没有待执行操作时不启动线程，延迟操作按时执行"""
+        self.assertIsNone(self.gate.processor._thread)
+        self.gate.configure_strategy('sensitive_operations', delay_seconds=0.2)
+
+        start = time.time()
+        result, _ = self.gate.should_allow_operation(self.make_operation('push', command='git push --force'))
+        self.assertEqual(result, OperationResult.DEFERRED)
+        self.assertTrue(self.done.wait(2))
+        self.assertLess(self.executed[0][1] - start, 0.3)
+        self.assertIsNone(self.gate.next_operation_at())
+
+    def test_queue_priority_when_rate_limit_frees(self):
+        """限流额度恢复后按优先级（同级按加入顺序）执行排队操作"""
+        self.gate.rate_tracker.rate_limits['minute'] = {'limit': 2, 'window': 1}
+        for i in range(2):
+            self.gate.rate_tracker.record_usage('custom')
+
+        for operation_id, priority in (('low', 1), ('high', 5), ('mid', 3), ('high2', 5)):
+            result, _ = self.gate.should_allow_operation(self.make_operation(operation_id, priority))
+            self.assertEqual(result, OperationResult.QUEUED)
+
+        self.assertTrue(self.gate.cancel_operation('mid'))
+        deadline = time.time() + 6
+        while len(self.executed) < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual([operation_id for operation_id, _ in self.executed[:2]], ['high', 'high2'])
+        self.assertEqual([operation_id for operation_id, _ in self.executed], ['high', 'high2', 'low'])
+        self.assertEqual(self.gate.get_gate_status()['queue_length'], 0)
+
+
+class TestRateLimitTracker(unittest.TestCase):
+    """测试分桶使用量计数和跨进程持久化"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'usage.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_counts_by_operation_and_window(self):
+        """按操作类型和窗口计数，超过一小时的窗口使用分钟级桶"""
+        tracker = RateLimitTracker()
+        now = time.time()
+        tracker._add('read', now - 7200)
+        tracker._add('read', now - 30)
+        tracker._add('write', now - 5)
+
+        self.assertEqual(tracker.get_usage_count(60), 2)
+        self.assertEqual(tracker.get_usage_count(60, 'read'), 1)
+        self.assertEqual(tracker.get_usage_count(86400, 'read'), 2)
+        self.assertEqual(tracker.get_usage_count(60, 'missing'), 0)
+        self.assertEqual(tracker.get_stats()['total_records'], 3)
+
+    def test_seconds_until_available(self):
+        """等待时间为最早的超额记录移出窗口"""
+        tracker = RateLimitTracker({'minute': {'limit': 2, 'window': 60}})
+        now = time.time()
+        self.assertEqual(tracker.seconds_until_available('minute'), 0.0)
+        for offset in (50, 20, 10):
+            tracker._add('op', now - offset)
+        self.assertTrue(tracker.check_rate_limit('minute')['is_limited'])
+        self.assertAlmostEqual(tracker.seconds_until_available('minute'), int(now - 20) + 61 - now, delta=0.1)
+
+    def test_usage_shared_and_restored(self):
+        """使用记录在进程间共享，重启后恢复"""
+        first = RateLimitTracker(store=SQLiteUsageStore(self.db_path))
+        second = RateLimitTracker(store=SQLiteUsageStore(self.db_path))
+        for _ in range(3):
+            first.record_usage('bash')
+        second.record_usage('edit')
+
+        self.assertEqual(first.get_usage_count(60), 4)
+        self.assertEqual(second.get_usage_count(60, 'bash'), 3)
+
+        restarted = RateLimitTracker(store=SQLiteUsageStore(self.db_path))
+        self.assertEqual(restarted.get_usage_count(3600), 4)
+        self.assertEqual(restarted.check_rate_limit('minute')['current'], 4)
+
+    def test_gate_uses_persisted_usage(self):
+        """开启持久化的操作门在重启后仍计入之前的使用量"""
+        config = {'intelligent_limiting': {'operation_gate': {
+            'persistence': {'enabled': True, 'path': self.db_path}
+        }}}
+        gate = OperationGate(config)
+        for i in range(10):
+            result, _ = gate.should_allow_operation(OperationRequest(f'op{i}', 'custom'))
+            self.assertEqual(result, OperationResult.ALLOWED)
+        gate.emergency_stop()
+
+        restarted = OperationGate(config)
+        self.assertTrue(restarted.rate_tracker.check_rate_limit('minute')['is_limited'])
+        restarted.emergency_stop()
+
+
+class TestDuplicateFilter(unittest.TestCase):
+    """测试按时间分片的重复通知过滤器"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_memory_constant_and_false_positive_rate(self):
+        """大量不同通知时内存不变，误判率接近配置值"""
+        dedup = SlicedBloomFilter(300, capacity=5000, error_rate=0.01)
+        size = dedup.get_status()['memory_bytes']
+        now = 1000.0
+        for i in range(5000):
+            dedup.add(f'seen-{i}', now + i * 0.01)
+        self.assertEqual(dedup.get_status()['memory_bytes'], size)
+
+        false_positives = sum(1 for i in range(5000) if dedup.count(f'new-{i}', now + 60))
+        self.assertLess(false_positives / 5000, 0.02)
+        self.assertTrue(all(dedup.count(f'seen-{i}', now + 60) for i in range(0, 5000, 50)))
+
+    def test_window_expiry(self):
+        """记录在窗口内可见，过期的时间片被复用"""
+        dedup = SlicedBloomFilter(300, slices=4)
+        dedup.add('a', 1000)
+        dedup.add('a', 1010)
+        self.assertEqual(dedup.count('a', 1200), 2)
+        self.assertEqual(dedup.count('a', 1299), 2)
+        self.assertEqual(dedup.count('a', 1400), 0)
+
+        dedup.add('b', 1400)
+        self.assertEqual(dedup.count('a', 1400), 0)
+        self.assertEqual(dedup.count('b', 1400), 1)
+
+    def test_critical_duplicates_allowed_three_times(self):
+        """关键通知在窗口内最多发送三次"""
+        throttle = NotificationThrottle({})
+        request = make_request(0, event_type='critical_event', priority=NotificationPriority.CRITICAL)
+        actions = [throttle.should_allow_notification(request)[0] for _ in range(4)]
+        self.assertEqual(actions[:3], [ThrottleAction.ALLOW] * 3)
+        self.assertEqual(actions[3], ThrottleAction.BLOCK)
+
+    def test_shared_file(self):
+        """共享文件中的记录对其他实例可见，参数不同的实例使用各自的文件"""
+        path = os.path.join(self.temp_dir, 'throttle.dedup')
+        first = SlicedBloomFilter(300, path=path)
+        second = SlicedBloomFilter(300, path=path)
+        now = time.time()
+        first.add('shared', now)
+        self.assertEqual(second.count('shared', now), 1)
+
+        reopened = SlicedBloomFilter(300, path=path)
+        self.assertEqual(reopened.count('shared', now), 1)
+        resized = SlicedBloomFilter(300, capacity=100, path=path)
+        self.assertEqual(resized.count('shared', now), 0)
+        self.assertNotEqual(resized.path, first.path)
+        # 旧参数的实例不受影响
+        resized.add('resized', now)
+        self.assertEqual(first.count('shared', now), 1)
+        self.assertEqual(first.count('resized', now), 0)
+
+    def test_mismatched_shared_file_falls_back(self):
+        """共享文件与参数不一致时不改动文件，回退到进程内过滤器"""
+        path = os.path.join(self.temp_dir, 'throttle.dedup')
+        shared_path = SlicedBloomFilter(300, path=path).path
+        with open(shared_path, 'r+b') as f:
+            f.write(b'corrupt!')
+        size = os.path.getsize(shared_path)
+
+        with self.assertRaises(ValueError):
+            SlicedBloomFilter(300, path=path)
+
+        fallback = create_duplicate_filter(300, {}, path)
+        self.assertFalse(fallback.shared)
+        self.assertEqual(os.path.getsize(shared_path), size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+通知投递测试 (发件箱、渠道发送)
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import time
+import shutil
+import tempfile
+import textwrap
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+# 添加项目路径和src路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'src'))
+
+from claude_notifier.core.notifier import Notifier
+from claude_notifier.intelligence.coordinator import IntelligentNotifier
+from claude_notifier.core.executor import DaemonThreadPool
+from claude_notifier.core.outbox import NotificationOutbox, OutboxStatus, OutboxWorker
+from claude_notifier.core.channels import webhook as webhook_module
+from claude_notifier.core.channels.webhook import WebhookChannel, WebhookRetryHandler
+from claude_notifier.core.channels.retry_scheduler import RetryScheduler
+from claude_notifier.core.channels.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    get_circuit_breaker_states,
+    reset_circuit_breakers
+)
+from claude_notifier.utils.breaker_store import SQLiteBreakerStore
+from claude_notifier.core.channels.http_client import (
+    AsyncResponse,
+    get_http_session,
+    close_http_sessions,
+    get_http_pool_stats
+)
+
+
+class FakeChannel:
+    """可控结果的测试渠道"""
+
+    def __init__(self, results=None, delay=0.0):
+        self.results = list(results or [])
+        self.delay = delay
+        self.sent = []
+        self.circuit_breaker = None
+
+    def reports_circuit_outcomes(self):
+        return False
+
+    def send_notification(self, template_data, event_type='custom'):
+        if self.delay:
+            time.sleep(self.delay)
+        self.sent.append((template_data, event_type))
+        return self.results.pop(0) if self.results else True
+
+
+class AsyncFakeChannel(FakeChannel):
+    """原生异步的测试渠道"""
+
+    async def asend_notification(self, template_data, event_type='custom'):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append((template_data, event_type))
+        return self.results.pop(0) if self.results else True
+
+
+class DeliveryTestCase(unittest.TestCase):
+    """隔离 HOME 目录的测试基类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.env_patch = patch.dict(os.environ, {'HOME': self.temp_dir})
+        self.env_patch.start()
+
+    def tearDown(self):
+        self.env_patch.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def create_notifier(self, config, notifier_class=Notifier, **kwargs):
+        """根据配置创建通知器"""
+        config_path = os.path.join(self.temp_dir, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(config, f)
+
+        notifier = notifier_class(config_path, **kwargs)
+        self.addCleanup(notifier.close)
+        return notifier
+
+
+class TestChannelFanOut(DeliveryTestCase):
+    """渠道并发发送测试"""
+
+    def test_channels_are_sent_concurrently(self):
+        """测试多个慢速渠道并发发送"""
+        notifier = self.create_notifier({})
+        notifier.channels = {
+            'slow_a': FakeChannel(delay=0.3),
+            'slow_b': FakeChannel(delay=0.3),
+            'slow_c': FakeChannel(delay=0.3)
+        }
+
+        start = time.time()
+        self.assertTrue(notifier.send('你好'))
+        self.assertLess(time.time() - start, 0.8)
+
+        results = notifier.last_delivery_results
+        self.assertEqual(list(results.keys()), ['slow_a', 'slow_b', 'slow_c'])
+        for result in results.values():
+            self.assertEqual(result['status'], 'sent')
+            self.assertGreaterEqual(result['elapsed'], 0.25)
+
+    def test_channel_timeout(self):
+        """测试单渠道超时不影响其他渠道"""
+        notifier = self.create_notifier({'notifications': {'delivery': {'channel_timeout': 0.1}}})
+        notifier.channels = {
+            'fast': FakeChannel(),
+            'hanging': FakeChannel(delay=1.0)
+        }
+
+        start = time.time()
+        results = notifier.dispatch_to_channels({'content': '你好'}, ['fast', 'hanging'], 'custom')
+        self.assertLess(time.time() - start, 0.8)
+        self.assertEqual(results['fast']['status'], 'sent')
+        self.assertEqual(results['hanging']['status'], 'timeout')
+        self.assertFalse(results['hanging']['success'])
+
+    def test_timed_out_channel_does_not_block_exit(self):
+        """测试超时后被放弃的渠道不会阻止进程退出"""
+        script = textwrap.dedent('''
+            import time
+            from claude_notifier.core.notifier import Notifier
+
+            class HangingChannel:
+                circuit_breaker = None
+
+                def reports_circuit_outcomes(self):
+                    return False
+
+                def send_notification(self, template_data, event_type):
+                    time.sleep(30)
+                    return True
+
+            notifier = Notifier()
+            notifier.channel_timeout = 0.1
+            notifier.channels = {'hanging': HangingChannel()}
+            print(notifier.dispatch_to_channels({'content': 'hi'}, ['hanging'], 'custom')['hanging']['status'])
+        ''')
+        env = dict(os.environ, PYTHONPATH=str(project_root / 'src'))
+
+        start = time.time()
+        result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, timeout=20)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual(result.stdout.strip(), 'timeout')
+
+    def test_any_success_semantics(self):
+        """测试任一渠道成功即视为成功"""
+        notifier = self.create_notifier({})
+        notifier.channels = {
+            'broken': FakeChannel(results=[False]),
+            'working': FakeChannel()
+        }
+
+        self.assertTrue(notifier.send('你好', channels=['broken', 'working', 'missing']))
+        results = notifier.last_delivery_results
+        self.assertEqual(results['broken']['status'], 'failed')
+        self.assertEqual(results['missing']['status'], 'skipped')
+
+        notifier.channels['working'] = FakeChannel(results=[False])
+        notifier.channels['broken'] = FakeChannel(results=[False])
+        self.assertFalse(notifier.send('你好', channels=['broken', 'working']))
+
+
+class TestDaemonThreadPool(unittest.TestCase):
+    """守护线程池测试"""
+
+    def test_submit_and_shutdown(self):
+        """测试有界并发、守护线程和取消排队任务"""
+        pool = DaemonThreadPool(max_workers=2, thread_name_prefix='test-pool')
+        release = threading.Event()
+        running = [pool.submit(release.wait, 5) for _ in range(2)]
+        queued = pool.submit(lambda: 'never')
+        time.sleep(0.05)
+
+        self.assertTrue(all(thread.daemon for thread in threading.enumerate() if thread.name.startswith('test-pool')))
+        self.assertFalse(queued.running())
+
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        with self.assertRaises(RuntimeError):
+            pool.submit(print)
+
+        release.set()
+        self.assertEqual([future.result(timeout=2) for future in running], [True, True])
+
+
+class TestAsyncSend(DeliveryTestCase):
+    """异步发送测试"""
+
+    def test_asend_many_on_one_loop(self):
+        """测试单个事件循环上的大量并发通知"""
+        notifier = self.create_notifier({})
+        channel = AsyncFakeChannel(delay=0.2)
+        notifier.channels = {'async': channel}
+
+        async def run():
+            return await asyncio.gather(*(notifier.asend(f'消息 {i}') for i in range(500)))
+
+        start = time.time()
+        results = asyncio.run(run())
+        self.assertLess(time.time() - start, 2.0)
+        self.assertTrue(all(results))
+        self.assertEqual(len(channel.sent), 500)
+
+    def test_asend_sync_channel_and_timeout(self):
+        """测试同步渠道回退和异步超时"""
+        notifier = self.create_notifier({'notifications': {'delivery': {'channel_timeout': 0.1}}})
+        notifier.channels = {
+            'sync': FakeChannel(),
+            'hanging': AsyncFakeChannel(delay=5.0)
+        }
+
+        results = asyncio.run(
+            notifier.adispatch_to_channels({'content': '你好'}, ['sync', 'hanging', 'missing'], 'custom')
+        )
+        self.assertEqual(results['sync']['status'], 'sent')
+        self.assertEqual(results['hanging']['status'], 'timeout')
+        self.assertEqual(results['missing']['status'], 'skipped')
+
+    def test_webhook_async_retry(self):
+        """测试 Webhook 异步重试"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': 'https://example.com/hook',
+            'retry_count': 2,
+            'retry_delay': 0.01
+        })
+        responses = [AsyncResponse(503, '', {}), AsyncResponse(200, 'ok', {})]
+        calls = []
+
+        async def fake_request(method, url, **kwargs):
+            calls.append((method, url))
+            return responses.pop(0)
+
+        with patch.object(webhook_module, 'AIOHTTP_AVAILABLE', True), \
+                patch.object(webhook_module, 'async_request', fake_request):
+            result = asyncio.run(channel.asend_notification({'content': '你好'}, 'test'))
+
+        self.assertTrue(result)
+        self.assertEqual(len(calls), 2)
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """记录客户端连接端口的 HTTP 处理器 (keep-alive)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.client_ports.append(self.client_address[1])
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpConnectionPool(unittest.TestCase):
+    """HTTP 共享连接池测试"""
+
+    def setUp(self):
+        close_http_sessions()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RecordingHandler)
+        self.server.client_ports = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+
+    def tearDown(self):
+        close_http_sessions()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_per_host(self):
+        """测试按主机共享会话"""
+        session = get_http_session('https://example.com/a')
+        self.assertIs(session, get_http_session('https://EXAMPLE.com/b?x=1'))
+        self.assertIsNot(session, get_http_session('https://example.org/a'))
+        self.assertEqual(get_http_pool_stats()['sessions'], 2)
+
+    def test_webhook_reuses_connection(self):
+        """测试重复发送复用同一连接"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': f'http://127.0.0.1:{self.server.server_address[1]}/hook',
+            'retry_count': 0
+        })
+
+        for _ in range(3):
+            self.assertTrue(channel.send_notification({'content': '你好'}, 'test'))
+
+        self.assertEqual(len(self.server.client_ports), 3)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+
+class _FakeResponse:
+    """模拟 requests.Response"""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TestRetryScheduler(unittest.TestCase):
+    """重试调度器测试"""
+
+    def setUp(self):
+        self.scheduler = RetryScheduler(max_workers=2)
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_runs_in_due_order(self):
+        """测试按到期时间执行"""
+        order = []
+        self.scheduler.schedule(0.15, order.append, 'late')
+        self.scheduler.schedule(0.05, order.append, 'early')
+        self.scheduler.schedule(0, order.append, 'now')
+
+        self.assertTrue(self.scheduler.wait_idle(timeout=2))
+        self.assertEqual(order, ['now', 'early', 'late'])
+        self.assertEqual(self.scheduler.get_status()['executed'], 3)
+
+    def test_drain_is_bounded(self):
+        """测试 drain() 在当前线程执行到期的重试，超时后剩余重试交还调度线程"""
+        order = []
+        self.scheduler.schedule(0.05, order.append, 'soon')
+        self.scheduler.schedule(5, order.append, 'late')
+
+        start = time.time()
+        self.assertFalse(self.scheduler.drain(timeout=0.3))
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(order, ['soon'])
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+        # 调度线程已恢复，之后排期的重试照常执行
+        self.scheduler.schedule(0, order.append, 'after')
+        self.assertTrue(self.wait_for(lambda: 'after' in order))
+        self.assertFalse(self.scheduler.drain(timeout=0))
+
+    def wait_for(self, predicate, timeout=2.0):
+        deadline = time.time() + timeout
+        while not predicate() and time.time() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_retry_after_header(self):
+        """测试 429 响应使用 Retry-After"""
+        handler = WebhookRetryHandler(retry_count=3, retry_delay=1.0, retry_jitter=0.5, max_retry_delay=60)
+
+        self.assertEqual(handler.get_next_delay(1, _FakeResponse(429, {'Retry-After': '7'})), 7.0)
+        self.assertEqual(handler.get_next_delay(1, _FakeResponse(429, {'Retry-After': '3600'})), 60)
+        http_date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        self.assertEqual(handler.get_next_delay(1, _FakeResponse(429, {'Retry-After': http_date})), 0.0)
+
+        for _ in range(20):
+            delay = handler.get_next_delay(2, _FakeResponse(503))
+            self.assertTrue(1.0 <= delay <= 3.0)
+
+    def test_webhook_sender_is_released(self):
+        """测试 Webhook 失败后立即返回，重试在后台完成"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': 'https://example.com/hook',
+            'retry_count': 2,
+            'retry_delay': 0.2
+        })
+        responses = [_FakeResponse(503), _FakeResponse(200)]
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append(time.time())
+            return responses.pop(0)
+
+        with patch.object(webhook_module, 'http_request', fake_request), \
+                patch.object(webhook_module, 'get_retry_scheduler', lambda: self.scheduler):
+            start = time.time()
+            # 已排期重试但尚未送达，本次发送报告失败
+            self.assertFalse(channel.send_notification({'content': '你好'}, 'test'))
+            self.assertLess(time.time() - start, 0.15)
+            self.assertEqual(len(calls), 1)
+
+            self.assertTrue(self.scheduler.wait_idle(timeout=2))
+
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.15)
+
+    def test_webhook_retry_chain_failure_is_reported(self):
+        """测试后台重试全部失败时记录错误并计入熔断器"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': 'https://example.com/hook',
+            'retry_count': 2,
+            'retry_delay': 0.01
+        })
+        channel.circuit_breaker = CircuitBreaker('webhook', failure_threshold=10, recovery_timeout=60)
+
+        with patch.object(webhook_module, 'http_request', lambda *args, **kwargs: _FakeResponse(503)), \
+                patch.object(webhook_module, 'get_retry_scheduler', lambda: self.scheduler), \
+                self.assertLogs(channel.logger, level='ERROR') as logs:
+            self.assertFalse(channel.send_notification({'content': '你好'}, 'test'))
+            self.assertTrue(self.scheduler.wait_idle(timeout=2))
+
+        self.assertTrue(any('重试全部失败' in line for line in logs.output))
+        self.assertEqual(channel.circuit_breaker.get_status()['consecutive_failures'], 3)
+
+    def test_webhook_without_retry(self):
+        """测试 none 模式只尝试一次"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': 'https://example.com/hook',
+            'retry_count': 3,
+            'retry_delay': 0.01,
+            'retry_mode': 'none'
+        })
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append(url)
+            return _FakeResponse(503)
+
+        with patch.object(webhook_module, 'http_request', fake_request), \
+                patch.object(webhook_module, 'get_retry_scheduler', lambda: self.scheduler):
+            self.assertFalse(channel.send_notification({'content': '你好'}, 'test'))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+
+class TestCircuitBreaker(DeliveryTestCase):
+    """渠道熔断测试"""
+
+    def setUp(self):
+        super().setUp()
+        reset_circuit_breakers()
+        self.addCleanup(reset_circuit_breakers)
+
+    def test_state_transitions(self):
+        """测试熔断、半开探测和恢复"""
+        breaker = CircuitBreaker('demo', failure_threshold=2, recovery_timeout=0.1)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        time.sleep(0.12)
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        # 探测失败重新熔断
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+        time.sleep(0.12)
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertEqual(breaker.get_status()['opened'], 1)
+
+    def test_state_shared_across_processes(self):
+        """测试持久化的熔断状态由多个进程共同累积，并对其他进程可见"""
+        path = os.path.join(self.temp_dir, 'circuit.db')
+        # 每个钩子进程各自打开存储，各记录一次失败
+        for _ in range(2):
+            breaker = CircuitBreaker('demo', failure_threshold=2, recovery_timeout=60,
+                                     store=SQLiteBreakerStore(path))
+            self.assertTrue(breaker.allow_request())
+            breaker.record_failure()
+
+        breaker = CircuitBreaker('demo', failure_threshold=2, recovery_timeout=60,
+                                 store=SQLiteBreakerStore(path))
+        self.assertFalse(breaker.allow_request())
+
+        # 监控仪表板在独立进程中读取
+        states = get_circuit_breaker_states(path)
+        self.assertEqual(states['demo']['state'], CircuitState.OPEN)
+        self.assertEqual(states['demo']['consecutive_failures'], 2)
+        self.assertEqual(states['demo']['opened'], 1)
+
+        breaker.record_success()
+        self.assertEqual(get_circuit_breaker_states(path)['demo']['state'], CircuitState.CLOSED)
+        self.assertEqual(get_circuit_breaker_states(os.path.join(self.temp_dir, 'missing.db')), {})
+
+    def test_open_channel_is_skipped(self):
+        """测试熔断后的渠道立即跳过，冷却后放行探测"""
+        notifier = self.create_notifier({
+            'notifications': {'circuit_breaker': {'failure_threshold': 2, 'recovery_timeout': 0.2}}
+        })
+        broken = FakeChannel(results=[False, False])
+        broken.circuit_breaker = notifier._get_circuit_breaker('broken')
+        notifier.channels = {'broken': broken, 'working': FakeChannel()}
+
+        notifier.send('你好')
+        notifier.send('你好')
+        self.assertEqual(len(broken.sent), 2)
+
+        self.assertTrue(notifier.send('你好'))
+        self.assertEqual(len(broken.sent), 2)
+        self.assertEqual(notifier.last_delivery_results['broken']['status'], 'open')
+        self.assertEqual(notifier.get_status()['circuit_breakers']['broken']['state'], CircuitState.OPEN)
+
+        time.sleep(0.25)
+        notifier.send('你好')
+        self.assertEqual(len(broken.sent), 3)
+        self.assertEqual(broken.circuit_breaker.state, CircuitState.CLOSED)
+
+    def test_timeout_counts_as_failure(self):
+        """测试超时计入连续失败"""
+        notifier = self.create_notifier({
+            'notifications': {
+                'delivery': {'channel_timeout': 0.05},
+                'circuit_breaker': {'failure_threshold': 1}
+            }
+        })
+        hanging = FakeChannel(delay=0.3)
+        hanging.circuit_breaker = notifier._get_circuit_breaker('hanging')
+        notifier.channels = {'hanging': hanging}
+
+        notifier.dispatch_to_channels({'content': '你好'}, ['hanging'], 'custom')
+        self.assertEqual(hanging.circuit_breaker.state, CircuitState.OPEN)
+
+    def test_webhook_stops_retrying_when_open(self):
+        """测试 Webhook 熔断后放弃剩余重试"""
+        channel = WebhookChannel({
+            'enabled': True,
+            'url': 'https://example.com/hook',
+            'retry_count': 5,
+            'retry_delay': 0.01,
+            'retry_mode': 'blocking'
+        })
+        channel.circuit_breaker = CircuitBreaker('webhook', failure_threshold=2, recovery_timeout=60)
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append(url)
+            return _FakeResponse(503)
+
+        with patch.object(webhook_module, 'http_request', fake_request):
+            self.assertFalse(channel.send_notification({'content': '你好'}, 'test'))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(channel.circuit_breaker.state, CircuitState.OPEN)
+
+
+class TestNotificationOutbox(DeliveryTestCase):
+    """发件箱测试"""
+
+    def setUp(self):
+        super().setUp()
+        self.outbox = NotificationOutbox({
+            'path': os.path.join(self.temp_dir, 'outbox.db'),
+            'max_attempts': 2,
+            'retry_delay': 0,
+            'lease_seconds': 60
+        })
+
+    def test_enqueue_claim_complete(self):
+        """测试写入、领取和完成"""
+        entry_id = self.outbox.enqueue({'content': '测试'}, ['fake'], 'custom')
+
+        entries = self.outbox.claim_due()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['id'], entry_id)
+        self.assertEqual(entries[0]['template_data'], {'content': '测试'})
+
+        # 已领取的记录不会被重复领取
+        self.assertEqual(self.outbox.claim_due(), [])
+
+        self.outbox.complete(entry_id)
+        self.assertEqual(self.outbox.get_stats()['delivering'], 0)
+
+    def test_retry_until_failed(self):
+        """测试重试和最大重试次数"""
+        entry_id = self.outbox.enqueue({'content': '测试'}, ['a', 'b'], 'custom')
+        self.outbox.claim_due()
+
+        self.assertTrue(self.outbox.retry(entry_id, ['b'], 'error'))
+        entries = self.outbox.claim_due()
+        self.assertEqual(entries[0]['channels'], ['b'])
+        self.assertEqual(entries[0]['attempts'], 1)
+
+        self.assertFalse(self.outbox.retry(entry_id, ['b'], 'error'))
+        self.assertEqual(self.outbox.get_stats()['failed'], 1)
+        self.assertEqual(self.outbox.purge_failed(), 1)
+
+    def test_expired_lease_is_reclaimed(self):
+        """测试持有者崩溃后记录被重新领取"""
+        self.outbox.lease_seconds = 0
+        self.outbox.enqueue({'content': '测试'}, ['fake'], 'custom')
+        self.assertEqual(len(self.outbox.claim_due()), 1)
+
+        # 模拟重启后恢复
+        reopened = NotificationOutbox({'path': self.outbox.db_path})
+        self.assertTrue(reopened.has_due())
+        self.assertEqual(len(reopened.claim_due()), 1)
+
+    def test_drain_claims_one_entry_before_each_delivery(self):
+        """测试投递时逐条领取，截止时间到达后其余记录保持待投递"""
+        for i in range(3):
+            self.outbox.enqueue({'content': f'测试 {i}'}, ['fake'], 'custom')
+
+        def deliver(entry):
+            self.assertEqual(self.outbox.get_stats()['delivering'], 1)
+            time.sleep(0.2)
+            self.outbox.complete(entry['id'])
+
+        worker = OutboxWorker(self.outbox, deliver)
+        self.assertEqual(worker.drain(deadline=time.time() + 0.3), 2)
+        stats = self.outbox.get_stats()
+        self.assertEqual((stats['pending'], stats['delivering']), (1, 0))
+
+
+class TestNotifierOutbox(DeliveryTestCase):
+    """通知器发件箱集成测试"""
+
+    def create_outbox_notifier(self, channel, start_worker=True):
+        notifier = self.create_notifier({
+            'notifications': {
+                'outbox': {
+                    'enabled': True,
+                    'path': os.path.join(self.temp_dir, 'outbox.db'),
+                    'retry_delay': 0,
+                    'poll_interval': 0.05
+                }
+            }
+        }, start_worker=start_worker)
+        notifier.channels = {'fake': channel}
+        return notifier
+
+    def wait_for(self, predicate, timeout=5.0):
+        deadline = time.time() + timeout
+        while not predicate() and time.time() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_send_is_delivered_by_worker(self):
+        """测试 send() 写入发件箱后由工作线程投递"""
+        channel = FakeChannel()
+        notifier = self.create_outbox_notifier(channel)
+
+        self.assertTrue(notifier.send('你好', event_type='custom'))
+        self.assertTrue(self.wait_for(lambda: len(channel.sent) == 1))
+        self.assertTrue(self.wait_for(lambda: notifier.get_status()['outbox']['delivering'] == 0))
+        self.assertEqual(notifier.get_status()['outbox']['pending'], 0)
+
+    def test_failed_delivery_is_retried(self):
+        """测试失败的渠道会被重试"""
+        channel = FakeChannel(results=[False, True])
+        notifier = self.create_outbox_notifier(channel)
+
+        notifier.send('你好')
+        self.assertTrue(self.wait_for(lambda: len(channel.sent) == 2))
+
+    def test_outbox_owns_webhook_retries(self):
+        """测试启用发件箱时 Webhook 不再另行排期重试"""
+        notifier = self.create_notifier({
+            'channels': {
+                'webhook': {'enabled': True, 'url': 'https://example.com/hook'}
+            },
+            'notifications': {
+                'outbox': {'enabled': True, 'path': os.path.join(self.temp_dir, 'outbox.db')}
+            }
+        })
+        self.assertEqual(notifier.channels['webhook'].retry_mode, 'none')
+
+        self.assertTrue(notifier.reload_config())
+        self.assertEqual(notifier.channels['webhook'].retry_mode, 'none')
+
+    def test_without_worker(self):
+        """测试未启动投递线程时 send() 在当前线程投递，或只写入发件箱"""
+        channel = FakeChannel()
+        notifier = self.create_outbox_notifier(channel, start_worker=False)
+        self.assertFalse(notifier.outbox_worker.is_running())
+
+        self.assertTrue(notifier.send('你好'))
+        self.assertEqual(len(channel.sent), 1)
+        self.assertEqual(notifier.get_status()['outbox']['pending'], 0)
+
+        notifier.outbox_inline_delivery = False
+        self.assertTrue(notifier.send('你好'))
+        self.assertEqual(len(channel.sent), 1)
+        self.assertEqual(notifier.get_status()['outbox']['pending'], 1)
+
+    def test_flush_outbox(self):
+        """测试在当前线程投递遗留通知"""
+        channel = FakeChannel()
+        notifier = self.create_outbox_notifier(channel, start_worker=False)
+
+        notifier.outbox.enqueue({'content': '遗留通知'}, ['fake'], 'custom')
+        self.assertEqual(notifier.flush_outbox(timeout=5), 1)
+        self.assertEqual(channel.sent[0][0]['content'], '遗留通知')
+
+
+class TestIntelligentDelivery(DeliveryTestCase):
+    """智能通知器发送时机测试"""
+
+    def create_intelligent_notifier(self, **intelligence_config):
+        notifier = self.create_notifier({
+            'intelligent_limiting': {'enabled': True, **intelligence_config}
+        }, notifier_class=IntelligentNotifier)
+        channel = FakeChannel()
+        notifier.channels = {'fake': channel}
+        return notifier, channel
+
+    def test_critical_notification_is_not_grouped(self):
+        """测试单条高优先级通知立即发送，不等待分组超时"""
+        notifier, channel = self.create_intelligent_notifier()
+
+        self.assertTrue(notifier.send('删除生产数据', event_type='sensitive_operation', priority='critical'))
+        self.assertEqual(len(channel.sent), 1)
+        self.assertEqual(notifier.message_grouper.active_groups, {})
+
+    def test_event_without_rule_is_not_grouped(self):
+        """测试未配置分组规则的事件默认直接发送"""
+        notifier, channel = self.create_intelligent_notifier()
+
+        self.assertTrue(notifier.send('自定义通知', event_type='custom'))
+        self.assertEqual(len(channel.sent), 1)
+
+    def test_asend_keeps_shared_store_off_event_loop(self):
+        """测试启用持久化时智能判断不在事件循环线程中执行"""
+        for persistent in (False, True):
+            config = {}
+            if persistent:
+                config['notification_throttle'] = {
+                    'persistence': {'enabled': True, 'path': os.path.join(self.temp_dir, 'throttle.db')}
+                }
+            notifier, channel = self.create_intelligent_notifier(**config)
+            threads = []
+            apply_intelligence = notifier._apply_intelligence
+
+            def recording_apply(*args, **kwargs):
+                threads.append(threading.get_ident())
+                return apply_intelligence(*args, **kwargs)
+
+            notifier._apply_intelligence = recording_apply
+
+            async def run():
+                self.assertTrue(await notifier.asend('你好'))
+                return threading.get_ident()
+
+            loop_thread = asyncio.run(run())
+            self.assertEqual(threads[0] != loop_thread, persistent)
+            self.assertEqual(len(channel.sent), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,9 @@ import concurrent.futures
 import tempfile
 import os
 import sys
+import json
+import shutil
+import subprocess
 import psutil
 import yaml
 from pathlib import Path
@@ -244,6 +247,66 @@ class TestBasicOperationPerformance(unittest.TestCase):
         except ImportError as e:
             self.skipTest(f"事件模块不可用: {e}")
             
+    def test_template_rendering_performance(self):
+        """测试模板渲染性能（编译后的渲染计划 vs 每次构造 string.Template）"""
+        try:
+            from string import Template
+            from claude_notifier.templates.template_engine import TemplateEngine
+            
+            engine = TemplateEngine(template_dir=self.temp_dir)
+            template_name = 'sensitive_operation_default'
+            template = engine.get_template(template_name)
+            data = {
+                'project': 'test-project',
+                'operation': 'sudo rm -rf /tmp/test',
+                'risk_level': 'high',
+                'timestamp': '2025-08-20 12:00:00'
+            }
+            
+            def render_with_template(template, data):
+                """原实现：每段文本都构造一次 Template"""
+                rendered = {
+                    'title': Template(template['title']).safe_substitute(data),
+                    'content': Template(template['content']).safe_substitute(data),
+                    'fields': [
+                        {'label': Template(field['label']).safe_substitute(data),
+                         'value': Template(field['value']).safe_substitute(data),
+                         'short': field['short']}
+                        for field in template['fields']
+                    ],
+                    'actions': [
+                        dict(action,
+                             text=Template(action['text']).safe_substitute(data),
+                             url=Template(action['url']).safe_substitute(data))
+                        for action in template['actions']
+                    ],
+                    'color': template['color']
+                }
+                return rendered
+                
+            # 渲染结果与逐段 Template 替换一致
+            self.assertEqual(engine.render_template(template_name, data), render_with_template(template, data))
+            
+            iterations = 5000
+            
+            self.metrics.start_timing()
+            for _ in range(iterations):
+                render_with_template(template, data)
+            baseline = self.metrics.end_timing('template_render_string_template')
+            
+            self.metrics.start_timing()
+            for _ in range(iterations):
+                engine.render_template(template_name, data)
+            duration = self.metrics.end_timing('template_render_plan')
+            
+            print(f"\n模板渲染: 渲染计划 {duration * 1e6 / iterations:.1f}µs/次, "
+                  f"string.Template {baseline * 1e6 / iterations:.1f}µs/次 ({baseline / duration:.1f}x)")
+            
+            self.assertLess(duration, 1.0, "5000次模板渲染应该在1秒内完成")
+            
+        except ImportError as e:
+            self.skipTest(f"模板模块不可用: {e}")
+            
     def test_config_loading_performance(self):
         """测试配置加载性能"""
         try:
@@ -567,6 +630,88 @@ class TestScalabilityPerformance(unittest.TestCase):
             self.skipTest(f"工具函数不可用: {e}")
 
 
+# 钩子冷启动探测脚本：在全新解释器中执行一次非敏感工具的 PreToolUse，
+# 向 stderr 输出新导入的模块和耗时
+HOOK_STARTUP_PROBE = """
+import io, sys, json, time
+baseline = set(sys.modules)
+start = time.perf_counter()
+sys.stdin = io.StringIO(json.dumps({'tool_name': 'Read', 'tool_input': {'file_path': 'a.py'}}))
+from claude_notifier.hooks.claude_hook import main
+main()
+elapsed = time.perf_counter() - start
+modules = sorted(name for name in sys.modules if name not in baseline)
+sys.stderr.write(json.dumps({'elapsed': elapsed, 'modules': modules}))
+"""
+
+
+class TestHookStartupPerformance(unittest.TestCase):
+    """测试钩子冷启动开销
+    
+    每次工具调用都会启动一个钩子进程，非敏感工具的 PreToolUse 不发送通知，
+    不应加载 Notifier、渠道、yaml、requests 等重型模块。
+    """
+    
+    # 导入预算：钩子模块本身 + logging 及其依赖
+    MAX_IMPORTED_MODULES = 40
+    MAX_STARTUP_SECONDS = 0.3
+    
+    # 非敏感事件不应导入的模块
+    HEAVY_MODULES = [
+        'yaml',
+        'requests',
+        'urllib3',
+        'sqlite3',
+        'asyncio',
+        'concurrent.futures',
+        'claude_notifier.core.notifier',
+        'claude_notifier.core.channels',
+        'claude_notifier.intelligence',
+        'claude_notifier.hooks.daemon',
+        'claude_notifier.hooks.installer',
+    ]
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.temp_dir = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        """清理测试环境"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        
+    def run_probe(self):
+        """在子进程中运行一次钩子，返回 (stdout, 探测结果)"""
+        env = os.environ.copy()
+        env.update({
+            'HOME': self.temp_dir,
+            'PYTHONPATH': str(project_root / 'src'),
+            'CLAUDE_HOOK_EVENT': 'PreToolUse',
+            'CLAUDE_NOTIFIER_NO_DAEMON': '1'
+        })
+        result = subprocess.run(
+            [sys.executable, '-c', HOOK_STARTUP_PROBE],
+            capture_output=True, text=True, env=env, timeout=30
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout, json.loads(result.stderr.strip().splitlines()[-1])
+        
+    def test_non_sensitive_pre_tool_use_budget(self):
+        """测试非敏感工具的 PreToolUse 导入和耗时预算"""
+        stdout, probe = self.run_probe()
+        self.assertEqual(json.loads(stdout), {'continue': True})
+        
+        modules = probe['modules']
+        print(f"钩子启动: {probe['elapsed'] * 1000:.1f}ms, 新导入模块 {len(modules)} 个")
+        
+        for heavy in self.HEAVY_MODULES:
+            self.assertNotIn(heavy, modules, f"钩子冷启动不应导入 {heavy}")
+        self.assertLessEqual(len(modules), self.MAX_IMPORTED_MODULES, modules)
+        
+        # 取多次运行的最小值，减少机器负载的干扰
+        elapsed = min([probe['elapsed']] + [self.run_probe()[1]['elapsed'] for _ in range(2)])
+        self.assertLess(elapsed, self.MAX_STARTUP_SECONDS)
+
+
 def run_performance_tests():
     """运行所有性能测试"""
     # 创建测试套件
@@ -577,7 +722,8 @@ def run_performance_tests():
         TestBasicOperationPerformance,
         TestConcurrencyPerformance,
         TestMemoryPerformance,
-        TestScalabilityPerformance
+        TestScalabilityPerformance,
+        TestHookStartupPerformance
     ]
     
     for test_class in test_classes: